@@ -28,7 +28,6 @@
 
 import numpy
 import warnings
-import copy
 
 # MODBY: Alexandre Fassio
 # Inherit inhouse modifications. Package: MyBio.
@@ -188,6 +187,9 @@ class Atom(object):
 
     def set_coord(self, coord):
         self.coord = coord
+        # Discard the spatial index of the parents.
+        if self.parent is not None:
+            self.parent._invalidate_neighbor_search()
 
     def set_altloc(self, altloc):
         self.altloc = altloc
@@ -336,6 +338,9 @@ class Atom(object):
         @type tran: size 3 Numeric array
         """
         self.coord = numpy.dot(self.coord, rot) + tran
+        # Discard the spatial index of the parents.
+        if self.parent is not None:
+            self.parent._invalidate_neighbor_search()
 
     def get_vector(self):
         """Return coordinates as Vector.
@@ -352,10 +357,15 @@ class Atom(object):
         Parent information is lost.
         """
         # Do a shallow copy then explicitly copy what needs to be deeper.
-        shallow = copy.copy(self)
+        # Copy the attributes directly as copy.copy() is much slower.
+        shallow = self.__class__.__new__(self.__class__)
+        shallow.__dict__.update(self.__dict__)
         shallow.detach_parent()
-        shallow.set_coord(copy.copy(self.get_coord()))
+        shallow.set_coord(self.get_coord().copy())
         shallow.xtra = self.xtra.copy()
+        # Metal coordination is perceived for each structure, so copies
+        # must not share it.
+        shallow.metal_coordination = set(self.metal_coordination)
         return shallow
 
 
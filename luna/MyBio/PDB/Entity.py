@@ -11,6 +11,7 @@
 
 # 1) Inherit inhouse modifications. Package: MyBio.
 # 2) Included function get_parent_by_level.
+# 3) Included a cached spatial index (function get_neighbor_search).
 
 # Each line or block with modifications contain a MODBY tag.
 
@@ -44,9 +45,17 @@ class Entity(object):
         self.child_dict = {}
         # Dictionary that keeps additional properties
         self.xtra = {}
+        # Spatial index built on demand by get_neighbor_search.
+        self._neighbor_search = None
 
     # Special methods
 
+    # The spatial index is not pickled, as it is rebuilt on demand.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_neighbor_search"] = None
+        return state
+
     def __len__(self):
         """Return the number of children."""
         return len(self.child_list)
@@ -85,6 +94,13 @@ class Entity(object):
                 pass  # Atoms do not cache their full ids.
         self.full_id = None
 
+    def _invalidate_neighbor_search(self):
+        """Discard the spatial index of this entity and of its parents."""
+        entity = self
+        while entity is not None:
+            entity._neighbor_search = None
+            entity = entity.parent
+
     # Public methods
 
     @property
@@ -137,6 +153,7 @@ class Entity(object):
         child.detach_parent()
         del self.child_dict[id]
         self.child_list.remove(child)
+        self._invalidate_neighbor_search()
 
     def add(self, entity):
         """Add a child to the Entity."""
@@ -147,6 +164,7 @@ class Entity(object):
         entity.set_parent(self)
         self.child_list.append(entity)
         self.child_dict[entity_id] = entity
+        self._invalidate_neighbor_search()
 
     def insert(self, pos, entity):
         """Add a child to the Entity at a specified position."""
@@ -157,6 +175,7 @@ class Entity(object):
         entity.set_parent(self)
         self.child_list[pos:pos] = [entity]
         self.child_dict[entity_id] = entity
+        self._invalidate_neighbor_search()
 
     def get_iterator(self):
         """Return iterator over children."""
@@ -195,6 +214,24 @@ class Entity(object):
         else:
             return self.parent.get_parent_by_level(level)
 
+    def get_neighbor_search(self):
+        """Return a NeighborSearch object for all atoms in this entity.
+
+        The KD tree is built only once and reused by all subsequent calls.
+        It is automatically discarded when children are added to or removed
+        from this entity or any of its descendants, or when atomic
+        coordinates are changed with Atom.set_coord or transform.
+        """
+        # Objects pickled by older versions do not have this attribute.
+        if getattr(self, "_neighbor_search", None) is None:
+            # Avoid circular imports.
+            from luna.MyBio.PDB.NeighborSearch import NeighborSearch
+            from luna.MyBio.PDB.Selection import unfold_entities
+
+            self._neighbor_search = \
+                NeighborSearch(unfold_entities([self], "A"))
+        return self._neighbor_search
+
     def get_id(self):
         """Return the id."""
         return self.id
@@ -247,18 +284,28 @@ class Entity(object):
         """
         for o in self.get_list():
             o.transform(rot, tran)
+        self._invalidate_neighbor_search()
 
     def copy(self):
-        shallow = copy(self)
+        # Copy the attributes directly instead of using copy(), which is
+        # much slower for entities with thousands of children.
+        shallow = self.__class__.__new__(self.__class__)
+        shallow.__dict__.update(self.__dict__)
 
         shallow.child_list = []
         shallow.child_dict = {}
         shallow.xtra = copy(self.xtra)
+        shallow._neighbor_search = None
 
         shallow.detach_parent()
 
+        # Children ids were already checked when they were added to this
+        # entity, so the copies are added without calling add().
         for child in self.child_list:
-            shallow.add(child.copy())
+            child_copy = child.copy()
+            child_copy.set_parent(shallow)
+            shallow.child_list.append(child_copy)
+            shallow.child_dict[child_copy.get_id()] = child_copy
         return shallow
 
 
@@ -380,3 +427,21 @@ class DisorderedEntityWrapper(object):
     def disordered_get_list(self):
         """Return list of children."""
         return list(self.child_dict.values())
+
+    # Copy all children, not only the selected one.
+    def copy(self):
+        """Create a copy of the wrapper and of all its children.
+
+        The same child is selected in the copy. Parent information is lost.
+        """
+        shallow = self.__class__.__new__(self.__class__)
+        shallow.__dict__.update(self.__dict__)
+        shallow.parent = None
+        shallow.child_dict = {}
+        shallow.selected_child = None
+        for child_id, child in self.child_dict.items():
+            child_copy = child.copy()
+            shallow.child_dict[child_id] = child_copy
+            if child is self.selected_child:
+                shallow.selected_child = child_copy
+        return shallow
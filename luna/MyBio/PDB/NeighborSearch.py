@@ -10,6 +10,8 @@
 # Date: 19/02/2018.
 
 # 1) Inherit inhouse modifications. Package: MyBio.
+# 2) Use SciPy's cKDTree, which supports batch queries.
+# 3) Included function search_many.
 
 # Each line or block with modifications contain a MODBY tag.
 
@@ -22,7 +24,8 @@ from __future__ import print_function
 
 import numpy
 
-from Bio.PDB.kdtrees import KDTree
+# Use SciPy's cKDTree, which supports batch queries.
+from scipy.spatial import cKDTree
 
 # MODBY: Alexandre Fassio
 # Inherit inhouse modifications. Package: MyBio.
@@ -40,7 +43,8 @@ class NeighborSearch(object):
      2. To find all atoms/residues/chains/models/structures that are within
         a fixed radius of each other.
 
-    NeighborSearch makes use of the Bio.PDB.kdtrees C++ module, so it's fast.
+    NeighborSearch makes use of the scipy.spatial.cKDTree C++ module, so it's
+    fast.
     """
 
     def __init__(self, atom_list, bucket_size=10):
@@ -60,8 +64,8 @@ class NeighborSearch(object):
         self.coords = numpy.array(coord_list).astype("f")
         assert(bucket_size > 1)
         assert(self.coords.shape[1] == 3)
-        self.kdt = KDTree(3, bucket_size)
-        self.kdt.set_coords(self.coords)
+        # Use SciPy's cKDTree.
+        self.kdt = cKDTree(self.coords, leafsize=bucket_size)
 
     # Private
 
@@ -99,20 +103,35 @@ class NeighborSearch(object):
          - radius - float
          - level - char (A, R, C, M, S)
 
+        """
+        return self.search_many([center], radius, level)[0]
+
+    def search_many(self, centers, radius, level="A"):
+        """Neighbor search for many query positions at once.
+
+        Return a list with the result of `search` for each center
+        in centers, which are all queried in a single call to the KD tree.
+
+        Arguments:
+         - centers - Nx3 Numeric array or sequence of Numeric arrays
+         - radius - float
+         - level - char (A, R, C, M, S)
+
         """
         if level not in entity_levels:
             raise PDBException("%s: Unknown level" % level)
-        self.kdt.search(center, radius)
-        indices = self.kdt.get_indices()
-        n_atom_list = []
+        if len(centers) == 0:
+            return []
+        centers = numpy.asarray(centers, dtype=float).reshape(-1, 3)
         atom_list = self.atom_list
-        for i in indices:
-            a = atom_list[i]
-            n_atom_list.append(a)
-        if level == "A":
-            return n_atom_list
-        else:
-            return unfold_entities(n_atom_list, level)
+        results = []
+        for indices in self.kdt.query_ball_point(centers, radius):
+            n_atom_list = [atom_list[i] for i in indices]
+            if level == "A":
+                results.append(n_atom_list)
+            else:
+                results.append(unfold_entities(n_atom_list, level))
+        return results
 
     def search_all(self, radius, level="A"):
         """All neighbor search.
@@ -127,8 +146,8 @@ class NeighborSearch(object):
         """
         if level not in entity_levels:
             raise PDBException("%s: Unknown level" % level)
-        self.kdt.all_search(radius)
-        indices = self.kdt.all_get_indices()
+        # Use SciPy's cKDTree.
+        indices = self.kdt.query_pairs(radius)
         atom_list = self.atom_list
         atom_pair_list = []
         for i1, i2 in indices:
@@ -39,6 +39,8 @@ Each line or block with modifications contain a MODBY tag.
 from __future__ import print_function
 
 import warnings
+import gc
+from contextlib import contextmanager
 
 try:
     import numpy
@@ -70,6 +72,40 @@ DEFAULT_CHAIN_ID = "z"
 
 # If PDB spec says "COLUMNS 18-20" this means line[17:20]
 
+# Columns of the numeric fields parsed in bulk.
+COORD_COLUMNS = ((30, 38), (38, 46), (46, 54))
+ANISOU_COLUMNS = ((28, 35), (35, 42), (43, 49), (49, 56), (56, 63), (63, 70))
+
+
+# Pause the garbage collector while building structures.
+@contextmanager
+def _paused_gc(pause=True):
+    """Pause the cyclic garbage collector, if ``pause`` is True (PRIVATE).
+
+    Each entity and its parent form a reference cycle, so building a large
+    structure triggers many useless garbage collections.
+    """
+    was_enabled = pause and gc.isenabled()
+    if was_enabled:
+        gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+# Parse the numeric fields of all atomic records at once.
+def _parse_float_fields(lines, columns):
+    """Return a flat list with the float ``columns`` of all ``lines``, or
+    None if any value is invalid or missing (PRIVATE)."""
+    try:
+        return [float(line[start:end])
+                for line in lines for start, end in columns]
+    except ValueError:
+        return None
+
+
 class PDBParser(object):
     """Parse a PDB file and return a Structure object."""
 
@@ -78,7 +114,8 @@ class PDBParser(object):
                  FIX_ATOM_NAME_CONFLICT=False,
                  FIX_EMPTY_CHAINS=False,
                  FIX_OBABEL_FLAGS=False,
-                 FIX_ALL_OBABEL_ERRORS=False):
+                 FIX_ALL_OBABEL_ERRORS=False,
+                 FAST_PARSING=False):
         """Create a PDBParser object.
 
         The PDB parser call a number of standard methods in an aggregated
@@ -95,6 +132,12 @@ class PDBParser(object):
          - QUIET - Evaluated as a Boolean. If true, warnings issued in constructing
            the SMCRA data will be suppressed. If false (DEFAULT), they will be shown.
            These warnings might be indicative of problems in the PDB file!
+         - FAST_PARSING - Evaluated as a Boolean. If true, coordinates,
+           occupancies, B factors and anisotropic B factors are parsed in bulk
+           into NumPy arrays before the structure is built, and the garbage
+           collector is paused while the structure is built. It is much
+           faster for large structures. Atom coordinates are then views of a
+           single array. If false (DEFAULT), they are parsed line by line.
 
         """
         if structure_builder is not None:
@@ -125,6 +168,8 @@ class PDBParser(object):
         # MODBY: Alexandre Fassio
         # Correct all OpenBabel errors.
         self.FIX_ALL_OBABEL_ERRORS = FIX_ALL_OBABEL_ERRORS
+        # Parse numeric fields in bulk.
+        self.FAST_PARSING = bool(FAST_PARSING)
 
     # Public methods
 
@@ -136,7 +181,8 @@ class PDBParser(object):
          - file - name of the PDB file OR an open filehandle
 
         """
-        with warnings.catch_warnings():
+        # Pause the garbage collector in the fast parsing mode.
+        with warnings.catch_warnings(), _paused_gc(self.FAST_PARSING):
             if self.QUIET:
                 warnings.filterwarnings("ignore", category=PDBConstructionWarning)
 
@@ -163,7 +209,8 @@ class PDBParser(object):
         return structure
 
     def get_structure_from_pdb_block(self, id, pdb_block):
-        with warnings.catch_warnings():
+        # Pause the garbage collector in the fast parsing mode.
+        with warnings.catch_warnings(), _paused_gc(self.FAST_PARSING):
             if self.QUIET:
                 warnings.filterwarnings("ignore", category=PDBConstructionWarning)
 
@@ -231,8 +278,51 @@ class PDBParser(object):
         header_dict = _parse_pdb_header_list(header)
         return header_dict, coords_trailer
 
+    # Parse the numeric fields of all atomic records at once.
+    def _parse_atomic_fields(self, coords_trailer):
+        """Parse the numeric fields of the atomic records in bulk (PRIVATE).
+
+        Return the coordinates, occupancies and B factors of the ATOM/HETATM
+        records, and the anisotropic B factors of the ANISOU records, in the
+        order they appear in the file. Fields with invalid or missing values
+        are returned as None, so that they are parsed line by line.
+        """
+        atom_lines = []
+        anisou_lines = []
+        for line in coords_trailer:
+            record_type = line[0:6]
+            if record_type == "ATOM  " or record_type == "HETATM":
+                atom_lines.append(line)
+            elif record_type == "ANISOU":
+                anisou_lines.append(line)
+            elif record_type == "END   " or record_type == "CONECT":
+                break
+
+        coords = _parse_float_fields(atom_lines, COORD_COLUMNS)
+        if coords is not None:
+            coords = numpy.array(coords, "f").reshape(-1, 3)
+        occupancies = _parse_float_fields(atom_lines, ((54, 60), ))
+        bfactors = _parse_float_fields(atom_lines, ((60, 66), ))
+
+        anisous = _parse_float_fields(anisou_lines, ANISOU_COLUMNS)
+        if anisous is not None:
+            # U's are scaled by 10^4
+            anisous = (numpy.array(anisous, "f").reshape(-1, 6)
+                       / 10000.0).astype("f")
+
+        return coords, occupancies, bfactors, anisous
+
     def _parse_coordinates(self, coords_trailer):
         """Parse the atomic data in the PDB file (PRIVATE)."""
+        # Numeric fields parsed in bulk and the index of the current atom
+        # and ANISOU records.
+        coords, occupancies, bfactors, anisous = None, None, None, None
+        if self.FAST_PARSING:
+            (coords, occupancies,
+             bfactors, anisous) = self._parse_atomic_fields(coords_trailer)
+        atom_idx = -1
+        anisou_idx = -1
+
         local_line_counter = 0
         structure_builder = self.structure_builder
         current_model_id = 0
@@ -250,6 +340,7 @@ class PDBParser(object):
             global_line_counter = self.line_counter + local_line_counter + 1
             structure_builder.set_line_counter(global_line_counter)
             if record_type == "ATOM  " or record_type == "HETATM":
+                atom_idx += 1
                 # Initialize the Model - there was no explicit MODEL record
                 if not model_open:
                     structure_builder.init_model(current_model_id)
@@ -304,35 +395,45 @@ class PDBParser(object):
 
                 residue_id = (hetero_flag, resseq, icode)
                 # atomic coordinates
-                try:
-                    x = float(line[30:38])
-                    y = float(line[38:46])
-                    z = float(line[46:54])
-                except Exception:
-                    # Should we allow parsing to continue in permissive mode?
-                    # If so, what coordinates should we default to?  Easier to abort!
-                    raise PDBConstructionException("Invalid or missing coordinate(s) at line %i."
-                                                   % global_line_counter)
-                coord = numpy.array((x, y, z), "f")
+                # Use the fields parsed in bulk, if available.
+                if coords is not None:
+                    coord = coords[atom_idx]
+                else:
+                    try:
+                        x = float(line[30:38])
+                        y = float(line[38:46])
+                        z = float(line[46:54])
+                    except Exception:
+                        # Should we allow parsing to continue in permissive mode?
+                        # If so, what coordinates should we default to?  Easier to abort!
+                        raise PDBConstructionException("Invalid or missing coordinate(s) at line %i."
+                                                       % global_line_counter)
+                    coord = numpy.array((x, y, z), "f")
                 # occupancy & B factor
-                try:
-                    occupancy = float(line[54:60])
-                except Exception:
-                    self._handle_PDB_exception("Invalid or missing occupancy",
-                                               global_line_counter)
-                    occupancy = None  # Rather than arbitrary zero or one
+                if occupancies is not None:
+                    occupancy = occupancies[atom_idx]
+                else:
+                    try:
+                        occupancy = float(line[54:60])
+                    except Exception:
+                        self._handle_PDB_exception("Invalid or missing occupancy",
+                                                   global_line_counter)
+                        occupancy = None  # Rather than arbitrary zero or one
                 if occupancy is not None and occupancy < 0:
                     # TODO - Should this be an error in strict mode?
                     # self._handle_PDB_exception("Negative occupancy",
                     #                            global_line_counter)
                     # This uses fixed text so the warning occurs once only:
                     warnings.warn("Negative occupancy in one or more atoms", PDBConstructionWarning)
-                try:
-                    bfactor = float(line[60:66])
-                except Exception:
-                    self._handle_PDB_exception("Invalid or missing B factor",
-                                               global_line_counter)
-                    bfactor = 0.0  # The PDB use a default of zero if the data is missing
+                if bfactors is not None:
+                    bfactor = bfactors[atom_idx]
+                else:
+                    try:
+                        bfactor = float(line[60:66])
+                    except Exception:
+                        self._handle_PDB_exception("Invalid or missing B factor",
+                                                   global_line_counter)
+                        bfactor = 0.0  # The PDB use a default of zero if the data is missing
                 segid = line[72:76]
                 element = line[76:78].strip().upper()
                 if current_segid != segid:
@@ -381,10 +482,15 @@ class PDBParser(object):
                 except PDBConstructionException as message:
                     self._handle_PDB_exception(message, global_line_counter)
             elif record_type == "ANISOU":
-                anisou = [float(x) for x in (line[28:35], line[35:42], line[43:49],
-                                             line[49:56], line[56:63], line[63:70])]
-                # U's are scaled by 10^4
-                anisou_array = (numpy.array(anisou, "f") / 10000.0).astype("f")
+                anisou_idx += 1
+                # Use the fields parsed in bulk, if available.
+                if anisous is not None:
+                    anisou_array = anisous[anisou_idx]
+                else:
+                    anisou = [float(x) for x in (line[28:35], line[35:42], line[43:49],
+                                                 line[49:56], line[56:63], line[63:70])]
+                    # U's are scaled by 10^4
+                    anisou_array = (numpy.array(anisou, "f") / 10000.0).astype("f")
                 structure_builder.set_anisou(anisou_array)
             elif record_type == "MODEL ":
                 try:
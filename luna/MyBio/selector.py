@@ -54,9 +54,20 @@ class ChainSelector(Selector):
         self.entries = entries
         super().__init__(**kwargs)
 
+    @property
+    def entries(self):
+        """iterable of :class:`~luna.MyBio.PDB.Entity.Chain` instances: \
+        Sequence of chain objects."""
+        return self._entries
+
+    @entries.setter
+    def entries(self, entries):
+        self._entries = entries
+        self._entries_set = set(entries)
+
     def accept_chain(self, chain):
         """Decide if the chain is valid or not."""
-        return True if (chain in self.entries) else False
+        return chain in self._entries_set
 
     def accept_residue(self, res):
         """Decide if the residue is valid or not."""
@@ -79,9 +90,26 @@ class ResidueSelector(Selector):
         self.entries = entries
         super().__init__(**kwargs)
 
+    @property
+    def entries(self):
+        """iterable of :class:`~luna.MyBio.PDB.Residue.Residue`: \
+        Sequence of residue objects."""
+        return self._entries
+
+    @entries.setter
+    def entries(self, entries):
+        self._entries = entries
+        self._entries_set = set(entries)
+        # Chains without selected residues are skipped altogether.
+        self._chains = set([res.get_parent() for res in self._entries_set])
+
+    def accept_chain(self, chain):
+        """Decide if the chain is valid or not."""
+        return chain in self._chains
+
     def accept_residue(self, res):
         """Decide if the residue is valid or not."""
-        return res in self.entries
+        return res in self._entries_set
 
     def accept_atom(self, atom):
         return super().accept_atom(atom) and self.accept_residue(atom.get_parent())
@@ -100,9 +128,19 @@ class ResidueSelectorBySeqNum(Selector):
         self.entries = entries
         super().__init__(**kwargs)
 
+    @property
+    def entries(self):
+        """iterable of int: Sequence of residue sequence numbers."""
+        return self._entries
+
+    @entries.setter
+    def entries(self, entries):
+        self._entries = entries
+        self._entries_set = set(entries)
+
     def accept_residue(self, res):
         """Decide if the residue is valid or not."""
-        return True if (res.get_id()[1] in self.entries) else False
+        return res.get_id()[1] in self._entries_set
 
     def accept_atom(self, atom):
         return super().accept_atom(atom) and self.accept_residue(atom.get_parent())
@@ -121,5 +159,27 @@ class AtomSelector(Selector):
         self.entries = entries
         super().__init__(**kwargs)
 
+    @property
+    def entries(self):
+        """iterable of :class:`~luna.MyBio.PDB.Atom.Atom`: \
+        Sequence of atom objects."""
+        return self._entries
+
+    @entries.setter
+    def entries(self, entries):
+        self._entries = entries
+        self._entries_set = set(entries)
+        # Chains and residues without selected atoms are skipped altogether.
+        self._residues = set([atm.get_parent() for atm in self._entries_set])
+        self._chains = set([res.get_parent() for res in self._residues])
+
+    def accept_chain(self, chain):
+        """Decide if the chain is valid or not."""
+        return chain in self._chains
+
+    def accept_residue(self, res):
+        """Decide if the residue is valid or not."""
+        return res in self._residues
+
     def accept_atom(self, atom):
-        return super().accept_atom(atom) and atom in self.entries
+        return super().accept_atom(atom) and atom in self._entries_set
@@ -5,11 +5,11 @@ from os.path import exists
 from shutil import move as rename_pdb_file
 
 
-from openbabel.pybel import readfile
+from openbabel.pybel import readfile, readstring
 from openbabel.pybel import Molecule as PybelWrapper
 
 from rdkit.Chem import (MolFromMolBlock, SanitizeFlags,
-                        SanitizeMol, MolToMolFile)
+                        SanitizeMol, MolToMolFile, MolToMolBlock)
 
 from luna.util.file import (is_directory_valid, new_unique_filename,
                             remove_files)
@@ -23,8 +23,8 @@ from luna.MyBio.PDB.PDBParser import PDBParser
 from luna.mol.validator import MolValidator
 from luna.mol.standardiser import Standardizer
 from luna.wrappers.base import MolWrapper
-from luna.wrappers.obabel import convert_molecule
-from luna.wrappers.rdkit import read_mol_from_file
+from luna.wrappers.obabel import convert_molecule, convert_molecule_string
+from luna.wrappers.rdkit import read_mol_from_file, new_mol_from_block
 
 from luna.util.exceptions import (IllegalArgumentError, MoleculeNotFoundError,
                                   ChainNotFoundError, FileNotCreated,
@@ -151,7 +151,8 @@ def save_to_file(entity, output_file, select=Select(), write_conects=True,
 def entity_to_string(entity, select=Select(),
                      write_conects=True,
                      write_end=True,
-                     preserve_atom_numbering=True):
+                     preserve_atom_numbering=True,
+                     sort=False):
     """Convert a Structure object (or a subset of a
     :class:`~luna.MyBio.PDB.Structure.Structure` object) to string.
 
@@ -174,6 +175,9 @@ def entity_to_string(entity, select=Select(),
     preserve_atom_numbering : bool
         If True, preserve the atom numbering.
         Otherwise, re-enumerate the atom serial numbers.
+    sort : bool
+        If True, sort atoms by residues and atom serial numbers before
+        writing them.
 
     Returns
     -------
@@ -186,7 +190,8 @@ def entity_to_string(entity, select=Select(),
     io.save(fh, select=select,
             write_conects=write_conects,
             write_end=write_end,
-            preserve_atom_numbering=preserve_atom_numbering)
+            preserve_atom_numbering=preserve_atom_numbering,
+            sort=sort)
     fh.seek(0)
     return ''.join(fh.readlines())
 
@@ -255,7 +260,8 @@ def biopython_entity_to_mol(entity,
                             wrapped=True,
                             openbabel=OPENBABEL,
                             tmp_path=None,
-                            keep_tmp_files=False):
+                            keep_tmp_files=False,
+                            in_memory=True):
     """Convert an object :class:`~luna.MyBio.PDB.Entity.Entity` to a
     molecular object (:class:`~luna.wrappers.base.MolWrapper`,
     :class:`rdkit.Chem.rdchem.Mol`, or :class:`openbabel.pybel.Molecule`).
@@ -291,6 +297,11 @@ def biopython_entity_to_mol(entity,
         be used instead.
     keep_tmp_files : bool
         If True, keep all temporary files. Otherwise, removes them in the end.
+    in_memory : bool
+        If True (the default), convert ``entity`` in memory with Open Babel's
+        :class:`~openbabel.openbabel.OBConversion`. Otherwise, convert it
+        through temporary files and the Open Babel binary ``openbabel``.
+        Both paths produce the same molecule.
 
     Returns
     -------
@@ -307,7 +318,6 @@ def biopython_entity_to_mol(entity,
 
     logger.debug("It will try to create a new MOL object from the provided "
                  "entity.")
-    logger.debug("Temporary files will be saved at '%s'." % tmp_path)
 
     # First it saves the selection into a PDB file and then it converts the
     # file to .mol. I had to do it because the OpenBabel 2.4.1 had a
@@ -315,35 +325,58 @@ def biopython_entity_to_mol(entity,
     # the aromatic ring was being wrongly perceived and some atoms received
     # more double bonds than it was expected. The version 2.3.2 works better.
     # Therefore, I recomend using Open Babel 2.3.3 instead.
-    filename = new_unique_filename(tmp_path)
-    pdb_file = '%s_pdb-file.pdb' % filename
-
-    logger.debug("First: it will try to create a new PDB file (%s) "
-                 "from the provided entity." % pdb_file)
+    #
     # Apparently, Open Babel creates a bug when it tries to parse a file with
     # CONECTS containing serial numbers with more than 4 digits.
     # E.g.: 1OZH:A:HE3:1406, line CONECT162811627916282.
     # By setting preserve_atom_numbering to False, it solves the problem.
-    save_to_file(entity,
-                 pdb_file,
-                 select,
-                 preserve_atom_numbering=False,
-                 sort=True)
+    if in_memory:
+        logger.debug("First: it will try to create a new PDB block "
+                     "from the provided entity.")
+        pdb_block = entity_to_string(entity, select,
+                                     preserve_atom_numbering=False,
+                                     sort=True)
+
+        ini_input, ini_format = pdb_block, "pdb"
+        mol_file = "<in-memory MOL block>"
+    else:
+        logger.debug("Temporary files will be saved at '%s'." % tmp_path)
+
+        filename = new_unique_filename(tmp_path)
+        pdb_file = '%s_pdb-file.pdb' % filename
+        mol_file = '%s_mol-file.mol' % filename
+
+        logger.debug("First: it will try to create a new PDB file (%s) "
+                     "from the provided entity." % pdb_file)
+        save_to_file(entity,
+                     pdb_file,
+                     select,
+                     preserve_atom_numbering=False,
+                     sort=True)
+
+        ini_input, ini_format = pdb_file, "pdb"
 
-    ini_input_file = pdb_file
     if template is not None:
         if entity.level == "R" and entity.is_hetatm():
             # Note that the template molecule should have no explicit hydrogens
             # else the algorithm will fail.
-            rdmol = read_mol_from_file(pdb_file, mol_format="pdb",
-                                       removeHs=True)
-            new_rdmol = template.assign_bond_order(rdmol, entity.resname)
+            if in_memory:
+                rdmol = new_mol_from_block(pdb_block, mol_format="pdb",
+                                           removeHs=True)
+                new_rdmol = template.assign_bond_order(rdmol, entity.resname)
+
+                ini_input = MolToMolBlock(new_rdmol)
+            else:
+                rdmol = read_mol_from_file(pdb_file, mol_format="pdb",
+                                           removeHs=True)
+                new_rdmol = template.assign_bond_order(rdmol, entity.resname)
 
-            ini_input_file = '%s_tmp-mol-file.mol' % filename
-            MolToMolFile(new_rdmol, ini_input_file)
+                ini_input = '%s_tmp-mol-file.mol' % filename
+                MolToMolFile(new_rdmol, ini_input)
 
-            if not keep_tmp_files:
-                remove_files([pdb_file])
+                if not keep_tmp_files:
+                    remove_files([pdb_file])
+            ini_format = "mol"
         else:
             logger.warning("It cannot apply a template on the provided entity "
                            "because it should be a single compound "
@@ -351,7 +384,6 @@ def biopython_entity_to_mol(entity,
 
     # Convert the PDB file to Mol file with the proper protonation
     # and hydrogen addition if required.
-    mol_file = '%s_mol-file.mol' % filename
     ob_opt = {"error-level": 5}
     logger.debug("Next: it will try to convert the PDB file to "
                  " .mol using Open Babel.")
@@ -361,8 +393,21 @@ def biopython_entity_to_mol(entity,
             ob_opt["p"] = ph
         else:
             ob_opt["h"] = ""
-    convert_molecule(ini_input_file, output_file=mol_file,
-                     opts=ob_opt, openbabel=openbabel)
+
+    def convert(mol_input, input_format):
+        # Return the converted MOL block or write it to ``mol_file``.
+        if in_memory:
+            return convert_molecule_string(mol_input, input_format, "mol",
+                                           opts=ob_opt)
+        convert_molecule(mol_input, output_file=mol_file,
+                         opts=ob_opt, openbabel=openbabel)
+
+    def read_mol():
+        if in_memory:
+            return readstring("mol", mol_block)
+        return next(readfile("mol", mol_file))
+
+    mol_block = convert(ini_input, ini_format)
 
     # Currently, ignored atoms are only metals.
     ignored_atoms = []
@@ -373,7 +418,7 @@ def biopython_entity_to_mol(entity,
                      "it will try to fix some errors.")
 
         try:
-            mol_obj = next(readfile("mol", mol_file))
+            mol_obj = read_mol()
         except Exception:
             error_msg = ("An error occurred while parsing the file '%s' with "
                          "Open Babel and the molecule object could not be "
@@ -410,12 +455,9 @@ def biopython_entity_to_mol(entity,
         # Pairs of AtomWrapper and Atom (Biopython) objects
         # to standardize.
         atom_pairs = []
-        pdb_mapping = {}
         for i, atm_obj in enumerate(atm_obj_list):
             atom_pairs.append((atm_obj, target_atoms[i]))
 
-            pdb_mapping[atm_obj.get_idx()] = target_atoms[i]
-
         updated_metals_coord = {}
         # If there is something to be standardised.
         if atom_pairs:
@@ -431,18 +473,20 @@ def biopython_entity_to_mol(entity,
             # not be accessed. If you try to generate coordinates directly
             # from the object, hydrogens will be incorrectly placed.
             mol_obj = PybelWrapper(mol_obj.unwrap())
-            new_mol_file = '%s_tmp-mol-file.mol' % filename
-            mol_obj.write("mol", new_mol_file, overwrite=True)
 
             # Overwrite mol_file by converting the new molecular file using
             # the user specified parameters. Note that right now it will add
             # explicit hydrogens to the molecules according to the provided pH.
-            convert_molecule(new_mol_file, output_file=mol_file, 
-                             opts=ob_opt, openbabel=OPENBABEL)
+            if in_memory:
+                mol_block = convert(mol_obj.write("mol"), "mol")
+            else:
+                new_mol_file = '%s_tmp-mol-file.mol' % filename
+                mol_obj.write("mol", new_mol_file, overwrite=True)
+                convert(new_mol_file, "mol")
 
             # Let's finally read the correct and standardized molecular file.
             try:
-                mol_obj = next(readfile("mol", mol_file))
+                mol_obj = read_mol()
             except Exception:
                 error_msg = ("An error occurred while parsing the file "
                              "'%s' with Open Babel and the molecule object"
@@ -451,9 +495,18 @@ def biopython_entity_to_mol(entity,
                 raise MoleculeObjectError(error_msg)
 
             # Remove temporary files.
-            if not keep_tmp_files:
+            if not in_memory and not keep_tmp_files:
                 remove_files([new_mol_file])
 
+        # Atoms are mapped only now because the standardization removes
+        # hydrogens and reads the molecule again, which changes the atom
+        # indices when the PDB selection contains hydrogens.
+        pdb_mapping = {}
+        heavy_atms = [atm for atm in MolWrapper(mol_obj).get_atoms()
+                      if atm.get_atomic_num() != 1]
+        for atm_obj, pdb_atm in zip(heavy_atms, target_atoms):
+            pdb_mapping[atm_obj.get_idx()] = pdb_atm
+
         mv = MolValidator(metals_coord=updated_metals_coord)
         is_valid = mv.validate_mol(mol_obj, pdb_mapping)
         logger.debug('Validation finished!!!')
@@ -484,7 +537,7 @@ def biopython_entity_to_mol(entity,
     else:
         try:
             # Create a new Mol object.
-            mol_obj = next(readfile("mol", mol_file))
+            mol_obj = read_mol()
         except Exception:
             error_msg = ("An error occurred while parsing the file '%s' and "
                          "the molecule object could not be created. "
@@ -493,8 +546,8 @@ def biopython_entity_to_mol(entity,
             raise MoleculeObjectError(error_msg)
 
     # Remove temporary files.
-    if not keep_tmp_files:
-        remove_files([ini_input_file, mol_file])
+    if not in_memory and not keep_tmp_files:
+        remove_files([ini_input, mol_file])
 
     if wrapped:
         mol_obj = MolWrapper(mol_obj)
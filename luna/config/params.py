@@ -92,6 +92,7 @@ class ProjectParams(dict):
                   "ph": proj_obj.ph,
                   "pse_path": proj_obj.pse_path,
                   "use_cache": proj_obj.use_cache,
+                  "columnar_store": proj_obj.columnar_store,
                   "verbosity": proj_obj.verbosity,
                   "working_path": proj_obj.working_path}
 
@@ -170,6 +171,7 @@ class ProjectParams(dict):
             OUT.write("[general]\n")
             OUT.write("append_mode = %s\n" % self["append_mode"])
             OUT.write("use_cache = %s\n" % self["use_cache"])
+            OUT.write("columnar_store = %s\n" % self["columnar_store"])
             OUT.write("verbosity = %s\n" % verbosity)
             OUT.write("logging_enabled = %s\n" % self["logging_enabled"])
             OUT.write("nproc = %s\n" % self["nproc"])
@@ -230,6 +232,7 @@ class ProjectParams(dict):
                 "add_dependent_inter": ic.add_dependent_inter,
                 "add_h2o_pairs_with_no_target":
                     ic.add_h2o_pairs_with_no_target,
+                "max_bridging_waters": ic.max_bridging_waters,
                 "strict_donor_rules": ic.strict_donor_rules,
                 "strict_weak_donor_rules": ic.strict_weak_donor_rules,
                 "lazy_comps_list": ",".join(ic.lazy_comps_list)}
@@ -377,6 +380,9 @@ class ProjectParams(dict):
                                             "add_h2o_pairs_with_no_target",
                                             bool)
 
+            max_h2o = self._get_value(params, "max_bridging_waters", int,
+                                      fallback=1)
+
             sdonor_rules = self._get_value(params, "strict_donor_rules", bool)
 
             swdonor_rules = self._get_value(params, "strict_weak_donor_rules",
@@ -398,6 +404,7 @@ class ProjectParams(dict):
                     "add_atom_atom": add_atom_atom,
                     "add_dependent_inter": add_dep_inter,
                     "add_h2o_pairs_with_no_target": add_h2o_pairs,
+                    "max_bridging_waters": max_h2o,
                     "strict_donor_rules": sdonor_rules,
                     "strict_weak_donor_rules": swdonor_rules,
                     "lazy_comps_list": lazy_comps_list,
@@ -485,6 +492,8 @@ class ProjectParams(dict):
 
         use_cache = self._get_value(params, "use_cache", bool)
 
+        columnar_store = self._get_value(params, "columnar_store", bool)
+
         verbosity = self._get_value(params, "verbosity", int)
 
         if verbosity is not None:
@@ -509,6 +518,7 @@ class ProjectParams(dict):
         return {
             "append_mode": append_mode,
             "use_cache": use_cache,
+            "columnar_store": columnar_store,
             "verbosity": verbosity,
             "logging_enabled": logging_enabled,
             "nproc": nproc,
@@ -1,9 +1,12 @@
 from openbabel import openbabel as ob
 from operator import le, ge
-from itertools import combinations, product
+from itertools import chain, combinations, product
 from collections import defaultdict
 import json
 
+import numpy as np
+from scipy.spatial import cKDTree
+
 from luna.interaction.config import DefaultInteractionConfig, InteractionConfig
 from luna.interaction.filter import InteractionFilter
 from luna.interaction.type import InteractionType
@@ -13,7 +16,6 @@ from luna.analysis.summary import count_interaction_types
 import luna.util.math as im
 from luna.util.default_values import BOUNDARY_CONFIG
 from luna.util.exceptions import IllegalArgumentError
-from luna.mol.groups import AtomGroupNeighborhood
 from luna.util.file import pickle_data, unpickle_data
 from luna.version import __version__
 
@@ -34,6 +36,33 @@ COV_BONDS_MAPPING = {
 WATER_NAMES = ['HOH', 'DOD', 'WAT', 'H2O', 'OH2']
 DEFAULT_LAZY_LIST = WATER_NAMES + ["NH3", "NH4", "CMO", "SCN"]
 
+# Parameters that limit the distance between the centroids of the atom groups
+# evaluated by the default interaction functions.
+CENTROID_DIST_PARAMS = {
+    "calc_cation_pi": "max_dist_cation_pi_inter",
+    "calc_pi_pi": "max_cc_dist_pi_pi_inter",
+    "calc_amide_pi": "max_cc_dist_amide_pi_inter",
+    "calc_xbond_pi": "max_xc_dist_xbond_inter",
+    "calc_xbond": "max_xa_dist_xbond_inter",
+    "calc_chalc_bond": "max_ya_dist_ybond_inter",
+    "calc_chalc_bond_pi": "max_yc_dist_ybond_inter",
+    "calc_hbond": "max_da_dist_hb_inter",
+    "calc_weak_hbond": "max_da_dist_whb_inter",
+    "calc_hbond_pi": "max_dc_dist_whb_inter",
+    "calc_ionic": "max_dist_attract_inter",
+    "calc_repulsive": "max_dist_repuls_inter",
+    "calc_proximal": "max_dist_proximal",
+    "calc_metal_coord": "max_ma_dist_metal_coord",
+}
+
+# Parameters that limit the distance between atoms of the atom groups
+# evaluated by the default interaction functions.
+ATOM_DIST_PARAMS = {
+    "calc_hydrop": "max_dist_hydrop_inter",
+    "calc_ion_multipole": "max_id_dist_ion_multipole_inter",
+    "calc_multipolar": "max_ne_dist_multipolar_inter",
+}
+
 
 class InteractionsManager:
 
@@ -164,13 +193,16 @@ class InteractionsManager:
 
         return inters_to_remove
 
-    def to_csv(self, output_file):
-        """Write interactions to a comma-separated values (csv) file.
+    def to_records(self):
+        """Represent interactions as tuples (atom group 1, atom group 2,
+        interaction type), where atom groups are strings of sorted atom
+        names.
 
-        Parameters
-        ----------
-        output_file : str
-            The output CSV file.
+        Returns
+        -------
+         : list of tuple
+            The unique interaction tuples, sorted to always keep the same
+            order.
         """
         interactions_set = set()
         for inter in self.interactions:
@@ -182,11 +214,19 @@ class InteractionsManager:
             grp1, grp2 = sorted([grp1, grp2])
             interactions_set.add((grp1, grp2, inter.type))
 
+        return sorted(interactions_set)
+
+    def to_csv(self, output_file):
+        """Write interactions to a comma-separated values (csv) file.
+
+        Parameters
+        ----------
+        output_file : str
+            The output CSV file.
+        """
         with open(output_file, "w") as OUT:
             OUT.write("atom_group1,atom_group2,interaction\n")
-            # Sort lines before writing to always keep the same order.
-            OUT.write("\n".join([",".join(k)
-                                 for k in sorted(interactions_set)]))
+            OUT.write("\n".join([",".join(k) for k in self.to_records()]))
 
     def to_json(self, output_file=None, indent=None):
         """Write interactions to a_initial_shell_data JSON file.
@@ -347,6 +387,11 @@ class InteractionCalculator:
         ``add_h2o_pairs_with_no_target`` is False, then water-water and
         water-residue hydrogen bonds will be removed because the ligand is not
         participating in the interactions. The default value is False.
+    max_bridging_waters : int
+        The maximum number of waters in a water-bridged hydrogen bond, which
+        is only computed if ``add_dependent_inter`` is True. Waters in a
+        chain must form hydrogen bonds with each other. The default value is
+        1, which implies only bridges through a single water are computed.
     strict_donor_rules : bool
         If True (the default), hydrogen bonds will only be considered for donor
         atoms with explicit hydrogens bound to them. In that case, angles and
@@ -551,6 +596,7 @@ inter_config=custom_config)
                  add_cov=True, add_proximal=False, add_atom_atom=True,
                  add_dependent_inter=False,
                  add_h2o_pairs_with_no_target=False,
+                 max_bridging_waters=1,
                  strict_donor_rules=True,
                  strict_weak_donor_rules=True,
                  lazy_comps_list=DEFAULT_LAZY_LIST):
@@ -578,6 +624,7 @@ inter_config=custom_config)
 
         self.add_dependent_inter = add_dependent_inter
         self.add_h2o_pairs_with_no_target = add_h2o_pairs_with_no_target
+        self.max_bridging_waters = max_bridging_waters
 
         self.strict_donor_rules = strict_donor_rules
         self.strict_weak_donor_rules = strict_weak_donor_rules
@@ -631,9 +678,6 @@ inter_config=custom_config)
         # neighbors. In this case, the interactions will be target x target.
         nb_comp_grps = nb_atm_grps or trgt_atm_grps
 
-        # Define the scope of the neighborhood search.
-        ss = AtomGroupNeighborhood(nb_comp_grps, 10)
-
         computed_pairs = set()
         all_interactions = []
 
@@ -641,8 +685,14 @@ inter_config=custom_config)
         bsite_cutoff = self.inter_config.get(bsite_param,
                                              BOUNDARY_CONFIG[bsite_param])
 
-        for trgt_atm_grp in trgt_atm_grps:
-            for nb_atm_grp in ss.search(trgt_atm_grp.centroid, bsite_cutoff):
+        # Pairs of atom groups that are too far away from each other to
+        # interact are discarded at once.
+        candidate_pairs = self._find_candidate_pairs(trgt_atm_grps,
+                                                     nb_comp_grps,
+                                                     bsite_cutoff)
+
+        for trgt_atm_grp, nb_atm_grps in candidate_pairs:
+            for nb_atm_grp in nb_atm_grps:
 
                 # It will always ignore interactions involving the same atom
                 # groups. Loops in the graph is not permitted and does not make
@@ -733,6 +783,111 @@ inter_config=custom_config)
 
         return InteractionsManager(all_interactions)
 
+    def _find_candidate_pairs(self, trgt_atm_grps, nb_atm_grps, radius):
+        # Find all pairs of atom groups whose centroids are up to ``radius``
+        # away from each other with a single KD-tree query. Then, discard the
+        # pairs whose distance is greater than the maximum distance accepted
+        # by the interaction functions available for their features. Only the
+        # remaining pairs need to be evaluated one by one.
+        #
+        # Returns a list of tuples (target group, list of neighbor groups).
+        trgt_atm_grps = list(trgt_atm_grps)
+        nb_atm_grps = list(nb_atm_grps)
+        if not trgt_atm_grps or not nb_atm_grps:
+            return []
+
+        trgt_coords = np.array([ag.centroid for ag in trgt_atm_grps],
+                               dtype=float)
+        nb_coords = np.array([ag.centroid for ag in nb_atm_grps]).astype("f")
+
+        kdt = cKDTree(nb_coords)
+        nb_idxs = kdt.query_ball_point(trgt_coords, radius)
+
+        counts = np.array([len(idxs) for idxs in nb_idxs])
+        trgt_pos = np.repeat(np.arange(len(trgt_atm_grps)), counts)
+        nb_pos = np.fromiter(chain.from_iterable(nb_idxs), dtype=int,
+                             count=counts.sum())
+        dists = np.linalg.norm(trgt_coords[trgt_pos] - nb_coords[nb_pos],
+                               axis=1)
+
+        # Atom groups with the same features share the same cutoffs.
+        signatures = {}
+        trgt_sigs = np.array([signatures.setdefault(tuple(ag.feature_names),
+                                                    len(signatures))
+                              for ag in trgt_atm_grps], dtype=int)
+        nb_sigs = np.array([signatures.setdefault(tuple(ag.feature_names),
+                                                  len(signatures))
+                            for ag in nb_atm_grps], dtype=int)
+        signatures = list(signatures)
+
+        cc_cutoffs = np.full((len(signatures), len(signatures)), -np.inf)
+        atm_cutoffs = np.full((len(signatures), len(signatures)), -np.inf)
+        pair_sigs = set(zip(trgt_sigs[trgt_pos].tolist(),
+                            nb_sigs[nb_pos].tolist()))
+        for sig1, sig2 in pair_sigs:
+            cutoffs = self._get_dist_cutoffs(signatures[sig1],
+                                             signatures[sig2])
+            cc_cutoffs[sig1, sig2], atm_cutoffs[sig1, sig2] = cutoffs
+
+        # Distances between atoms can be shorter than the distance between
+        # the centroids by up to the radius of each atom group.
+        trgt_radii = np.array([self._get_radius(ag) for ag in trgt_atm_grps])
+        nb_radii = np.array([self._get_radius(ag) for ag in nb_atm_grps])
+
+        # Distances are rounded to 3 decimal places by the interaction
+        # functions, so a small tolerance is necessary.
+        tol = 1e-3
+        trgt_pair_sigs = trgt_sigs[trgt_pos]
+        nb_pair_sigs = nb_sigs[nb_pos]
+        is_candidate = \
+            ((dists <= cc_cutoffs[trgt_pair_sigs, nb_pair_sigs] + tol)
+             | (dists <= (atm_cutoffs[trgt_pair_sigs, nb_pair_sigs]
+                          + trgt_radii[trgt_pos] + nb_radii[nb_pos] + tol)))
+
+        candidates = defaultdict(list)
+        for i, j in zip(trgt_pos[is_candidate].tolist(),
+                        nb_pos[is_candidate].tolist()):
+            candidates[i].append(nb_atm_grps[j])
+
+        return [(trgt_atm_grps[i], candidates[i]) for i in sorted(candidates)]
+
+    def _get_dist_cutoffs(self, feat_names1, feat_names2):
+        # Return the maximum distances between centroids and between atoms
+        # for which any interaction function available for the features
+        # may find an interaction. If a function does not have a known
+        # distance limit, there is no limit at all.
+        cc_cutoff = -np.inf
+        atm_cutoff = -np.inf
+        for feat1, feat2 in product(feat_names1, feat_names2):
+            if not self.is_feature_pair_valid(feat1, feat2):
+                continue
+
+            for func in self.get_functions(feat1, feat2):
+                name = getattr(func, "__name__", None)
+                # Custom functions may have the same name as the default ones.
+                default_func = getattr(InteractionCalculator, name or "", None)
+                if default_func is not func:
+                    return np.inf, np.inf
+
+                if name in CENTROID_DIST_PARAMS:
+                    key = CENTROID_DIST_PARAMS[name]
+                    if key not in self.inter_config:
+                        return np.inf, np.inf
+                    cc_cutoff = max(cc_cutoff, self.inter_config[key])
+                elif name in ATOM_DIST_PARAMS:
+                    key = ATOM_DIST_PARAMS[name]
+                    if key not in self.inter_config:
+                        return np.inf, np.inf
+                    atm_cutoff = max(atm_cutoff, self.inter_config[key])
+                else:
+                    return np.inf, np.inf
+
+        return cc_cutoff, atm_cutoff
+
+    def _get_radius(self, atm_grp):
+        return np.max(np.linalg.norm(atm_grp.coords - atm_grp.centroid,
+                                     axis=1))
+
     def _resolve_interactions(self, group1, group2, feat1, feat2):
         funcs = self.get_functions(feat1.name, feat2.name)
         if len(funcs) == 0:
@@ -789,24 +944,43 @@ inter_config=custom_config)
             elif inter.type == "Ionic":
                 ionic_set.add(inter)
 
-        for h2o_key in h2o_pairs:
-            pairs = combinations(h2o_pairs[h2o_key].keys(), 2)
+        # The same pair of groups may be bridged by different waters.
+        valid_pairs = {}
 
-            for src_grp, trgt_grp in pairs:
+        def is_valid_pair(src_grp, trgt_grp):
+            if not isinstance(self.inter_filter, InteractionFilter):
+                return True
 
-                # It ignores intramolecular interactions.
-                if self._is_intramol_inter(src_grp, trgt_grp):
-                    pass
+            key = (src_grp, trgt_grp)
+            if key not in valid_pairs:
+                valid_pairs[key] = self.inter_filter.is_valid_pair(src_grp,
+                                                                   trgt_grp)
+            return valid_pairs[key]
 
-                comp1 = next(iter(src_grp.compounds))
-                comp2 = next(iter(trgt_grp.compounds))
+        for h2o_chain in self._find_water_chains(h2o_pairs):
+            first_h2o, last_h2o = h2o_chain[0], h2o_chain[-1]
 
-                if isinstance(self.inter_filter, InteractionFilter):
-                    if not self.inter_filter.is_valid_pair(src_grp, trgt_grp):
-                        continue
+            if len(h2o_chain) == 1:
+                pairs = combinations(h2o_pairs[first_h2o].keys(), 2)
+            else:
+                pairs = ((src_grp, trgt_grp)
+                         for src_grp, trgt_grp
+                         in product(h2o_pairs[first_h2o], h2o_pairs[last_h2o])
+                         if (src_grp != trgt_grp
+                             and src_grp not in h2o_chain
+                             and trgt_grp not in h2o_chain))
+
+            # Hydrogen bonds between consecutive waters.
+            h2o_hbonds = [h2o_pairs[h2o1][h2o2]
+                          for h2o1, h2o2 in zip(h2o_chain, h2o_chain[1:])]
 
-                params = {"depends_on": [h2o_pairs[h2o_key][src_grp],
-                                         h2o_pairs[h2o_key][trgt_grp]]}
+            for src_grp, trgt_grp in pairs:
+                if not is_valid_pair(src_grp, trgt_grp):
+                    continue
+
+                params = {"depends_on": ([h2o_pairs[first_h2o][src_grp]]
+                                         + h2o_hbonds
+                                         + [h2o_pairs[last_h2o][trgt_grp]])}
 
                 inter = InteractionType(src_grp, trgt_grp,
                                         "Water-bridged hydrogen bond",
@@ -815,14 +989,27 @@ inter_config=custom_config)
 
         # It will try to match Hydrogen bonds and Ionic interactions
         # involving the same chemical groups to attribute salt bridges.
-        sb_groups = set()
-        for hbond, ionic in product(hbond_set, ionic_set):
+        # Ionic interactions are indexed by the atoms of their groups, so that
+        # each hydrogen bond is only compared to ionic interactions sharing
+        # its atoms.
+        ionic_list = list(ionic_set)
+        src_atm_ionics = defaultdict(set)
+        trgt_atm_ionics = defaultdict(set)
+        for i, ionic in enumerate(ionic_list):
+            for atm in ionic.src_grp.atoms:
+                src_atm_ionics[atm].add(i)
+            for atm in ionic.trgt_grp.atoms:
+                trgt_atm_ionics[atm].add(i)
 
-            condA = (ionic.src_grp.has_atom(hbond.src_grp.atoms[0])
-                     and ionic.trgt_grp.has_atom(hbond.trgt_grp.atoms[0]))
+        sb_groups = set()
+        for hbond in hbond_set:
+            atm1 = hbond.src_grp.atoms[0]
+            atm2 = hbond.trgt_grp.atoms[0]
 
-            condB = (ionic.src_grp.has_atom(hbond.trgt_grp.atoms[0])
-                     and ionic.trgt_grp.has_atom(hbond.src_grp.atoms[0]))
+            condA = (src_atm_ionics.get(atm1, set())
+                     & trgt_atm_ionics.get(atm2, set()))
+            condB = (src_atm_ionics.get(atm2, set())
+                     & trgt_atm_ionics.get(atm1, set()))
 
             # If an acceptor atom belongs to a negative group, and the donor
             # to a positive group (and vice-versa), it means that the
@@ -830,17 +1017,17 @@ inter_config=custom_config)
             # condition should occur. For example, it is not possible that an
             # acceptor atom belongs to a negative and positive group at the
             # same time.
-            if condA ^ condB:
+            for i in sorted(condA ^ condB):
+                ionic = ionic_list[i]
+
                 key1 = (ionic.src_grp, ionic.trgt_grp)
                 key2 = (ionic.trgt_grp, ionic.src_grp)
 
                 if key1 in sb_groups or key2 in sb_groups:
                     continue
 
-                if isinstance(self.inter_filter, InteractionFilter):
-                    if not self.inter_filter.is_valid_pair(ionic.src_grp,
-                                                           ionic.trgt_grp):
-                        continue
+                if not is_valid_pair(ionic.src_grp, ionic.trgt_grp):
+                    continue
 
                 sb_groups.add(key1)
                 params = {"depends_on": [hbond, ionic]}
@@ -853,6 +1040,41 @@ inter_config=custom_config)
 
         return dependent_interactions
 
+    def _find_water_chains(self, h2o_pairs):
+        """Find chains of up to ``max_bridging_waters`` waters in which
+        consecutive waters form hydrogen bonds with each other.
+
+        Parameters
+        ----------
+        h2o_pairs : dict
+            Map each water to the atom groups it forms hydrogen bonds with.
+
+        Returns
+        -------
+         : list of tuple of :class:`~luna.mol.groups.AtomGroup`
+        """
+        h2o_order = {h2o: i for i, h2o in enumerate(h2o_pairs)}
+
+        chains = []
+        if self.max_bridging_waters < 1:
+            return chains
+
+        def extend_chain(h2o_chain):
+            # Each chain is kept in only one direction.
+            if (len(h2o_chain) == 1
+                    or h2o_order[h2o_chain[0]] < h2o_order[h2o_chain[-1]]):
+                chains.append(h2o_chain)
+
+            if len(h2o_chain) < self.max_bridging_waters:
+                for grp in h2o_pairs[h2o_chain[-1]]:
+                    if grp in h2o_order and grp not in h2o_chain:
+                        extend_chain(h2o_chain + (grp, ))
+
+        for h2o in h2o_pairs:
+            extend_chain((h2o, ))
+
+        return chains
+
     def remove_inconsistencies(self, interactions):
         """Remove conflicts between interactions in ``interactions``.
 
@@ -3226,8 +3448,8 @@ inter_config=custom_config)
                     # interactions.
                     #
                     # It is better to keep this function inside the IFs to
-                    # avoid the Dijkstra processing for pairs of atoms that
-                    # wouldn't enter inside the IF.
+                    # avoid the shortest path processing for pairs of atoms
+                    # that wouldn't enter inside the IF.
                     min_bond_sep = \
                         self.inter_config.get("min_bond_separation", 0)
                     shortest_path_length = \
@@ -3258,8 +3480,8 @@ inter_config=custom_config)
                     # interactions.
                     #
                     # It is better to keep this function inside the IFs to
-                    # avoid the Dijkstra processing for pairs of atoms that
-                    # wouldn't enter inside the IF.
+                    # avoid the shortest path processing for pairs of atoms
+                    # that wouldn't enter inside the IF.
                     min_bond_sep = \
                         self.inter_config.get("min_bond_separation", 0)
                     shortest_path_length = \
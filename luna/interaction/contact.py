@@ -1,4 +1,5 @@
 from itertools import product
+from collections import defaultdict
 
 from luna.util.default_values import (COV_SEARCH_RADIUS, BOUNDARY_CONFIG)
 from luna.util.exceptions import EntityLevelError, IllegalArgumentError
@@ -74,8 +75,8 @@ f"{LUNA_PATH}/tutorial/inputs/3QQK.pdb")
         logger.debug("Trying to select all contacts in the PDB file %s."
                      % entity.get_parent_by_level('S').id)
 
-        all_atoms = list(entity.get_atoms())
-        ns = NeighborSearch(all_atoms)
+        # The spatial index is cached by the entity.
+        ns = entity.get_neighbor_search()
         pairs = ns.search_all(radius, level)
 
         logger.debug("Number of nearby %s(s) found: %d."
@@ -197,6 +198,69 @@ f"{LUNA_PATH}/tutorial/inputs/3QQK.pdb")
     (<Atom N10>, <Atom C>)
     (<Atom N10>, <Atom O>)
     """
+    return get_contacts_with_many([source], target=target, entity=entity,
+                                  radius=radius, level=level)[0]
+
+
+def get_contacts_with_many(sources,
+                           target=None,
+                           entity=None,
+                           radius=BOUNDARY_CONFIG["bsite_cutoff"],
+                           level='A'):
+    """Recover atoms or residues in contact with each entity in ``sources``.
+
+    This is the same as calling :meth:`get_contacts_with` for each source,
+    but all atoms of all sources are queried at once. Also, the spatial index
+    of ``entity`` (or of the model containing each source) is built only once
+    and cached for future calls.
+
+    Parameters
+    ----------
+    sources : iterable of :class:`~luna.MyBio.PDB.Entity.Entity`
+        The references, which can be any
+        :class:`~luna.MyBio.PDB.Entity.Entity` instance (structure, model,
+        chain, residue, or atom).
+    target : :class:`~luna.MyBio.PDB.Entity.Entity`, optional
+        If provided, only contacts with the ``target`` will be considered.
+    entity : :class:`~luna.MyBio.PDB.Entity.Entity`
+        The PDB object from where atoms will be recovered.
+        If not provided (the default), the model object that contains
+        each source will be used instead.
+    radius : float
+        The cutoff distance (in Å) for defining contacts.
+        The default value is 6.2.
+    level : {'R', 'A'}
+        Return residues ('R') or atoms ('A') in contact with the sources.
+
+    Returns
+    -------
+     : list of set of tuple
+        The contacts of each source in the same order as ``sources``.
+        See :meth:`get_contacts_with` for a description of the tuples.
+
+    Raises
+    ------
+    EntityLevelError
+        If ``level`` is neither 'R' nor 'A'.
+
+    Examples
+    --------
+
+    In this example, we will identify atoms in contact with two residues
+    at once.
+
+    >>> from luna.util.default_values import LUNA_PATH
+    >>> from luna.MyBio.PDB.PDBParser import PDBParser
+    >>> pdb_parser = PDBParser(PERMISSIVE=True, QUIET=True)
+    >>> structure = pdb_parser.get_structure("Protein", \
+f"{LUNA_PATH}/tutorial/inputs/3QQK.pdb")
+    >>> residues = [structure[0]["A"][(' ', 81, ' ')],
+    ...             structure[0]["A"][(' ', 82, ' ')]]
+    >>> from luna.interaction.contact import get_contacts_with_many
+    >>> contacts = get_contacts_with_many(residues, radius=3, level="R")
+    >>> print(len(contacts))
+    2
+    """
     try:
         if level == 'S' or level == 'M' or level == 'C':
             raise EntityLevelError("Maximum entity level to be chosen is: "
@@ -206,32 +270,46 @@ f"{LUNA_PATH}/tutorial/inputs/3QQK.pdb")
             raise EntityLevelError("The defined level '%s' does not exist"
                                    % level)
 
-        entity = entity or source.get_parent_by_level("M")
-
-        source_atoms = Selection.unfold_entities([source], 'A')
+        sources = list(sources)
 
-        target_atoms = []
-        if target is None:
-            target_atoms = list(entity.get_atoms())
-        else:
+        ns = None
+        if target is not None:
             if target.level == "A":
                 target_atoms = [target]
             else:
                 target_residues = Selection.unfold_entities(target, 'R')
                 target_atoms = [a for r in target_residues
                                 for a in r.get_unpacked_list()]
-
-        ns = NeighborSearch(target_atoms)
-        entities = set()
-        for atom in source_atoms:
-            entity = atom.get_parent_by_level(level)
-            nb_entities = ns.search(atom.coord, radius, level)
-            pairs = set(product([entity], nb_entities))
-            entities.update(pairs)
+            ns = NeighborSearch(target_atoms)
+
+        # Group the source atoms by the spatial index used to search them.
+        atoms_by_ns = defaultdict(list)
+        ns_by_id = {}
+        for i, source in enumerate(sources):
+            if ns is not None:
+                source_ns = ns
+            else:
+                source_entity = entity or source.get_parent_by_level("M")
+                # The spatial index is cached by the entity.
+                source_ns = source_entity.get_neighbor_search()
+            ns_by_id[id(source_ns)] = source_ns
+
+            for atom in Selection.unfold_entities([source], 'A'):
+                atoms_by_ns[id(source_ns)].append((i, atom))
+
+        all_entities = [set() for source in sources]
+        for ns_id, atoms in atoms_by_ns.items():
+            coords = [atom.coord for i, atom in atoms]
+            nb_entities_list = ns_by_id[ns_id].search_many(coords, radius,
+                                                           level)
+            for (i, atom), nb_entities in zip(atoms, nb_entities_list):
+                src_entity = atom.get_parent_by_level(level)
+                all_entities[i].update(product([src_entity], nb_entities))
 
         logger.debug("Number of nearby %s(s) found: %d."
-                     % (ENTITY_LEVEL_NAME[level].lower(), len(entities)))
-        return entities
+                     % (ENTITY_LEVEL_NAME[level].lower(),
+                        sum(len(entities) for entities in all_entities)))
+        return all_entities
     except Exception as e:
         logger.exception(e)
         raise
@@ -3,6 +3,8 @@ from ast import literal_eval
 from collections import defaultdict
 
 from luna.mol.entry import REGEX_RESNUM_ICODE
+from luna.mol.groups import (RESIDUE_CLASS, NUCLEOTIDE_CLASS, HETATM_CLASS,
+                             WATER_CLASS, MIXED_CLASS, MULTI_COMPS_CLASS)
 from luna.util.config import Config
 from luna.util.exceptions import IllegalArgumentError
 
@@ -19,6 +21,13 @@ AROMATIC_STACKINGS = ["pi-stacking",
                       "displaced face-to-slope pi-stacking"]
 
 
+def _is_class_pair(classes1, classes2, class_a, class_b):
+    """Check if one group is of class ``class_a`` and the other of class
+    ``class_b``, in any order."""
+    return bool((classes1 & class_a and classes2 & class_b)
+                or (classes1 & class_b and classes2 & class_a))
+
+
 class InteractionFilter:
     """ Filter interactions based on their components.
 
@@ -230,23 +239,30 @@ class InteractionFilter:
         if src_grp == trgt_grp:
             return False
 
+        # Atom groups are compared by their descriptors, which avoids
+        # iterating over their atoms and compounds for every pair.
+        src_desc = src_grp.descriptor
+        trgt_desc = trgt_grp.descriptor
+        src_cls = src_desc.classes
+        trgt_cls = trgt_desc.classes
+
         # It will always ignore interactions involving atoms and the group
         # to which they belong to. For example, the centroid of an aromatic
         # ring cannot interact with an atom that belongs to the ring.
         # It is a type of Loop.
-        if src_grp.contain_group(trgt_grp) or trgt_grp.contain_group(src_grp):
+        if (src_desc.atoms.issuperset(trgt_desc.atoms)
+                or trgt_desc.atoms.issuperset(src_desc.atoms)):
             return False
 
         # If one of the groups contain atoms from different compounds.
-        has_multi_comps = (len(src_grp.compounds) > 1
-                           or len(trgt_grp.compounds) > 1)
+        has_multi_comps = (src_cls | trgt_cls) & MULTI_COMPS_CLASS
         if self.ignore_multi_comps and has_multi_comps:
             return False
 
         # If one of the groups contain compounds from different classes as,
         # for instance, residue and ligand. It means that compounds from
         # different classes are covalently bonded to each other.
-        has_any_mixed = (src_grp.is_mixed() or trgt_grp.is_mixed())
+        has_any_mixed = (src_cls | trgt_cls) & MIXED_CLASS
         if self.ignore_mixed_class and has_any_mixed:
             return False
 
@@ -262,8 +278,8 @@ class InteractionFilter:
         # The same applies to any group formed after covalently bonding a
         # residue to a hetatm (ligand or non-standard amino acid
         # represented as hetatm)
-        is_same_compounds = \
-            len(src_grp.compounds.intersection(trgt_grp.compounds)) >= 1
+        is_same_compounds = not src_desc.compounds.isdisjoint(
+            trgt_desc.compounds)
         if self.ignore_self_inter and is_same_compounds:
             return False
 
@@ -272,11 +288,11 @@ class InteractionFilter:
         # containing residues of different chains as may occur due to
         # disulfide bonds. Note, however, that this flag will be used only
         # as a filter for intra-interactions in protein/RNA/DNA chains.
-        is_same_chain = (src_grp.get_chains() == trgt_grp.get_chains()
-                         and len(src_grp.get_chains()) == 1)
+        is_same_chain = (src_desc.chains == trgt_desc.chains
+                         and len(src_desc.chains) == 1)
 
         # Filters for residue-residue interactions if required.
-        is_res_res = (src_grp.is_residue() and trgt_grp.is_residue())
+        is_res_res = src_cls & trgt_cls & RESIDUE_CLASS
         if is_res_res:
             # Ignore all residue-residue interactions.
             if self.ignore_res_res:
@@ -288,19 +304,19 @@ class InteractionFilter:
                 return False
 
         # It ignores residue-nucleic acid interactions if required.
-        is_res_nucl = ((src_grp.is_residue() and trgt_grp.is_nucleotide())
-                       or (src_grp.is_nucleotide() and trgt_grp.is_residue()))
+        is_res_nucl = _is_class_pair(src_cls, trgt_cls, RESIDUE_CLASS,
+                                     NUCLEOTIDE_CLASS)
         if self.ignore_res_nucl and is_res_nucl:
             return False
 
         # It ignores residue-ligand interactions if required.
-        is_res_hetatm = ((src_grp.is_residue() and trgt_grp.is_hetatm())
-                         or (src_grp.is_hetatm() and trgt_grp.is_residue()))
+        is_res_hetatm = _is_class_pair(src_cls, trgt_cls, RESIDUE_CLASS,
+                                       HETATM_CLASS)
         if self.ignore_res_hetatm and is_res_hetatm:
             return False
 
         # Filters for nucleic acid-nucleic acid interactions if required.
-        is_nucl_nucl = (src_grp.is_nucleotide() and trgt_grp.is_nucleotide())
+        is_nucl_nucl = src_cls & trgt_cls & NUCLEOTIDE_CLASS
         if is_nucl_nucl:
             # Ignore all nucleic acid-nucleic acid interactions
             if self.ignore_nucl_nucl:
@@ -315,21 +331,20 @@ class InteractionFilter:
                 return False
 
         # It ignores nucleic acid-ligand interactions if required.
-        is_nucl_hetatm = ((src_grp.is_nucleotide() and trgt_grp.is_hetatm())
-                          or (src_grp.is_hetatm()
-                              and trgt_grp.is_nucleotide()))
+        is_nucl_hetatm = _is_class_pair(src_cls, trgt_cls, NUCLEOTIDE_CLASS,
+                                        HETATM_CLASS)
         if self.ignore_nucl_hetatm and is_nucl_hetatm:
             return False
 
         # It ignores ligand-ligand interactions if required.
-        is_hetatm_hetatm = (src_grp.is_hetatm() and trgt_grp.is_hetatm())
+        is_hetatm_hetatm = src_cls & trgt_cls & HETATM_CLASS
         if self.ignore_hetatm_hetatm and is_hetatm_hetatm:
             return False
 
         # It ignores interactions of other compound types with water.
         # It enables the possibility of identifying water-bridged interaction.
         # Eg: residue-water, ligand-water = residue -- water -- ligand.
-        is_any_h2o = (src_grp.is_water() or trgt_grp.is_water())
+        is_any_h2o = (src_cls | trgt_cls) & WATER_CLASS
         if self.ignore_any_h2o and is_any_h2o:
             return False
 
@@ -337,7 +352,7 @@ class InteractionFilter:
         # If ON, it will produce water-bridged interactions of multiple levels
         # E.g.: residue -- h2o -- h2o -- ligand
         #       residue -- residue -- h2o -- h2o -- ligand.
-        is_h2o_h2o = (src_grp.is_water() and trgt_grp.is_water())
+        is_h2o_h2o = src_cls & trgt_cls & WATER_CLASS
         if self.ignore_h2o_h2o and is_h2o_h2o:
             return False
 
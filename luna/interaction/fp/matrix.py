@@ -0,0 +1,621 @@
+import json
+import os
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from scipy.sparse import csr_matrix, issparse
+
+from luna.interaction.fp.fingerprint import Fingerprint, CountFingerprint
+from luna.util.exceptions import BitsValueError, IllegalArgumentError
+
+import logging
+logger = logging.getLogger()
+
+
+SIMILARITY_METRICS = ["tanimoto", "dice", "tversky", "count_tanimoto"]
+
+# Maximum number of similarities in a block if the number of rows of
+# blocks is not provided. Dense blocks take up to 8 MB.
+BLOCK_NUM_SIMS = 2 ** 20
+
+# Maximum number of similarities written to a file at once.
+WRITE_BATCH_SIZE = 2 ** 16
+
+
+class FingerprintMatrix:
+
+    """A set of fingerprints stacked as rows of a compressed sparse row (CSR)
+    matrix, which allows to calculate similarities between all of them at
+    once with sparse matrix products.
+
+    Parameters
+    ----------
+    matrix : `scipy.sparse.csr_matrix` or array_like
+        A matrix whose rows are fingerprints and columns are bits. Values are
+        the bit counts.
+    names : iterable of str, optional
+        A name for each fingerprint, e.g., the entry it represents. If not
+        provided, the row indices are used instead.
+    props : dict, optional
+        Custom properties of the fingerprints, e.g., the parameters used to
+        generate them. They are saved together with the fingerprints by
+        :meth:`save`.
+
+    Examples
+    --------
+    >>> from luna.interaction.fp.fingerprint import Fingerprint
+    >>> from luna.interaction.fp.matrix import FingerprintMatrix
+    >>> fp1 = Fingerprint.from_bit_string("0010101110000010")
+    >>> fp2 = Fingerprint.from_bit_string("1010100110010010")
+    >>> fp_matrix = FingerprintMatrix.from_fingerprints([fp1, fp2])
+    >>> print(fp_matrix.calc_similarity())
+    [[1.    0.625]
+     [0.625 1.   ]]
+    """
+
+    def __init__(self, matrix, names=None, props=None):
+        if not issparse(matrix):
+            matrix = np.atleast_2d(matrix)
+        matrix = csr_matrix(matrix)
+        matrix.sum_duplicates()
+        matrix.sort_indices()
+
+        if names is None:
+            names = [str(i) for i in range(matrix.shape[0])]
+        names = list(names)
+        if len(names) != matrix.shape[0]:
+            raise IllegalArgumentError("The number of names (%d) does not "
+                                       "match the number of fingerprints "
+                                       "(%d)." % (len(names), matrix.shape[0]))
+
+        self._matrix = matrix
+        self._names = names
+        self.props = props or {}
+        self._bits = None
+        self._count_levels = None
+
+    @classmethod
+    def from_fingerprints(cls, fps, names=None):
+        """Initialize from a sequence of `Fingerprint` or `CountFingerprint`
+        objects.
+
+        Parameters
+        ----------
+        fps : iterable of `Fingerprint`
+            The fingerprints, which must have the same length.
+        names : iterable of str, optional
+            A name for each fingerprint. If not provided, the fingerprint
+            names (property ``name``) are used instead.
+
+        Returns
+        -------
+         : `FingerprintMatrix`
+
+        Raises
+        ------
+        BitsValueError
+            If fingerprints have different lengths.
+        """
+        fps = list(fps)
+        if names is None:
+            names = [fp.name or str(i) for i, fp in enumerate(fps)]
+
+        fp_lengths = set([fp.fp_length for fp in fps])
+        if len(fp_lengths) > 1:
+            raise BitsValueError("Fingerprints are in a different bit scale.")
+
+        fp_length = fp_lengths.pop() if fp_lengths else 0
+        return cls.from_counts([fp.counts for fp in fps], fp_length, names)
+
+    @classmethod
+    def from_counts(cls, counts, fp_length, names=None):
+        """Initialize from a sequence of counts.
+
+        Parameters
+        ----------
+        counts : iterable of dict
+            Map the "on" bits of each fingerprint to their counts.
+        fp_length : int
+            The fingerprint length (total number of bits).
+        names : iterable of str, optional
+            A name for each fingerprint.
+
+        Returns
+        -------
+         : `FingerprintMatrix`
+        """
+        counts = list(counts)
+        indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(c) for c in counts])
+        indices = np.fromiter((i for c in counts for i in c.keys()),
+                              dtype=np.int64, count=indptr[-1])
+        data = np.fromiter((v for c in counts for v in c.values()),
+                           dtype=np.int32, count=indptr[-1])
+
+        matrix = csr_matrix((data, indices, indptr),
+                            shape=(len(counts), fp_length))
+        return cls(matrix, names)
+
+    @property
+    def matrix(self):
+        """`scipy.sparse.csr_matrix`, read-only: The fingerprints as a sparse \
+        matrix of counts."""
+        return self._matrix
+
+    @property
+    def names(self):
+        """list of str, read-only: The name of each fingerprint."""
+        return self._names
+
+    @property
+    def num_fps(self):
+        """int, read-only: The number of fingerprints."""
+        return self._matrix.shape[0]
+
+    @property
+    def fp_length(self):
+        """int, read-only: The fingerprint length (total number of bits)."""
+        return self._matrix.shape[1]
+
+    @property
+    def bits(self):
+        """`scipy.sparse.csr_matrix`, read-only: The fingerprints as a \
+        sparse matrix of bits."""
+        if self._bits is None:
+            self._bits = self._new_bit_matrix(self._matrix.data > 0)
+        return self._bits
+
+    @property
+    def count_levels(self):
+        """list of `scipy.sparse.csr_matrix`, read-only: Bit matrices \
+        whose *k*-th element has the bits with counts greater than *k*. \
+        The sum of their products is the sum of minimum counts."""
+        if self._count_levels is None:
+            max_count = self._matrix.data.max() if self._matrix.nnz else 0
+            self._count_levels = [self._new_bit_matrix(self._matrix.data > k)
+                                  for k in range(max_count)]
+        return self._count_levels
+
+    def _new_bit_matrix(self, mask):
+        # Index arrays are copied because removing zeros changes them.
+        bits = csr_matrix((mask.astype(np.int32),
+                           self._matrix.indices.copy(),
+                           self._matrix.indptr.copy()),
+                          shape=self._matrix.shape)
+        bits.eliminate_zeros()
+        return bits
+
+    def to_fingerprints(self, count_fp=True):
+        """Convert each row to a `CountFingerprint` or `Fingerprint`.
+
+        Parameters
+        ----------
+        count_fp : bool
+            If True (the default), create `CountFingerprint` objects.
+            Otherwise, create `Fingerprint` objects.
+
+        Returns
+        -------
+         : list of `CountFingerprint` or `Fingerprint`
+        """
+        fps = []
+        m = self._matrix
+        for i, name in enumerate(self._names):
+            start, end = m.indptr[i], m.indptr[i + 1]
+            if count_fp:
+                counts = dict(zip(m.indices[start:end].tolist(),
+                                  m.data[start:end].tolist()))
+                fp = CountFingerprint.from_counts(counts,
+                                                  fp_length=self.fp_length)
+            else:
+                fp = Fingerprint.from_indices(m.indices[start:end],
+                                              fp_length=self.fp_length)
+            fp.name = name
+            fps.append(fp)
+        return fps
+
+    def save(self, output_file):
+        """Save the fingerprints, their names, and ``props`` to the binary
+        file ``output_file`` (NumPy .npz archive).
+
+        The matrix is saved in the same format as
+        :func:`scipy.sparse.save_npz`, so it can also be read by
+        :func:`scipy.sparse.load_npz`.
+        """
+        m = self._matrix
+        _save_npz(output_file, self._names, m.indptr, m.indices, m.data,
+                  self.fp_length, self.props)
+
+    @classmethod
+    def load(cls, input_file):
+        """Load fingerprints saved by :meth:`save` or by
+        `FingerprintWriter`.
+
+        Returns
+        -------
+         : `FingerprintMatrix`
+        """
+        with np.load(input_file) as npz:
+            metadata = json.loads(npz["metadata"].item())
+            matrix = csr_matrix((npz["data"], npz["indices"], npz["indptr"]),
+                                shape=tuple(npz["shape"]))
+            names = npz["names"].tolist()
+        return cls(matrix, names, metadata["props"])
+
+    def _check_compatibility(self, other):
+        if not isinstance(other, FingerprintMatrix):
+            raise IllegalArgumentError("Similarities can only be calculated "
+                                       "between FingerprintMatrix objects.")
+        if self.fp_length != other.fp_length:
+            raise BitsValueError("Fingerprints are in a different bit scale.")
+
+    def _calc_block(self, start, end, other, metric, alpha, beta,
+                    threshold):
+        """Calculate similarities between the rows ``start`` to ``end`` and
+        all fingerprints in ``other``.
+
+        Return a dense block of similarities if ``threshold`` is None.
+        Otherwise, return a sparse block with only those similarities greater
+        than or equal to ``threshold``.
+        """
+        if metric == "count_tanimoto":
+            sizes1 = np.asarray(self._matrix[start:end].sum(axis=1)).ravel()
+            sizes2 = np.asarray(other.matrix.sum(axis=1)).ravel()
+            other_levels = other.count_levels
+            common = None
+            for k, level in enumerate(self.count_levels):
+                if k >= len(other_levels):
+                    break
+                prod = level[start:end] @ other_levels[k].T
+                common = prod if common is None else common + prod
+            if common is None:
+                common = csr_matrix((end - start, other.num_fps),
+                                    dtype=np.int32)
+        else:
+            sizes1 = np.diff(self.bits.indptr)[start:end]
+            sizes2 = np.diff(other.bits.indptr)
+            common = self.bits[start:end] @ other.bits.T
+
+        if threshold is None:
+            common = common.toarray().astype(np.float64)
+            return _calc_similarity(common, sizes1[:, None], sizes2[None, :],
+                                    metric, alpha, beta)
+
+        # Only pairs with common bits can have a non-zero similarity.
+        common = common.tocoo()
+        sim = _calc_similarity(common.data.astype(np.float64),
+                               sizes1[common.row], sizes2[common.col],
+                               metric, alpha, beta)
+        rows, cols = common.row, common.col
+
+        mask = sim >= threshold
+        return csr_matrix((sim[mask], (rows[mask], cols[mask])),
+                          shape=(end - start, other.num_fps))
+
+    def iter_similarity_blocks(self, other=None, metric="tanimoto",
+                               alpha=0.5, beta=0.5, threshold=None,
+                               block_size=None, nproc=None):
+        """Calculate similarities between fingerprints block by block, so
+        that the whole similarity matrix is never kept in memory.
+
+        Parameters
+        ----------
+        other : `FingerprintMatrix`, optional
+            Calculate similarities against fingerprints in ``other``.
+            If not provided, calculate similarities between fingerprints in
+            this matrix.
+        metric : {'tanimoto', 'dice', 'tversky', 'count_tanimoto'}
+            The similarity metric. The first three metrics consider only
+            the "on" bits, while 'count_tanimoto' is the Tanimoto similarity
+            over counts, i.e., the sum of minimum counts divided by the sum of
+            maximum counts.
+        alpha, beta : float
+            The Tversky weights for the first and second fingerprints,
+            respectively. The default values are 0.5, which is equivalent to
+            the Dice similarity.
+        threshold : float, optional
+            If provided, return only similarities greater than or equal to
+            ``threshold`` as sparse blocks. Otherwise, return dense blocks.
+        block_size : int, optional
+            The number of rows of each block. If not provided, it is derived
+            from the number of fingerprints in ``other``, so that each block
+            has at most `BLOCK_NUM_SIMS` similarities.
+        nproc : int, optional
+            The number of threads used to calculate blocks in parallel.
+            If not provided, blocks are calculated sequentially.
+
+        Yields
+        ------
+         : tuple of (int, :class:`numpy.ndarray` or `scipy.sparse.csr_matrix`)
+            The index of the first row of the block and the block of
+            similarities.
+
+        Raises
+        ------
+        IllegalArgumentError
+            If ``metric`` is not valid.
+        """
+        if metric not in SIMILARITY_METRICS:
+            raise IllegalArgumentError("Invalid similarity metric '%s'. "
+                                       "Valid metrics are: %s."
+                                       % (metric,
+                                          ", ".join(SIMILARITY_METRICS)))
+        other = self if other is None else other
+        self._check_compatibility(other)
+
+        if block_size is None:
+            block_size = max(1, BLOCK_NUM_SIMS // max(other.num_fps, 1))
+
+        def calc_block(start):
+            end = min(start + block_size, self.num_fps)
+            return start, self._calc_block(start, end, other, metric,
+                                           alpha, beta, threshold)
+
+        starts = range(0, self.num_fps, block_size)
+        if not nproc or nproc <= 1:
+            for start in starts:
+                yield calc_block(start)
+            return
+
+        # Sparse products release the GIL, so blocks can be calculated by
+        # threads. Only a few blocks are kept in memory at a time.
+        with ThreadPoolExecutor(nproc) as executor:
+            futures = deque()
+            for start in starts:
+                futures.append(executor.submit(calc_block, start))
+                if len(futures) >= 2 * nproc:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+
+    def calc_similarity(self, other=None, metric="tanimoto", alpha=0.5,
+                        beta=0.5, block_size=None, nproc=None):
+        """Calculate the similarity matrix between fingerprints.
+
+        Refer to :meth:`iter_similarity_blocks` for the parameters.
+
+        Returns
+        -------
+         : :class:`numpy.ndarray`
+            A matrix of shape (``num_fps``, ``other.num_fps``).
+        """
+        blocks = [block for _, block
+                  in self.iter_similarity_blocks(other, metric, alpha, beta,
+                                                 None, block_size, nproc)]
+        if not blocks:
+            other = self if other is None else other
+            return np.zeros((0, other.num_fps))
+        return np.vstack(blocks)
+
+    def save_similarity(self, output_file, other=None, metric="tanimoto",
+                        alpha=0.5, beta=0.5, threshold=None,
+                        block_size=None, nproc=None):
+        """Save similarities between fingerprints as triplets
+        (name1, name2, similarity) to the CSV file ``output_file``.
+
+        If ``other`` is not provided, only pairs of different fingerprints
+        from this matrix are saved, each pair only once. Refer to
+        :meth:`iter_similarity_blocks` for the other parameters.
+        """
+        other_names = (self if other is None else other).names
+
+        with open(output_file, "w") as OUT:
+            OUT.write("entry1,entry2,similarity\n")
+
+            for start, block in self.iter_similarity_blocks(other, metric,
+                                                            alpha, beta,
+                                                            threshold,
+                                                            block_size,
+                                                            nproc):
+                for rows, cols, sims in _iter_triplets(block, start,
+                                                       other is None):
+                    OUT.write("".join(["%s,%s,%s\n" % (self._names[i],
+                                                       other_names[j], str(s))
+                                       for i, j, s in zip(rows.tolist(),
+                                                          cols.tolist(),
+                                                          sims.tolist())]))
+
+    def __len__(self):
+        return self.num_fps
+
+    def __repr__(self):
+        return ("<FingerprintMatrix: fingerprints=%d length=%d>"
+                % (self.num_fps, self.fp_length))
+
+
+class FingerprintWriter:
+
+    """Write fingerprints one by one to a binary file that can be loaded
+    with :meth:`FingerprintMatrix.load`.
+
+    Fingerprints are written to temporary files as they are provided, so
+    that they are never kept in memory. The binary file is created when the
+    writer is closed.
+
+    Parameters
+    ----------
+    output_file : str
+        The output file (NumPy .npz archive).
+    fp_length : int
+        The fingerprint length (total number of bits).
+    props : dict, optional
+        Custom properties of the fingerprints, e.g., the parameters used to
+        generate them.
+
+    Examples
+    --------
+    >>> from luna.interaction.fp.fingerprint import Fingerprint
+    >>> from luna.interaction.fp.matrix import (FingerprintMatrix,
+    ...                                         FingerprintWriter)
+    >>> fp1 = Fingerprint.from_bit_string("0010101110000010")
+    >>> fp2 = Fingerprint.from_bit_string("1010100110010010")
+    >>> with FingerprintWriter("fps.npz", fp_length=16) as writer:
+    ...     writer.write(fp1, "A")
+    ...     writer.write(fp2, "B")
+    >>> fp_matrix = FingerprintMatrix.load("fps.npz")
+    >>> print(fp_matrix.names)
+    ['A', 'B']
+    """
+
+    def __init__(self, output_file, fp_length, props=None):
+        self.output_file = output_file
+        self.fp_length = fp_length
+        self.props = props or {}
+
+        # Unfolded fingerprints may need 64-bit indices.
+        self._index_dtype = (np.int32 if fp_length <= np.iinfo(np.int32).max
+                             else np.int64)
+        self._names = []
+        self._indptr = [0]
+        self._tmp_files = {"indices": "%s.indices.tmp" % output_file,
+                           "data": "%s.data.tmp" % output_file}
+        self._handlers = {key: open(tmp_file, "wb")
+                          for key, tmp_file in self._tmp_files.items()}
+
+    def write(self, fp, name):
+        """Write a fingerprint.
+
+        Parameters
+        ----------
+        fp : `Fingerprint` or dict
+            The fingerprint or a map of its "on" bits to their counts.
+        name : str
+            The fingerprint name, e.g., the entry it represents.
+
+        Raises
+        ------
+        BitsValueError
+            If the fingerprint has a different length from the writer.
+        """
+        if isinstance(fp, Fingerprint):
+            if fp.fp_length != self.fp_length:
+                raise BitsValueError("Fingerprints are in a different "
+                                     "bit scale.")
+            fp = fp.counts
+
+        indices = np.fromiter(fp.keys(), dtype=self._index_dtype,
+                              count=len(fp))
+        data = np.fromiter(fp.values(), dtype=np.int32, count=len(fp))
+        order = np.argsort(indices)
+        indices[order].tofile(self._handlers["indices"])
+        data[order].tofile(self._handlers["data"])
+
+        self._names.append(str(name))
+        self._indptr.append(self._indptr[-1] + len(fp))
+
+    def _close_handlers(self):
+        if self._handlers is None:
+            return False
+
+        for handler in self._handlers.values():
+            handler.close()
+        self._handlers = None
+        return True
+
+    def discard(self):
+        """Remove temporary files without creating the binary file."""
+        if self._close_handlers():
+            for tmp_file in self._tmp_files.values():
+                os.remove(tmp_file)
+
+    def close(self):
+        """Create the binary file and remove temporary files."""
+        if not self._close_handlers():
+            return
+
+        arrays = {}
+        for key, tmp_file in self._tmp_files.items():
+            dtype = self._index_dtype if key == "indices" else np.int32
+            if os.path.getsize(tmp_file) > 0:
+                # Arrays are read from disk in chunks while saving.
+                arrays[key] = np.memmap(tmp_file, dtype=dtype, mode="r")
+            else:
+                arrays[key] = np.zeros(0, dtype=dtype)
+
+        try:
+            _save_npz(self.output_file, self._names,
+                      np.array(self._indptr, dtype=np.int64),
+                      arrays["indices"], arrays["data"], self.fp_length,
+                      self.props)
+        finally:
+            del arrays
+            for tmp_file in self._tmp_files.values():
+                os.remove(tmp_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Do not create incomplete files.
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+    def __len__(self):
+        return len(self._names)
+
+
+def _save_npz(output_file, names, indptr, indices, data, fp_length, props):
+    """Save a CSR matrix using the keys of :func:`scipy.sparse.save_npz` plus
+    the fingerprint names and metadata."""
+    metadata = {"fp_length": fp_length, "props": props}
+    with open(output_file, "wb") as OUT:
+        np.savez(OUT, format=np.array(b"csr"),
+                 shape=np.array([len(names), fp_length]),
+                 indptr=indptr, indices=indices, data=data,
+                 names=np.array(names, dtype=str),
+                 metadata=np.array(json.dumps(metadata)))
+
+
+def _calc_similarity(common, sizes1, sizes2, metric, alpha, beta):
+    """Calculate similarities from the number of common bits (or the sum of
+    minimum counts) and the fingerprint sizes. Pairs of empty fingerprints
+    are set to zero."""
+    if metric in ("tanimoto", "count_tanimoto"):
+        denom = sizes1 + sizes2 - common
+        numer = common
+    elif metric == "dice":
+        denom = sizes1 + sizes2
+        numer = 2 * common
+    else:
+        denom = alpha * (sizes1 - common) + beta * (sizes2 - common) + common
+        numer = common
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sim = numer / denom
+    return np.where(denom > 0, sim, 0.0)
+
+
+def _iter_triplets(block, start, upper_only):
+    """Yield rows, columns, and similarities from a block of similarities
+    whose first row is ``start`` in batches of up to `WRITE_BATCH_SIZE`
+    similarities and in row-major order. If ``upper_only`` is True, only
+    pairs whose row is lower than the column are yielded."""
+    if issparse(block):
+        block = block.tocoo()
+        rows, cols, sims = block.row + start, block.col, block.data
+        if upper_only:
+            mask = rows < cols
+            rows, cols, sims = rows[mask], cols[mask], sims[mask]
+
+        # Keep the row-major order of dense blocks.
+        order = np.lexsort((cols, rows))
+        for i in range(0, len(order), WRITE_BATCH_SIZE):
+            batch = order[i:i + WRITE_BATCH_SIZE]
+            yield rows[batch], cols[batch], sims[batch]
+        return
+
+    num_rows, num_cols = block.shape
+    batch_size = max(1, WRITE_BATCH_SIZE // max(num_cols, 1))
+    for i in range(0, num_rows, batch_size):
+        batch = block[i:i + batch_size]
+        if upper_only:
+            batch_rows = np.arange(start + i, start + i + len(batch))
+            mask = np.arange(num_cols)[None, :] > batch_rows[:, None]
+        else:
+            mask = np.ones(batch.shape, dtype=bool)
+
+        # Indices are created only for the selected pairs.
+        rows, cols = np.nonzero(mask)
+        yield rows + start + i, cols, batch[mask]
@@ -0,0 +1,419 @@
+import json
+import os
+import uuid
+import numpy as np
+from os.path import exists
+from scipy.sparse import csr_matrix
+
+from luna.interaction.fp.fingerprint import Fingerprint
+from luna.interaction.fp.matrix import FingerprintMatrix
+from luna.util.exceptions import BitsValueError, IllegalArgumentError
+
+import logging
+logger = logging.getLogger()
+
+
+# Tolerance used to compute popcount bounds.
+EPSILON = 1e-9
+
+# Thresholds tried in turn by `FingerprintIndex.search` until enough
+# fingerprints are found. Higher thresholds allow more fingerprints to be
+# skipped by their popcount. EPSILON selects any fingerprint sharing at least
+# one bit with the query, and 0 selects all fingerprints.
+TOP_K_THRESHOLDS = [0.8, 0.6, 0.4, EPSILON, 0]
+
+
+class _IndexSegment:
+
+    """An immutable part of a `FingerprintIndex`.
+
+    Fingerprints are sorted by popcount, so that fingerprints that can reach
+    a given Tanimoto similarity form a contiguous range (BitBound). An
+    inverted index maps each "on" bit to the sorted list of fingerprints
+    containing it.
+    """
+
+    def __init__(self, names, indptr, indices, segment_id=None):
+        self.id = segment_id or uuid.uuid4().hex
+        self.names = np.asarray(names, dtype=object)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.popcounts = np.diff(self.indptr)
+
+        # Inverted index.
+        rows = np.repeat(np.arange(len(self.names)), self.popcounts)
+        order = np.argsort(self.indices, kind="stable")
+        self.bits, starts = np.unique(self.indices[order], return_index=True)
+        self.postings_indptr = np.append(starts, len(order))
+        self.postings = rows[order]
+
+    @classmethod
+    def from_matrix(cls, fp_matrix):
+        bits = fp_matrix.bits
+        order = np.argsort(np.diff(bits.indptr), kind="stable")
+        bits = bits[order]
+        names = [fp_matrix.names[i] for i in order]
+        return cls(names, bits.indptr, bits.indices)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _find_candidates(self, query_bits, start, end):
+        """Find the fingerprints from ``start`` to ``end`` that share at least
+        one bit with the query and calculate their Tanimoto similarity."""
+        pos = np.searchsorted(self.bits, query_bits)
+        found = pos < len(self.bits)
+        found[found] = self.bits[pos[found]] == query_bits[found]
+
+        # Only the postings of the query bits are visited.
+        ids = []
+        for p in pos[found]:
+            postings = self.postings[self.postings_indptr[p]:
+                                     self.postings_indptr[p + 1]]
+            lo, hi = np.searchsorted(postings, [start, end])
+            ids.append(postings[lo:hi])
+
+        if not ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        ids = np.concatenate(ids)
+        if 16 * len(ids) < end - start:
+            rows, common = np.unique(ids, return_counts=True)
+        else:
+            # Counting is faster than sorting when there are many postings.
+            common = np.bincount(ids - start, minlength=end - start)
+            rows = np.flatnonzero(common)
+            common = common[rows]
+            rows += start
+        sims = common / (len(query_bits) + self.popcounts[rows] - common)
+        return rows, sims
+
+    def search_threshold(self, query_bits, threshold):
+        a = len(query_bits)
+        start, end = 0, len(self)
+        if threshold > 0:
+            start = np.searchsorted(self.popcounts, threshold * a - EPSILON,
+                                    "left")
+            end = np.searchsorted(self.popcounts, a / threshold + EPSILON,
+                                  "right")
+        if start >= end:
+            return np.zeros(0, dtype=object), np.zeros(0)
+
+        rows, sims = self._find_candidates(query_bits, start, end)
+
+        if threshold <= 0:
+            # Fingerprints without common bits are not candidates, but they
+            # may still satisfy the threshold.
+            all_sims = np.zeros(end - start)
+            all_sims[rows - start] = sims
+            rows = np.arange(start, end)
+            sims = all_sims
+
+        mask = sims >= threshold
+        return self.names[rows[mask]], sims[mask]
+
+
+class FingerprintIndex:
+
+    """An index to search for the most similar fingerprints to a query
+    fingerprint according to the Tanimoto similarity over "on" bits.
+
+    Fingerprints are searched through an inverted index that maps each bit to
+    the fingerprints containing it, and only fingerprints whose popcount
+    allows them to reach the required similarity are evaluated (BitBound).
+
+    New fingerprints can be added at any time. They are kept in a new
+    segment of the index, so previous segments never need to be rebuilt.
+
+    Parameters
+    ----------
+    fp_length : int
+        The fingerprint length (total number of bits).
+    props : dict, optional
+        Custom properties of the index, e.g., the parameters used to
+        generate the fingerprints.
+
+    Examples
+    --------
+    >>> from luna.interaction.fp.fingerprint import Fingerprint
+    >>> from luna.interaction.fp.search import FingerprintIndex
+    >>> fp1 = Fingerprint.from_bit_string("0010101110000010")
+    >>> fp2 = Fingerprint.from_bit_string("1010100110010010")
+    >>> fp3 = Fingerprint.from_bit_string("1000000000000001")
+    >>> index = FingerprintIndex.from_fingerprints([fp1, fp2, fp3],
+    ...                                            names=["A", "B", "C"])
+    >>> print(index.search(fp1, k=2))
+    [('A', 1.0), ('B', 0.625)]
+    """
+
+    def __init__(self, fp_length, props=None):
+        self.fp_length = fp_length
+        self.props = props or {}
+        self._segments = []
+        self._names = set()
+
+    @classmethod
+    def from_fingerprints(cls, fps, names=None, props=None):
+        """Initialize from a sequence of `Fingerprint` objects.
+
+        Returns
+        -------
+         : `FingerprintIndex`
+        """
+        fp_matrix = FingerprintMatrix.from_fingerprints(fps, names)
+        return cls.from_matrix(fp_matrix, props)
+
+    @classmethod
+    def from_matrix(cls, fp_matrix, props=None):
+        """Initialize from a
+        :class:`~luna.interaction.fp.matrix.FingerprintMatrix`.
+
+        Returns
+        -------
+         : `FingerprintIndex`
+        """
+        index = cls(fp_matrix.fp_length, props)
+        index.add(fp_matrix)
+        return index
+
+    @property
+    def names(self):
+        """set of str, read-only: The names of all indexed fingerprints."""
+        return self._names
+
+    @property
+    def num_segments(self):
+        """int, read-only: The number of segments of the index."""
+        return len(self._segments)
+
+    def add(self, fp_matrix):
+        """Add fingerprints to the index. Fingerprints whose names are
+        already in the index are ignored.
+
+        Parameters
+        ----------
+        fp_matrix : :class:`~luna.interaction.fp.matrix.FingerprintMatrix`
+            The fingerprints to add.
+
+        Returns
+        -------
+         : int
+            The number of added fingerprints.
+
+        Raises
+        ------
+        BitsValueError
+            If fingerprints have a different length from the index.
+        """
+        if fp_matrix.fp_length != self.fp_length:
+            raise BitsValueError("Fingerprints are in a different bit scale.")
+
+        rows = [i for i, name in enumerate(fp_matrix.names)
+                if name not in self._names]
+        if not rows:
+            return 0
+
+        if len(rows) < fp_matrix.num_fps:
+            fp_matrix = FingerprintMatrix(fp_matrix.matrix[rows],
+                                          [fp_matrix.names[i] for i in rows])
+
+        self._segments.append(_IndexSegment.from_matrix(fp_matrix))
+        self._names.update(fp_matrix.names)
+        return len(rows)
+
+    def remove(self, names):
+        """Remove fingerprints from the index.
+
+        Parameters
+        ----------
+        names : iterable of str
+            The names of the fingerprints to remove. Names not in the index
+            are ignored.
+
+        Returns
+        -------
+         : int
+            The number of removed fingerprints.
+        """
+        names = set(names) & self._names
+        if not names:
+            return 0
+
+        segments = []
+        for segment in self._segments:
+            keep = np.array([name not in names for name in segment.names],
+                            dtype=bool)
+            if keep.all():
+                segments.append(segment)
+            elif keep.any():
+                # Segments are immutable, so the remaining fingerprints are
+                # moved to a new segment.
+                bits = csr_matrix((np.ones(len(segment.indices),
+                                           dtype=np.int32),
+                                   segment.indices, segment.indptr),
+                                  shape=(len(segment), self.fp_length))
+                fp_matrix = FingerprintMatrix(bits[keep],
+                                              segment.names[keep].tolist())
+                segments.append(_IndexSegment.from_matrix(fp_matrix))
+
+        self._segments = segments
+        self._names -= names
+        return len(names)
+
+    def compact(self):
+        """Merge all segments into a single one."""
+        if len(self._segments) <= 1:
+            return
+
+        names, indptr, indices = [], [0], []
+        for segment in self._segments:
+            names.extend(segment.names)
+            indptr.extend((segment.indptr[1:] + indptr[-1]).tolist())
+            indices.append(segment.indices)
+
+        indices = np.concatenate(indices)
+        bits = csr_matrix((np.ones(len(indices), dtype=np.int32), indices,
+                           indptr), shape=(len(names), self.fp_length))
+        fp_matrix = FingerprintMatrix(bits, names)
+        self._segments = [_IndexSegment.from_matrix(fp_matrix)]
+
+    def _get_query_bits(self, fp):
+        if isinstance(fp, Fingerprint):
+            if fp.fp_length != self.fp_length:
+                raise BitsValueError("Fingerprints are in a different "
+                                     "bit scale.")
+            return np.asarray(fp.indices, dtype=np.int64)
+        return np.unique(np.asarray(fp, dtype=np.int64))
+
+    def search(self, fp, k=10):
+        """Search for the ``k`` most similar fingerprints to ``fp``.
+
+        Parameters
+        ----------
+        fp : `Fingerprint` or array_like of int
+            The query fingerprint or its "on" bits.
+        k : int
+            The number of fingerprints to return.
+
+        Returns
+        -------
+         : list of tuple of (str, float)
+            The names of the most similar fingerprints and their Tanimoto
+            similarity to ``fp``, from the most to the least similar.
+        """
+        if k < 1:
+            raise IllegalArgumentError("The number of fingerprints to return "
+                                       "must be a positive integer.")
+
+        # All fingerprints above a threshold are found, so the top k are
+        # exact once at least k fingerprints are found.
+        query_bits = self._get_query_bits(fp)
+        for threshold in TOP_K_THRESHOLDS:
+            names, sims = self._search_segments(query_bits, threshold)
+            if len(sims) >= k:
+                break
+        return self._sort_hits(names, sims, k)
+
+    def search_threshold(self, fp, threshold):
+        """Search for all fingerprints whose similarity to ``fp`` is greater
+        than or equal to ``threshold``.
+
+        Parameters
+        ----------
+        fp : `Fingerprint` or array_like of int
+            The query fingerprint or its "on" bits.
+        threshold : float
+            The minimum Tanimoto similarity.
+
+        Returns
+        -------
+         : list of tuple of (str, float)
+            The names of the fingerprints and their Tanimoto similarity to
+            ``fp``, from the most to the least similar.
+        """
+        query_bits = self._get_query_bits(fp)
+        names, sims = self._search_segments(query_bits, threshold)
+        return self._sort_hits(names, sims)
+
+    def _search_segments(self, query_bits, threshold):
+        names, sims = [np.zeros(0, dtype=object)], [np.zeros(0)]
+        for segment in self._segments:
+            seg_names, seg_sims = segment.search_threshold(query_bits,
+                                                           threshold)
+            names.append(seg_names)
+            sims.append(seg_sims)
+        return np.concatenate(names), np.concatenate(sims)
+
+    def _sort_hits(self, names, sims, k=None):
+        if k is not None and k < len(sims):
+            # Keep only the k best hits and any hit tied with the last one.
+            kth_sim = np.partition(sims, len(sims) - k)[len(sims) - k]
+            mask = sims >= kth_sim
+            names, sims = names[mask], sims[mask]
+
+        # Sort by similarity and then by name to always keep the same order.
+        order = np.lexsort((names.astype(str), -sims))[:k]
+        return [(names[i], float(sims[i])) for i in order]
+
+    def save(self, path):
+        """Save the index at the directory ``path``. Only segments that were
+        not saved before are written, and only segments of an index
+        previously saved at ``path`` are removed. Any other file in ``path``
+        is kept."""
+        os.makedirs(path, exist_ok=True)
+
+        index_file = "%s/index.json" % path
+        prev_segment_ids = []
+        if exists(index_file):
+            with open(index_file, "r") as IN:
+                prev_segment_ids = json.load(IN).get("segments", [])
+
+        for segment in self._segments:
+            segment_file = "%s/%s.npz" % (path, segment.id)
+            if not exists(segment_file):
+                tmp_file = "%s/.%s.tmp" % (path, segment.id)
+                with open(tmp_file, "wb") as OUT:
+                    np.savez(OUT, names=segment.names.astype(str),
+                             indptr=segment.indptr, indices=segment.indices)
+                os.replace(tmp_file, segment_file)
+
+        tmp_file = "%s/.index.json.tmp" % path
+        with open(tmp_file, "w") as OUT:
+            json.dump({"fp_length": self.fp_length,
+                       "props": self.props,
+                       "segments": [s.id for s in self._segments]}, OUT)
+        os.replace(tmp_file, index_file)
+
+        # Remove segments that were merged into others or rebuilt.
+        segment_ids = set([s.id for s in self._segments])
+        for segment_id in set(prev_segment_ids) - segment_ids:
+            segment_file = "%s/%s.npz" % (path, segment_id)
+            if exists(segment_file):
+                os.remove(segment_file)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved at the directory ``path``.
+
+        Returns
+        -------
+         : `FingerprintIndex`
+        """
+        with open("%s/index.json" % path, "r") as IN:
+            metadata = json.load(IN)
+
+        index = cls(metadata["fp_length"], metadata["props"])
+        for segment_id in metadata["segments"]:
+            with np.load("%s/%s.npz" % (path, segment_id)) as npz:
+                segment = _IndexSegment(npz["names"], npz["indptr"],
+                                        npz["indices"], segment_id)
+            index._segments.append(segment)
+            index._names.update(segment.names)
+        return index
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return ("<FingerprintIndex: fingerprints=%d length=%d segments=%d>"
+                % (len(self), self.fp_length, self.num_segments))
@@ -123,6 +123,11 @@ class ShellManager:
         Two shells are similar if they represent the same substructural
         information.
 
+        Only shells that may be similar to ``shell`` are checked, which are
+        recovered from indexes by level and identifier, encoded data, and
+        shells without interactions. If more than one similar shell is
+        found, the first one added to ``shells`` is returned.
+
         Parameters
         ----------
         shell : `Shell`
@@ -132,13 +137,34 @@ class ShellManager:
          : `Shell` or None
             Return a similar shell or None if it does not find any.
         """
-        for added_shell in self.shells:
+        # Shells at the same level are similar only if they have the same
+        # identifier.
+        candidates = \
+            list(self._shells_by_id.get((shell.level, shell.identifier), []))
+
+        # Shells at different levels can be similar if both have the
+        # same encoded interactions or if none of them have interactions.
+        if shell.interactions:
+            key = tuple(shell.encoded_data)
+            candidates += [s for s in self._shells_by_data.get(key, [])
+                           if s.level != shell.level]
+        else:
+            for level, shells in self._no_inter_shells.items():
+                if level != shell.level:
+                    candidates += shells
+
+        found_shell = None
+        for added_shell in candidates:
             # For each group of similar shells, it will exist only
             # one valid shell.
             if added_shell.is_valid():
+                if (found_shell is not None
+                        and (self._positions[found_shell]
+                             < self._positions[added_shell])):
+                    continue
                 if shell.is_similar(added_shell):
-                    return added_shell
-        return None
+                    found_shell = added_shell
+        return found_shell
 
     def add_shell(self, shell):
         """Add a new shell to ``shells``.
@@ -169,6 +195,7 @@ class ShellManager:
         self.shells.append(shell)
         self.levels[shell.level].append(shell)
         self.centers[shell.central_atm_grp][shell.level] = shell
+        self._index_shell(shell)
 
     def get_valid_shells(self):
         """Return only valid shells.
@@ -528,6 +555,29 @@ unique_shells=True))
         self.levels = levels
         self.centers = centers
 
+        # Indexes used to find similar shells.
+        self._positions = {}
+        self._shells_by_id = defaultdict(list)
+        self._shells_by_data = defaultdict(list)
+        self._no_inter_shells = defaultdict(list)
+        for shell in self.shells:
+            self._index_shell(shell)
+
+    def _index_shell(self, shell):
+        self._positions[shell] = len(self._positions)
+
+        # Invalid shells are never returned as similar shells. As shells do
+        # not become valid again, they can be left out of the indexes.
+        if not shell.is_valid():
+            return
+
+        self._shells_by_id[(shell.level, shell.identifier)].append(shell)
+        if shell.interactions:
+            key = tuple(shell.encoded_data)
+            self._shells_by_data[key].append(shell)
+        else:
+            self._no_inter_shells[shell.level].append(shell)
+
 
 class Shell:
 
@@ -65,9 +65,17 @@ class InteractionType:
         Indicate if the interaction has a direction as in hydrogen bonds and
         multipolar interactions.
     params : dict, optional
-        Interaction parameters (distances, angles, etc).
+        Interaction parameters (distances, angles, etc). Each parameter can
+        also be accessed as an attribute.
     """
 
+    __slots__ = ("_src_grp", "_trgt_grp", "_src_interacting_atms",
+                 "_trgt_interacting_atms", "_src_centroid", "_trgt_centroid",
+                 "_type", "directional", "_params", "_hash_cache")
+
+    # Attributes saved when pickling. The others are recomputed when needed.
+    _pickled_attrs = __slots__[:-1]
+
     def __init__(self,
                  src_grp,
                  trgt_grp,
@@ -99,7 +107,6 @@ class InteractionType:
         self._hash_cache = None
 
         self._apply_refs()
-        self._expand_dict()
 
     @property
     def src_grp(self):
@@ -369,10 +376,6 @@ class InteractionType:
         self.src_grp.remove_interactions([self])
         self.trgt_grp.remove_interactions([self])
 
-    def _expand_dict(self):
-        for key in self._params:
-            self.__dict__[key] = self._params[key]
-
     def as_json(self):
         """Represent this interaction as a dict containing the interaction
         type, flags indicating if its directional or not and if it is an
@@ -433,6 +436,31 @@ class InteractionType:
 
         return inter_obj
 
+    def __getattr__(self, attr):
+        # Slots are still empty while an interaction is unpickled.
+        if attr in InteractionType.__slots__:
+            raise AttributeError(attr)
+
+        if attr in self._params:
+            return self._params[attr]
+        else:
+            raise AttributeError("The attribute '%s' does not exist in the "
+                                 "class %s." % (attr, self.__class__.__name__))
+
+    def __getstate__(self):
+        return tuple(getattr(self, attr) for attr in self._pickled_attrs)
+
+    def __setstate__(self, state):
+        # Objects pickled by older versions store their attributes, including
+        # the interaction parameters, in a dict.
+        if isinstance(state, dict):
+            state = tuple(state.get(attr) for attr in self._pickled_attrs)
+
+        for attr, value in zip(self._pickled_attrs, state):
+            setattr(self, attr, value)
+
+        self._hash_cache = None
+
     def __eq__(self, other):
         """Overrides the default implementation"""
         if isinstance(self, other.__class__):
@@ -34,6 +34,9 @@ class AtomData:
         The atom serial number.
     """
 
+    __slots__ = ("atomic_num", "_coord", "bond_type", "full_id",
+                 "serial_number")
+
     def __init__(self,
                  atomic_num,
                  coord,
@@ -74,6 +77,17 @@ class AtomData:
         # consistence.
         self._coord = np.array(xyz, "f")
 
+    def __getstate__(self):
+        return tuple(getattr(self, attr) for attr in AtomData.__slots__)
+
+    def __setstate__(self, state):
+        # Objects pickled by older versions store their attributes in a dict.
+        if isinstance(state, dict):
+            state = tuple(state.get(attr) for attr in AtomData.__slots__)
+
+        for attr, value in zip(AtomData.__slots__, state):
+            setattr(self, attr, value)
+
     def __repr__(self):
         full_atom_name = ""
         if self.full_id is not None:
@@ -126,13 +140,24 @@ class ExtendedAtom:
         A sequence of atom groups that contain ``atom``.
     invariants : list or tuple, optional
         Atomic invariants.
+
+    Notes
+    -----
+    Atoms are compared, hashed, and sorted by keys computed the first time
+    they are needed. Therefore, the ids of the atom and its parents should
+    not change after the atom is used as a dict key, in sets, or sorted.
     """
 
+    __slots__ = ("_atom", "_nb_info", "_atm_grps", "_invariants",
+                 "_identity", "_sort_key")
+
     def __init__(self, atom, nb_info=None, atm_grps=None, invariants=None):
         self._atom = atom
         self._nb_info = nb_info or []
         self._atm_grps = atm_grps or []
         self._invariants = invariants
+        self._identity = None
+        self._sort_key = None
 
     @property
     def atom(self):
@@ -195,6 +220,22 @@ class ExtendedAtom:
                 structure id, model id, chain id, residue name, residue id,
                 atom name, and alternate location if available.
                 Fields are slash-separated."""
+        if self._identity is None:
+            self._identity = self._get_full_atom_name()
+        return self._identity
+
+    @property
+    def sort_key(self):
+        """tuple, read-only: The key used to sort atoms. It is the atom's full
+        id with the residue id substituted for the residue index, so that
+        sorted atoms keep the same order as in the PDB."""
+        if self._sort_key is None:
+            full_id = self.get_full_id()
+            self._sort_key = (full_id[0:2] + (self._atom.parent.idx, )
+                              + full_id[4:])
+        return self._sort_key
+
+    def _get_full_atom_name(self):
         full_atom_name = "%s/%s/%s" % self.get_full_id()[0:3]
         res_name = "%s/%d%s" % (self._atom.parent.resname,
                                 self._atom.parent.id[1],
@@ -258,6 +299,10 @@ class ExtendedAtom:
                 "name": full_id[4]}
 
     def __getattr__(self, attr):
+        # Slots are still empty while an atom is unpickled.
+        if attr in ExtendedAtom.__slots__:
+            raise AttributeError(attr)
+
         if hasattr(self._atom, attr):
             return getattr(self._atom, attr)
         else:
@@ -265,10 +310,18 @@ class ExtendedAtom:
                                  "class %s." % (attr, self.__class__.__name__))
 
     def __getstate__(self):
-        return self.__dict__
+        # Identity and sort keys are recomputed when needed.
+        return (self._atom, self._nb_info, self._atm_grps, self._invariants)
 
     def __setstate__(self, state):
-        self.__dict__.update(state)
+        # Atoms pickled by older versions store their attributes in a dict.
+        if isinstance(state, dict):
+            state = (state["_atom"], state["_nb_info"], state["_atm_grps"],
+                     state["_invariants"])
+
+        self._atom, self._nb_info, self._atm_grps, self._invariants = state
+        self._identity = None
+        self._sort_key = None
 
     def __repr__(self):
         return "<ExtendedAtom: %s>" % self.full_atom_name
@@ -288,12 +341,7 @@ class ExtendedAtom:
         return not self.__eq__(other)
 
     def __lt__(self, a2):
-        # It substitutes the residue id for its index in order to keep
-        # the same order as in the PDB.
-        full_id1 = self.full_id[0:2] + (self.parent.idx, ) + self.full_id[4:]
-        full_id2 = a2.full_id[0:2] + (a2.parent.idx, ) + a2.full_id[4:]
-
-        return full_id1 < full_id2
+        return self.sort_key < a2.sort_key
 
     def __hash__(self):
         """Overrides the default implementation"""
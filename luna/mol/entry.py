@@ -1,22 +1,27 @@
 import re
+import json
+import hashlib
 import logging
+from io import BytesIO, TextIOWrapper
 from operator import xor
-from os.path import exists
+from os import makedirs, replace, stat, getpid
+from os.path import exists, abspath, basename, dirname
 from collections import defaultdict
 import ast
 
 from rdkit.Chem import Mol as RDMol
 from openbabel import OBMol
-from openbabel.pybel import readfile
+from openbabel.pybel import readfile, readstring
 from openbabel.pybel import Molecule as PybelMol
 from openbabel.pybel import informats as OB_FORMATS
 
 from luna.wrappers.rdkit import (RDKIT_FORMATS, read_multimol_file,
-                                 read_mol_from_file)
+                                 read_multimol_string, read_mol_from_file)
 from luna.wrappers.base import MolWrapper
 from luna.util.default_values import (ACCEPTED_MOL_OBJ_TYPES, ENTRY_SEPARATOR,
                                       ARTIFACTS_LIST)
-from luna.util.file import get_file_format, get_filename
+from luna.util.file import (get_file_format, get_filename,
+                            detect_compression_format)
 from luna.util.exceptions import (InvalidEntry,
                                   IllegalArgumentError,
                                   MoleculeObjectError,
@@ -730,6 +735,255 @@ comp_num=300, is_hetatm=True)
             raise IllegalArgumentError(error_msg)
 
 
+class MolFileIndex:
+
+    """Index the molecules of a multi-molecular file by name, so that any of
+    them can be read without parsing the file from the start.
+
+    Indices are created for uncompressed MOL, SDF, and MOL2 files. An index
+    records the size and modification time of the indexed file and becomes
+    invalid as soon as the file changes.
+
+    Use :meth:`get_index` to recover an index shared by all entries in
+    the current process. If :attr:`index_path` is set, indices are also saved
+    there as JSON files, which allows different processes to share the same
+    index. Projects save indices at ``<working_path>/tmp/mol_index``.
+
+    Parameters
+    ----------
+    mol_file : str
+        Pathname of the molecular file.
+    mol_format : str, optional
+        The molecular file format. If not provided, try to recover the
+        format directly from ``mol_file``.
+
+    Attributes
+    ----------
+    mol_file : str
+    mol_format : str
+    size : int
+        The size of ``mol_file`` when it was indexed.
+    mtime : int
+        The modification time (ns) of ``mol_file`` when it was indexed.
+    offsets : dict of {str : tuple of (int, int)}
+        Map molecule names to the first and last byte of their blocks.
+        If a name appears more than once, only its first block is kept.
+    """
+
+    # Formats whose molecules can be indexed.
+    FORMATS = ("mol", "mdl", "sdf", "sd", "mol2")
+
+    # Directory where indices are saved. If None, indices are only shared
+    # by the current process.
+    index_path = None
+
+    # Indices loaded by the current process.
+    _indices = {}
+
+    def __init__(self, mol_file, mol_format=None):
+        self.mol_file = abspath(mol_file)
+        self.mol_format = mol_format or get_file_format(mol_file)
+
+        file_stat = stat(self.mol_file)
+        self.size = file_stat.st_size
+        self.mtime = file_stat.st_mtime_ns
+
+        self.offsets = {}
+        self._offsets_by_key = {}
+        self._build()
+
+    @classmethod
+    def is_indexable(cls, mol_file, mol_format):
+        """Check if molecules in ``mol_file`` can be indexed."""
+        return (mol_format in cls.FORMATS
+                and detect_compression_format(mol_file) is None)
+
+    @property
+    def is_valid(self):
+        """bool: If the indexed file has not changed since it was
+        indexed."""
+        try:
+            file_stat = stat(self.mol_file)
+        except OSError:
+            return False
+        return (file_stat.st_size == self.size
+                and file_stat.st_mtime_ns == self.mtime)
+
+    def _build(self):
+        if self.mol_format == "mol2":
+            self._build_mol2()
+        else:
+            self._build_mdl()
+
+    def _add_block(self, mol_id, start, end):
+        if mol_id is not None and mol_id not in self.offsets:
+            self.offsets[mol_id] = (start, end)
+
+    def _build_mol2(self):
+        mol_id, start = None, None
+        is_name_line = False
+        with open(self.mol_file, "rb") as IN:
+            pos = 0
+            for line in IN:
+                if line.startswith(b"@<TRIPOS>MOLECULE"):
+                    self._add_block(mol_id, start, pos)
+                    mol_id, start = None, pos
+                    is_name_line = True
+                elif is_name_line and not line.startswith(b"#"):
+                    # The molecule name is the line following the
+                    # MOLECULE record.
+                    mol_id = line.decode(errors="replace").strip()
+                    is_name_line = False
+                pos += len(line)
+            self._add_block(mol_id, start, pos)
+
+    def _build_mdl(self):
+        mol_id, start = None, 0
+        with open(self.mol_file, "rb") as IN:
+            pos = 0
+            for line in IN:
+                # The molecule name is the first line of a block (header
+                # block). Molecules without a name are not indexed.
+                if pos == start:
+                    mol_id = line.decode(errors="replace").strip() or None
+
+                pos += len(line)
+                if line.startswith(b"$$$$"):
+                    self._add_block(mol_id, start, pos)
+                    mol_id, start = None, pos
+            self._add_block(mol_id, start, pos)
+
+    def get_block(self, mol_id, key_func=None):
+        """Read the block of the molecule ``mol_id`` or return None if it
+        was not indexed.
+
+        Parameters
+        ----------
+        mol_id : str
+            The molecule name.
+        key_func : callable, optional
+            If provided, compare ``mol_id`` with ``key_func(name)`` instead
+            of the molecule names, and read the first matching block.
+        """
+        offsets = self.offsets
+        if key_func is not None:
+            if key_func not in self._offsets_by_key:
+                key_offsets = {}
+                # Names are kept in the same order as in the file.
+                for name, block_offsets in self.offsets.items():
+                    key_offsets.setdefault(key_func(name), block_offsets)
+                self._offsets_by_key[key_func] = key_offsets
+            offsets = self._offsets_by_key[key_func]
+
+        if mol_id not in offsets:
+            return None
+
+        start, end = offsets[mol_id]
+        with open(self.mol_file, "rb") as IN:
+            IN.seek(start)
+            data = IN.read(end - start)
+
+        # Universal newlines, as when reading the file in text mode.
+        return TextIOWrapper(BytesIO(data)).read()
+
+    @classmethod
+    def get_index_file(cls, mol_file, index_path=None):
+        """Get the pathname of the index file of ``mol_file`` at
+        ``index_path`` (:attr:`index_path` by default) or None if no
+        directory was set."""
+        index_path = index_path or cls.index_path
+        if index_path is None:
+            return None
+
+        # Files with the same name in different directories have
+        # different indices.
+        path = abspath(mol_file)
+        path_hash = hashlib.md5(path.encode()).hexdigest()
+        return "%s/%s.%s.json" % (index_path, basename(path), path_hash)
+
+    def save(self, index_file):
+        """Save the index as a JSON file at ``index_file``."""
+        data = {"mol_file": self.mol_file,
+                "mol_format": self.mol_format,
+                "size": self.size,
+                "mtime": self.mtime,
+                # A list keeps the order of the molecules in the file.
+                "offsets": [[name, start, end] for name, (start, end)
+                            in self.offsets.items()]}
+
+        # Write to a temporary file first, so that other processes
+        # never read an incomplete index.
+        tmp_file = "%s.%d" % (index_file, getpid())
+        with open(tmp_file, "w") as OUT:
+            json.dump(data, OUT)
+        replace(tmp_file, index_file)
+
+    @classmethod
+    def load(cls, index_file):
+        """Load an index from the JSON file ``index_file``."""
+        with open(index_file) as IN:
+            data = json.load(IN)
+
+        index = cls.__new__(cls)
+        index.mol_file = str(data["mol_file"])
+        index.mol_format = str(data["mol_format"])
+        index.size = int(data["size"])
+        index.mtime = int(data["mtime"])
+        index.offsets = {str(name): (int(start), int(end))
+                         for name, start, end in data["offsets"]}
+        index._offsets_by_key = {}
+        return index
+
+    @classmethod
+    def get_index(cls, mol_file, mol_format=None):
+        """Get a valid index for ``mol_file``.
+
+        The index is recovered from the current process or from the index
+        file saved at :attr:`index_path`. If none of them is valid, a new
+        index is created and saved at :attr:`index_path`, if it was set.
+
+        Returns
+        -------
+         : `MolFileIndex` or None
+            The index or None if molecules in ``mol_file`` cannot be indexed.
+        """
+        mol_format = mol_format or get_file_format(mol_file)
+        if not cls.is_indexable(mol_file, mol_format):
+            return None
+
+        path = abspath(mol_file)
+        index = cls._indices.get(path)
+        if index is not None and index.is_valid:
+            return index
+
+        index_file = cls.get_index_file(mol_file)
+
+        index = None
+        if index_file is not None and exists(index_file):
+            try:
+                index = cls.load(index_file)
+            except Exception:
+                logger.debug("The index file '%s' could not be loaded."
+                             % index_file)
+
+        if (index is None or index.mol_file != path
+                or index.mol_format != mol_format or not index.is_valid):
+            logger.debug("It will index the molecules of the file '%s'."
+                         % mol_file)
+            index = cls(mol_file, mol_format)
+
+            if index_file is not None:
+                try:
+                    makedirs(dirname(index_file), exist_ok=True)
+                    index.save(index_file)
+                except Exception:
+                    logger.debug("The index of the file '%s' could not be "
+                                 "saved." % mol_file)
+
+        cls._indices[path] = index
+        return index
+
+
 class MolFileEntry(Entry):
 
     """Define a ligand from a molecular file.
@@ -1107,7 +1361,20 @@ not found in the
                                     % self.mol_file)
 
         try:
-            if self.mol_obj_type == "openbabel":
+            # Multimol files are indexed, so that the target molecule can be
+            # read directly from its block.
+            is_indexed = False
+            if self.is_multimol_file:
+                mol_index = MolFileIndex.get_index(self.mol_file,
+                                                   self.mol_file_ext)
+                if mol_index is not None:
+                    is_indexed = self._load_mol_from_index(mol_index)
+
+            # Molecules not found in the index are searched by parsing the
+            # file sequentially.
+            if is_indexed:
+                pass
+            elif self.mol_obj_type == "openbabel":
                 mols = readfile(self.mol_file_ext, self.mol_file)
                 # If it is a multimol file, then we need to loop over the
                 # molecules to find the target one. Note that in this case,
@@ -1164,6 +1431,34 @@ not found in the
 
         logger.debug("Molecule '%s' was successfully loaded." % self.mol_id)
 
+    def _load_mol_from_index(self, mol_index):
+        """Load the molecule from its block in ``mol_index`` and return
+        False if the molecule was not indexed."""
+        if self.mol_obj_type == "openbabel":
+            # Open Babel compares ids with titles without extensions.
+            block = mol_index.get_block(self.mol_id, key_func=get_filename)
+        else:
+            block = mol_index.get_block(self.mol_id)
+
+        if block is None:
+            logger.debug("The molecule '%s' was not found in the index of "
+                         "the file '%s'." % (self.mol_id, self.mol_file))
+            return False
+
+        if self.mol_obj_type == "openbabel":
+            self.mol_obj = readstring(self.mol_file_ext, block)
+        else:
+            for rdk_mol, mol_id \
+                in read_multimol_string(block,
+                                        mol_format=self.mol_file_ext,
+                                        targets=[self.mol_id],
+                                        removeHs=False):
+                # It returns None if the molecule parsing
+                # generated errors.
+                self.mol_obj = rdk_mol
+                break
+        return True
+
     def get_biopython_structure(self, entity=None, parser=None):
         """Transform the molecular object into a Biopython Entity object.
 
@@ -21,8 +21,28 @@ class ChemicalFeature():
     ----------
     name : str
         The chemical feature name.
+
+    Notes
+    -----
+    Chemical features are interned, i.e., features with the same name are
+    the same object. Therefore, they should not be modified.
     """
 
+    _features = {}
+
+    def __new__(cls, name=None):
+        # Features pickled by older versions are created without a name,
+        # which is set later when unpickling them.
+        if name is None:
+            return super().__new__(cls)
+
+        feature = cls._features.get(name)
+        if feature is None:
+            feature = super().__new__(cls)
+            feature.name = name
+            cls._features[name] = feature
+        return feature
+
     def __init__(self, name):
         self.name = name
 
@@ -40,6 +60,10 @@ class ChemicalFeature():
         return func(self.name)
 
     # Special methods
+    def __reduce__(self):
+        # Unpickled features are interned too.
+        return (self.__class__, (self.name, ))
+
     def __repr__(self):
         return "<Feature=%s>" % self.name
 
@@ -122,6 +146,28 @@ class FeatureExtractor:
     def __init__(self, feature_factory):
         self.feature_factory = feature_factory
 
+    @property
+    def feature_factory(self):
+        """MolChemicalFeatureFactory: An RDKit feature factory."""
+        return self._feature_factory
+
+    @feature_factory.setter
+    def feature_factory(self, feature_factory):
+        self._feature_factory = feature_factory
+        # Open Babel SMARTS patterns compiled from the feature definitions.
+        self._ob_smarts = None
+
+    def _get_ob_smarts(self):
+        # Feature definitions are compiled only once, when they are first
+        # needed, as a list of (feature family, SMARTS pattern).
+        if self._ob_smarts is None:
+            self._ob_smarts = []
+            for key, smarts in self.feature_factory.GetFeatureDefs().items():
+                ob_smart = OBSmartsPattern()
+                ob_smart.Init(str(smarts))
+                self._ob_smarts.append((key.split(".")[0], ob_smart))
+        return self._ob_smarts
+
     def get_features_by_atoms(self, mol_obj, atm_map=None):
         """Perceive chemical features from the molecule ``mol_obj`` by atom.
 
@@ -246,41 +292,40 @@ class FeatureExtractor:
 
     def _get_features_from_obmol(self, ob_mol):
         grp_features = defaultdict(set)
-        for key, smarts in self.feature_factory.GetFeatureDefs().items():
-            grp_type = key.split(".")[0]
+        # Map each atom to the groups of each type that contain it.
+        grps_by_atm = defaultdict(lambda: defaultdict(set))
 
-            ob_smart = OBSmartsPattern()
-            ob_smart.Init(str(smarts))
+        for grp_type, ob_smart in self._get_ob_smarts():
             ob_smart.Match(ob_mol)
 
-            matches = [x for x in ob_smart.GetMapList()]
-            if matches:
-                for match in matches:
-                    cur_ids = set(match)
-                    exists = False
-                    remove_ids = []
-
-                    for ids in grp_features[grp_type]:
-                        ids = set(ids)
-                        # If there is any other group of the same type that
-                        # already contains the current atoms.
-                        if cur_ids.issubset(ids):
-                            exists = True
-                            # It just need to find one bigger group.
-                            break
-                        # If the current group contains atoms from already
-                        # added group atoms.
-                        elif ids.issubset(cur_ids):
-                            exists = True
-                            # Find all smaller groups to remove them.
-                            remove_ids.append(tuple(ids))
-
-                    if exists is False:
-                        grp_features[grp_type].add(tuple(cur_ids))
-                    elif remove_ids:
-                        for ids in remove_ids:
-                            grp_features[grp_type].remove(ids)
-                        grp_features[grp_type].add(tuple(cur_ids))
+            for match in ob_smart.GetMapList():
+                cur_ids = set(match)
+                grps = grp_features[grp_type]
+                atm_grps = grps_by_atm[grp_type]
+
+                # If there is any other group of the same type that already
+                # contains the current atoms. Such a group must contain all
+                # the atoms, so it only needs to look at the groups of the
+                # atom belonging to the fewest groups.
+                candidates = min([atm_grps.get(i, ()) for i in cur_ids],
+                                 key=len)
+                if any(cur_ids.issubset(ids) for ids in candidates):
+                    continue
+
+                # Remove any smaller groups whose atoms are all contained
+                # by the current group.
+                remove_ids = set([ids for i in cur_ids
+                                  for ids in atm_grps.get(i, ())
+                                  if cur_ids.issuperset(ids)])
+                for ids in remove_ids:
+                    grps.remove(ids)
+                    for i in ids:
+                        atm_grps[i].discard(ids)
+
+                ids = tuple(cur_ids)
+                grps.add(ids)
+                for i in ids:
+                    atm_grps[i].add(ids)
 
         return [OBMolChemicalFeature(family, atom_ids)
                 for family in grp_features
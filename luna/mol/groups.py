@@ -4,20 +4,20 @@ from itertools import chain
 import numpy as np
 
 import networkx as nx
-from networkx.algorithms.shortest_paths.weighted import single_source_dijkstra
+from networkx import single_source_shortest_path_length
 
 from Bio.PDB.kdtrees import KDTree
 
 from luna.MyBio.selector import Selector, AtomSelector
 from luna.MyBio.util import biopython_entity_to_mol
 from luna.interaction.contact import get_proximal_compounds
-from luna.interaction.contact import get_contacts_with
+from luna.interaction.contact import get_contacts_with_many
 from luna.interaction.type import InteractionType
 from luna.mol.atom import ExtendedAtom, AtomData
 from luna.mol.precomp_data import DefaultResidueData
 from luna.mol.charge_model import OpenEyeModel
 from luna.mol.features import ChemicalFeature
-from luna.wrappers.base import MolWrapper
+from luna.wrappers.base import MolWrapper, cache_smarts_matches
 from luna.util.exceptions import MoleculeSizeError, IllegalArgumentError
 from luna.util.default_values import COV_SEARCH_RADIUS, METAL_COMPLEX_DIST
 from luna.util import math as im
@@ -32,6 +32,20 @@ SS_BOND_FEATURES = ["Atom", "Acceptor", "ChalcogenDonor", "Hydrophobic"]
 
 DEFAULT_RES_DATA = DefaultResidueData()
 
+# When 'expand_selection' is set ON, the compounds covalently bound to a
+# target compound (border compounds) are perceived together with it, and so
+# are the compounds bound to the border ones. Thus, the perceived molecule
+# contains compounds up to this number of covalent bonds away from a target.
+EXPANSION_DEPTH = 2
+
+# Bits of `AtomGroupDescriptor.classes`.
+RESIDUE_CLASS = 1
+NUCLEOTIDE_CLASS = 2
+HETATM_CLASS = 4
+WATER_CLASS = 8
+MIXED_CLASS = 16
+MULTI_COMPS_CLASS = 32
+
 
 class AtomGroupsManager():
     """Store and manage `AtomGroup` objects.
@@ -49,6 +63,8 @@ class AtomGroupsManager():
         The chain or molecule from where the atom groups were perceived.
     graph : :py:class:`networkx.Graph`
         Represent ``entry`` as a graph and its vicinity.
+        If the graph is modified in place, call
+        :py:meth:`reset_bond_distances` to clear cached path lengths.
     version : str
         The LUNA version when the object was created.
     """
@@ -66,6 +82,17 @@ class AtomGroupsManager():
 
         self.add_atm_grps(atm_grps)
 
+    @property
+    def graph(self):
+        """:py:class:`networkx.Graph`: Represent ``entry`` as a graph and its
+        vicinity."""
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+        self.reset_bond_distances()
+
     @property
     def atm_grps(self):
         """iterable of `AtomGroup`, read-only: The sequence of `AtomGroup`
@@ -368,13 +395,56 @@ class AtomGroupsManager():
             # it can occur.
             atm_grp.features = features
 
+    def calc_normals(self, atm_grps=None):
+        """Compute the normal vectors of the atom groups ``atm_grps`` at once
+        instead of lazily one by one (see :py:attr:`AtomGroup.normal`).
+
+        Parameters
+        ----------
+        atm_grps : iterable of `AtomGroup`, optional
+            The atom groups whose normals will be computed. If not provided,
+            compute the normals of all atom groups in ``atm_grps`` containing
+            at least three atoms, such as aromatic rings and amides.
+        """
+        if atm_grps is None:
+            atm_grps = [ag for ag in self.atm_grps if len(ag.atoms) >= 3]
+
+        atm_grps = [ag for ag in atm_grps if ag._normal is None]
+        normals = im.calc_normals([ag.coords for ag in atm_grps])
+        for atm_grp, normal in zip(atm_grps, normals):
+            atm_grp._normal = normal
+
+    def reset_bond_distances(self):
+        """Clear the bond distances cached by
+        :py:meth:`get_shortest_path_length`.
+
+        It must be called whenever ``graph`` is modified in place.
+        """
+        self._bond_dists = {}
+
+    def _get_bond_distances(self, atm, cutoff):
+        # Bond distances are computed only once for each atom and cutoff by
+        # a breadth-first search bounded by the cutoff. All edges have
+        # weight 1, so it is equivalent to Dijkstra's algorithm.
+        dists_by_atm = self._bond_dists.setdefault(cutoff, {})
+        if atm not in dists_by_atm:
+            if atm in self.graph:
+                dists_by_atm[atm] = \
+                    single_source_shortest_path_length(self.graph, atm,
+                                                       cutoff=cutoff)
+            else:
+                dists_by_atm[atm] = {}
+        return dists_by_atm[atm]
+
     def get_shortest_path_length(self, src_grp, trgt_grp, cutoff=None):
         """Compute the shortest path length between two atom groups ``src_grp``
         and ``trgt_grp``.
 
         The shortest path between two atom groups is defined as the shortest
-        path between any of their atoms, which are calculated using Dijkstra’s
-        algorithm and the graph ``graph``.
+        path between any of their atoms in the graph ``graph``. The bond
+        distances from each atom are calculated by a breadth-first search
+        bounded by ``cutoff`` and cached, so repeated queries are simple
+        lookups.
 
         If there is not any path between ``src_grp`` and ``trgt_grp``,
         infinite is returned.
@@ -394,16 +464,11 @@ class AtomGroupsManager():
         """
         shortest_path_size = float('inf')
         for src_atm in src_grp.atoms:
+            dists = self._get_bond_distances(src_atm, cutoff)
             for trgt_atm in trgt_grp.atoms:
-                try:
-                    dist, path = single_source_dijkstra(self.graph,
-                                                        src_atm,
-                                                        trgt_atm,
-                                                        cutoff=cutoff)
-                    if dist < shortest_path_size:
-                        shortest_path_size = dist
-                except Exception:
-                    pass
+                dist = dists.get(trgt_atm, shortest_path_size)
+                if dist < shortest_path_size:
+                    shortest_path_size = dist
         return shortest_path_size
 
     def save(self, output_file, compressed=True):
@@ -443,6 +508,19 @@ class AtomGroupsManager():
         """
         return unpickle_data(input_file)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Cached bond distances are not saved.
+        state["_bond_dists"] = {}
+        return state
+
+    def __setstate__(self, state):
+        # Objects saved by older versions store the graph as 'graph'.
+        if "graph" in state:
+            state["_graph"] = state.pop("graph")
+        state["_bond_dists"] = {}
+        self.__dict__.update(state)
+
     def __len__(self):
         # Number of atom groups.
         return self.size
@@ -453,6 +531,57 @@ class AtomGroupsManager():
             yield atm_grp
 
 
+class AtomGroupDescriptor:
+    """A frozen description of the atoms, compounds, chains, and compound
+    classes of an `AtomGroup` object, which allows to compare atom groups
+    without iterating over their atoms.
+
+    Parameters
+    ----------
+    atm_grp : `AtomGroup`
+
+    Attributes
+    ----------
+    atoms : frozenset of :class:`~luna.mol.atom.ExtendedAtom`
+        The atoms in the atom group.
+    compounds : frozenset of :class:`~luna.MyBio.PDB.Residue.Residue`
+        The unique compounds that contain the atoms.
+    chains : tuple of str
+        The sorted unique chains that contain the atoms.
+    classes : int
+        A bitmask combining the following flags:
+
+            * ``RESIDUE_CLASS``: all atoms belong to standard residues;
+            * ``NUCLEOTIDE_CLASS``: all atoms belong to nucleotides;
+            * ``HETATM_CLASS``: all atoms belong to hetero groups;
+            * ``WATER_CLASS``: all atoms belong to water molecules;
+            * ``MIXED_CLASS``: atoms belong to different compound classes;
+            * ``MULTI_COMPS_CLASS``: atoms belong to multiple compounds.
+    """
+
+    __slots__ = ("atoms", "compounds", "chains", "classes")
+
+    def __init__(self, atm_grp):
+        self.atoms = frozenset(atm_grp.atoms)
+        self.compounds = frozenset([a.parent for a in atm_grp.atoms])
+        self.chains = tuple(atm_grp.get_chains())
+
+        classes = 0
+        if atm_grp.is_residue():
+            classes |= RESIDUE_CLASS
+        if atm_grp.is_nucleotide():
+            classes |= NUCLEOTIDE_CLASS
+        if atm_grp.is_hetatm():
+            classes |= HETATM_CLASS
+        if atm_grp.is_water():
+            classes |= WATER_CLASS
+        if atm_grp.is_mixed():
+            classes |= MIXED_CLASS
+        if len(self.compounds) > 1:
+            classes |= MULTI_COMPS_CLASS
+        self.classes = classes
+
+
 class AtomGroup():
     """ Represent single atoms, chemical functional groups, or simply an
     arrangement of atoms as in hydrophobes.
@@ -474,6 +603,14 @@ class AtomGroup():
         The `AtomGroupsManager` object that contains this `AtomGroup` object.
     """
 
+    __slots__ = ("_atoms", "_coords", "_centroid", "_normal", "_features",
+                 "_interactions", "_hash_cache", "_descriptor", "_manager",
+                 "_recursive")
+
+    # Attributes saved when pickling. The others are recomputed when needed.
+    _pickled_attrs = ("_atoms", "_centroid", "_normal", "_features",
+                      "_interactions", "_manager", "_recursive")
+
     def __init__(self,
                  atoms,
                  features=None,
@@ -484,7 +621,7 @@ class AtomGroup():
 
         # Atom properties
         self._coords = im.atom_coordinates(atoms)
-        self._centroid = im.centroid(self.coords)
+        self._centroid = im.centroid(self._coords)
         self._normal = None
 
         features = features or []
@@ -492,6 +629,7 @@ class AtomGroup():
 
         self._interactions = interactions or []
         self._hash_cache = None
+        self._descriptor = None
 
         self._manager = manager
 
@@ -517,10 +655,21 @@ class AtomGroup():
         """
         return set([a.parent for a in self._atoms])
 
+    @property
+    def descriptor(self):
+        """`AtomGroupDescriptor`, read-only: The atoms, compounds, chains, \
+        and compound classes of an atom group. It is computed only once."""
+        if self._descriptor is None:
+            self._descriptor = AtomGroupDescriptor(self)
+        return self._descriptor
+
     @property
     def coords(self):
         """ array-like of floats : Atomic coordinates (x, y, z) of each \
         atom in ``atoms``."""
+        # Coordinates are not pickled.
+        if self._coords is None:
+            self._coords = im.atom_coordinates(self._atoms)
         return self._coords
 
     @property
@@ -531,6 +680,8 @@ class AtomGroup():
         If ``atoms`` contains only one atom, then ``centroid`` returns the same
         as ``coords``.
         """
+        if self._centroid is None:
+            self._centroid = im.centroid(self.coords)
         return self._centroid
 
     @property
@@ -629,7 +780,7 @@ class AtomGroup():
          : bool
             If one atom group contains another atom group.
         """
-        return set(atm_grp.atoms).issubset(set(self.atoms))
+        return atm_grp.descriptor.atoms.issubset(self.descriptor.atoms)
 
     def get_serial_numbers(self):
         """Get the serial number of each atom in an atom group."""
@@ -660,8 +811,8 @@ class AtomGroup():
         atom group ``trgt_grp``.
 
         The shortest path between two atom groups is defined as the shortest
-        path between any of their atoms, which are calculated using
-        Dijkstra’s algorithm.
+        path between any of their atoms, which are looked up in the bond
+        distances cached by ``manager``.
 
         If ``manager`` is not provided, None is returned.
 
@@ -807,6 +958,21 @@ class AtomGroup():
             for atm in self.atoms:
                 atm.remove_atm_grps([self])
 
+    def __getstate__(self):
+        return tuple(getattr(self, attr) for attr in self._pickled_attrs)
+
+    def __setstate__(self, state):
+        # Objects pickled by older versions store their attributes in a dict.
+        if isinstance(state, dict):
+            state = tuple(state.get(attr) for attr in self._pickled_attrs)
+
+        for attr, value in zip(self._pickled_attrs, state):
+            setattr(self, attr, value)
+
+        self._coords = None
+        self._hash_cache = None
+        self._descriptor = None
+
     def __repr__(self):
         return '<AtomGroup: [%s]>' % ', '.join([str(x) for x in self.atoms])
 
@@ -863,6 +1029,10 @@ class PseudoAtomGroup(AtomGroup):
         A sequence of interactions established by an atom group.
     """
 
+    __slots__ = ("parent_grp", )
+
+    _pickled_attrs = AtomGroup._pickled_attrs + ("parent_grp", )
+
     def __init__(self, parent_grp, atoms, features=None, interactions=None):
         self.parent_grp = parent_grp
 
@@ -1052,8 +1222,16 @@ class AtomGroupPerceiver():
 
         # Apply cache.
         if self.cache and cached_compounds:
-            print("\n\nSetting cache...\n\n")
-            self._apply_cache(cached_compounds, comp.get_parent_by_level("M"))
+            # Cached compounds perceived above only as border compounds may
+            # lack part of their own border, so their atom groups are always
+            # recovered from the cache instead.
+            remove_atm_grps = [atm_grp for atm_grp in self.atm_grps_mngr
+                               if not any([c in compounds
+                                           for c in atm_grp.compounds])]
+            self.atm_grps_mngr.remove_atm_grps(remove_atm_grps)
+
+            model = next(iter(cached_compounds)).get_parent_by_level("M")
+            self._apply_cache(cached_compounds, model)
 
         # Remove atom groups not comprising the provided
         # compound list (parameter 'compounds').
@@ -1073,9 +1251,11 @@ class AtomGroupPerceiver():
         custom_dict = lambda: {"atm_idx": None, "metals": set()}
         metals_coord = defaultdict(lambda: defaultdict(custom_dict))
 
-        for metal in metals:
-            # Identifies potential dative bonds with metals.
-            atm_pairs = get_contacts_with(metal, radius=METAL_COMPLEX_DIST)
+        # Identifies potential dative bonds with metals.
+        metals = list(metals)
+        all_atm_pairs = get_contacts_with_many(metals,
+                                               radius=METAL_COMPLEX_DIST)
+        for metal, atm_pairs in zip(metals, all_atm_pairs):
             for atm1, atm2 in atm_pairs:
                 if atm1.parent.is_metal() and not atm2.parent.is_metal():
                     other_atm = atm2
@@ -1176,7 +1356,10 @@ class AtomGroupPerceiver():
 
                 self.atm_grps_mngr.new_atm_grp(atoms, grp_obj["features"])
 
-            self._fix_pharmacophoric_rules(ob_atms_map)
+            # Only atom groups are modified when fixing pharmacophoric rules,
+            # so SMARTS matches can be cached.
+            with cache_smarts_matches():
+                self._fix_pharmacophoric_rules(ob_atms_map)
 
             # Update the graph in the AtomGroupsManager object
             # with the current network.
@@ -1185,6 +1368,7 @@ class AtomGroupPerceiver():
                     if nb_info.full_id in trgt_atms:
                         pair = atm, trgt_atms[nb_info.full_id]
                         self.atm_grps_mngr.graph.add_edge(*pair, weight=1)
+            self.atm_grps_mngr.reset_bond_distances()
 
         except Exception:
             logger.debug("Features were not correctly perceived.")
@@ -1347,26 +1531,25 @@ class AtomGroupPerceiver():
 
             return ext_atm
 
-        comp_names = set([c.full_name for c in compounds])
-
-        for atm_grp in sorted(self.cache.atm_grps_mngr):
-            if any([c.full_name in comp_names for c in atm_grp.compounds]):
-                atoms = []
-                for atm in atm_grp.atoms:
-                    # Copy extended atom, i.e., create a new extended
-                    # atom or recover an existing one and set invariants
-                    # and neighbors' information when necessary.
-                    ext_atm = copy_atom(atm, force_update=True)
-                    atoms.append(ext_atm)
+        # Only the atom groups and edges involving ``compounds`` are copied.
+        for atm_grp in self.cache.get_atm_grps(compounds):
+            atoms = []
+            for atm in atm_grp.atoms:
+                # Copy extended atom, i.e., create a new extended
+                # atom or recover an existing one and set invariants
+                # and neighbors' information when necessary.
+                ext_atm = copy_atom(atm, force_update=True)
+                atoms.append(ext_atm)
 
-                # Current features.
-                features = atm_grp.features
+            # Current features.
+            features = atm_grp.features
 
-                # Create the new atom group.
-                atm_grp = self.atm_grps_mngr.new_atm_grp(atoms)
-                atm_grp.features = features
+            # Create the new atom group.
+            atm_grp = self.atm_grps_mngr.new_atm_grp(atoms)
+            atm_grp.features = features
 
-        for edge in sorted(self.cache.atm_grps_mngr.graph.edges):
+        max_depth = EXPANSION_DEPTH if self.expand_selection else 0
+        for edge in self.cache.get_edges(compounds, max_depth):
             # Skip already existing edges.
             if edge in self.atm_grps_mngr.graph.edges:
                 continue
@@ -1382,6 +1565,7 @@ class AtomGroupPerceiver():
 
             # Update the AtomGroupsManager object with a new edge.
             self.atm_grps_mngr.graph.add_edge(atoms[0], atoms[1], weight=1)
+        self.atm_grps_mngr.reset_bond_distances()
 
     def _new_extended_atom(self, atm, invariants=None):
         if atm not in self.atm_mapping:
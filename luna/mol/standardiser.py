@@ -4,7 +4,8 @@ from collections import defaultdict, Counter
 
 from Bio.PDB.Polypeptide import is_aa
 from luna.mol.precomp_data import DefaultResidueData
-from luna.wrappers.base import MolWrapper, BondType, OBBondType
+from luna.wrappers.base import (MolWrapper, BondType, OBBondType,
+                                cache_smarts_matches)
 from luna.MyBio.neighbors import get_residue_neighbors
 
 from openbabel.openbabel import OBSmartsPattern
@@ -1363,7 +1364,10 @@ class Standardizer:
             if pdb_atm in coords:
                 coords[pdb_atm]["atm_idx"] = atm_obj.get_idx()
 
-        for res in self._comps:
-            self._check_mol(res)
+        # Molecules are only modified after all compounds are checked.
+        # Therefore, SMARTS matches can be cached while checking them.
+        with cache_smarts_matches():
+            for res in self._comps:
+                self._check_mol(res)
 
         self._apply_modifications()
@@ -1,12 +1,18 @@
-from os.path import exists, abspath, dirname
+from os.path import exists, abspath, dirname, splitext
+from collections import defaultdict, Counter, OrderedDict
+import os
 import time
+import hashlib
+import json
 import logging
 import glob
 import warnings
-import itertools
+import pickle
+import zipfile
+import numpy as np
 import networkx as nx
 import multiprocessing as mp
-from scipy.special import comb
+from contextlib import contextmanager
 
 # Open Babel and RDKit libraries
 from rdkit.Chem import ChemicalFeatures
@@ -16,11 +22,14 @@ from rdkit.Chem import MolFromSmiles
 from luna.config.params import ProjectParams
 from luna.mol.features import FeatureExtractor
 from luna.mol.fingerprint import generate_fp_for_mols
-from luna.mol.entry import Entry, MolFileEntry
-from luna.mol.groups import AtomGroupPerceiver
+from luna.mol.entry import Entry, MolFileEntry, MolFileIndex
+from luna.mol.atom import ExtendedAtom
+from luna.mol.groups import AtomGroupPerceiver, AtomGroupsManager
 from luna.interaction.contact import get_contacts_with
 from luna.interaction.calc import InteractionCalculator
 from luna.interaction.fp.shell import ShellGenerator
+from luna.interaction.fp.matrix import FingerprintMatrix, FingerprintWriter
+from luna.interaction.fp.search import FingerprintIndex
 from luna.interaction.fp.type import IFPType
 from luna.wrappers.base import MolWrapper
 from luna.util import deprecated, LUNAWarning
@@ -31,10 +40,12 @@ from luna.util.logging import (new_logging_file, load_default_logging_config,
                                VERBOSITY_LEVEL)
 from luna.util.multiprocessing_logging import (start_mp_handler,
                                                MultiProcessingHandler)
-from luna.util.jobs import ArgsGenerator, ParallelJobs
+from luna.util.jobs import ParallelJobs
+from luna.util.store import ColumnarStore
 
 from luna.MyBio.PDB.PDBParser import PDBParser
 from luna.MyBio.PDB.FTMapParser import FTMapParser
+from luna.MyBio.PDB.parse_pdb_header import parse_pdb_header
 from luna.MyBio.util import download_pdb, save_to_file, get_entity_from_entry
 from luna.version import __version__, has_version_compatibility
 
@@ -47,19 +58,141 @@ logger = load_default_logging_config()
 
 MAX_NPROCS = mp.cpu_count() - 1
 
+# Maximum number of parsed PDB structures kept in memory by each process.
+STRUCTURE_CACHE_SIZE = 8
+
+# The project object used by the tasks of a worker process. It is set up only
+# once per process by `_init_worker`.
+_worker_proj = None
+
+
+def _init_worker(proj_obj):
+    """Initialize a worker process with the project ``proj_obj``."""
+    global _worker_proj
+
+    proj_obj._setup_worker()
+    _worker_proj = proj_obj
+
+
+def _exec_worker_task(func_name, *entry_ids):
+    """Execute the project method ``func_name`` for the entries identified by
+    ``entry_ids`` in a worker process."""
+    entries = [_worker_proj._entries_map[entry_id] for entry_id in entry_ids]
+    return getattr(_worker_proj, func_name)(*entries)
+
 
 class StructureCache:
 
-    def __init__(self, compounds, atm_grps_mngr):
+    """Store the atom groups perceived for a receptor so that they can be
+    reused by all ligands bound to it.
+
+    Parameters
+    ----------
+    compounds : iterable of :class:`~luna.MyBio.PDB.Residue.Residue`
+        The cached compounds.
+    atm_grps_mngr : :class:`~luna.mol.groups.AtomGroupsManager`
+        The atom groups and the molecular graph perceived for ``compounds``.
+    key : str, optional
+        A key identifying the receptor file and the parameters used to
+        perceive ``atm_grps_mngr``.
+
+    Attributes
+    ----------
+    compounds : iterable of :class:`~luna.MyBio.PDB.Residue.Residue`
+    atm_grps_mngr : :class:`~luna.mol.groups.AtomGroupsManager`
+    key : str
+    """
+
+    def __init__(self, compounds, atm_grps_mngr, key=None):
         self.compounds = compounds
         self.atm_grps_mngr = atm_grps_mngr
+        self.key = key
 
         self._compounds_name = set([c.full_name
                                     for c in self.compounds])
+        self._index()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The indices are rebuilt when the object is unpickled.
+        state.pop("_atm_grps_by_comp", None)
+        state.pop("_edges_by_comp", None)
+        state.pop("_comp_nbs", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault("key", None)
+        self._index()
+
+    def _index(self):
+        # Map compound names to the atom groups and edges involving them.
+        self._atm_grps_by_comp = defaultdict(list)
+        for atm_grp in self.atm_grps_mngr:
+            for comp_name in set([c.full_name for c in atm_grp.compounds]):
+                self._atm_grps_by_comp[comp_name].append(atm_grp)
+
+        self._edges_by_comp = defaultdict(list)
+        # Compounds covalently bound to each other.
+        self._comp_nbs = defaultdict(set)
+        for edge in self.atm_grps_mngr.graph.edges:
+            comp_names = set([atm.parent.full_name for atm in edge])
+            for comp_name in comp_names:
+                self._edges_by_comp[comp_name].append(edge)
+                self._comp_nbs[comp_name].update(comp_names - {comp_name})
 
     def is_compound_cached(self, comp):
         return comp.full_name in self._compounds_name
 
+    def get_atm_grps(self, compounds):
+        """Get the cached atom groups containing any of the compounds in
+        ``compounds``.
+
+        Returns
+        -------
+         : list of :class:`~luna.mol.groups.AtomGroup`
+            The atom groups sorted in ascending order.
+        """
+        atm_grps = set()
+        for comp in compounds:
+            atm_grps.update(self._atm_grps_by_comp.get(comp.full_name, []))
+        return sorted(atm_grps)
+
+    def get_edges(self, compounds, max_depth=0):
+        """Get the cached edges (bonds) between atoms of the compounds in
+        ``compounds`` and of the compounds covalently bound to them.
+
+        Parameters
+        ----------
+        compounds : iterable of :class:`~luna.MyBio.PDB.Residue.Residue`
+        max_depth : int
+            How many covalent bonds away from ``compounds`` a compound can be
+            to have its edges selected. The default value is 0, which selects
+            only the edges between atoms of ``compounds``.
+
+        Returns
+        -------
+         : list of tuple of :class:`~luna.mol.atom.ExtendedAtom`
+            The edges sorted in ascending order.
+        """
+        comp_names = set([c.full_name for c in compounds])
+
+        # Expand the selection as the perception would do.
+        border_names = set(comp_names)
+        for i in range(max_depth):
+            border_names = set([nb_name
+                                for comp_name in border_names
+                                for nb_name in self._comp_nbs[comp_name]])
+            border_names -= comp_names
+            comp_names |= border_names
+
+        edges = set()
+        for comp_name in comp_names:
+            for edge in self._edges_by_comp.get(comp_name, []):
+                if all([atm.parent.full_name in comp_names for atm in edge]):
+                    edges.add(edge)
+        return sorted(edges)
+
 
 class EntryResults:
 
@@ -92,8 +225,28 @@ class EntryResults:
             :class:`~rdkit.DataStructs.cDataStructs.SparseBitVect`
     version : str
         The LUNA's version with which results were generated.
+
+    Notes
+    -----
+    Results are saved as a ZIP archive in which each section (entry
+    metadata, atom groups and interactions, IFP, and MFP) is pickled
+    separately. When loaded from such a file, sections are only unpickled on
+    first access. Atom groups and interactions reference each other, so they
+    are always saved and loaded together. The entry is only saved in the
+    metadata section and is shared again by the managers when they are
+    loaded.
+
+    Since these files are not gzip-compressed pickle files anymore, they
+    cannot be read by :func:`~luna.util.file.unpickle_data`. Use
+    :meth:`load` instead, which also reads files saved by older versions.
     """
 
+    # Map each section of a results file to the attributes saved in it.
+    _sections = {"metadata": ("entry", "version"),
+                 "managers": ("atm_grps_mngr", "interactions_mngr"),
+                 "ifp": ("ifp",),
+                 "mfp": ("mfp",)}
+
     def __init__(self,
                  entry,
                  atm_grps_mngr,
@@ -108,37 +261,141 @@ class EntryResults:
         self.mfp = mfp
         self.version = __version__
 
+    def __getattr__(self, name):
+        # Only called for attributes not set yet, i.e., attributes from
+        # sections that have not been loaded.
+        input_file = self.__dict__.get("_results_file")
+        if input_file is not None:
+            for section, attrs in self._sections.items():
+                if name in attrs:
+                    self._load_section(section)
+                    return self.__dict__[name]
+
+        raise AttributeError("'%s' object has no attribute '%s'"
+                             % (self.__class__.__name__, name))
+
+    def __getstate__(self):
+        # Make the pickled object independent of the results file.
+        for section in self._sections:
+            self._load_section(section)
+        state = self.__dict__.copy()
+        state.pop("_results_file", None)
+        return state
+
+    def _is_section_loaded(self, section):
+        return all(attr in self.__dict__ for attr in self._sections[section])
+
+    def _read_section(self, section):
+        input_file = self.__dict__["_results_file"]
+        try:
+            with zipfile.ZipFile(input_file) as zf:
+                return zf.read("%s.pkl" % section)
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            raise PKLNotReadError("Section '%s' could not be loaded from "
+                                  "file '%s'." % (section, input_file)) from e
+
+    def _load_section(self, section):
+        if self._is_section_loaded(section):
+            return
+
+        values = pickle.loads(self._read_section(section))
+        for attr, value in zip(self._sections[section], values):
+            self.__dict__.setdefault(attr, value)
+
+        # Managers share the entry saved in the metadata section.
+        if section == "managers":
+            for attr in self._sections[section]:
+                mngr = self.__dict__[attr]
+                if hasattr(mngr, "entry"):
+                    mngr.entry = self.entry
+
+    def _dump_section(self, section):
+        values = tuple(self.__dict__[attr] for attr in self._sections[section])
+        if section != "managers":
+            return pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+
+        # The entry is already saved in the metadata section.
+        mngrs = [mngr for mngr in values if hasattr(mngr, "entry")]
+        entries = [mngr.entry for mngr in mngrs]
+        try:
+            for mngr in mngrs:
+                mngr.entry = None
+            return pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+        finally:
+            for mngr, entry in zip(mngrs, entries):
+                mngr.entry = entry
+
     def save(self, output_file, compressed=True):
         """Write the pickled representation of this object to the file
         ``output_file``.
 
+        Sections that were not loaded from the original results file are
+        copied without being unpickled.
+
         Parameters
         ----------
         output_file : str
             The output file where the pickled representation will be saved.
         compressed : bool, optional
-            If True (the default), compress the pickled representation as a
-            gzip file (.gz).
+            If True (the default), compress each section.
 
         Raises
         -------
         FileNotCreated
             If the file could not be created.
         """
-        pickle_data(self, output_file, compressed)
+        sections = {}
+        for section in self._sections:
+            if self._is_section_loaded(section):
+                sections[section] = self._dump_section(section)
+            else:
+                sections[section] = self._read_section(section)
+
+        compression = zipfile.ZIP_STORED
+        if compressed:
+            compression = zipfile.ZIP_DEFLATED
+
+        # The results file may be overwritten by itself, so it is first saved
+        # to a temporary file.
+        tmp_file = "%s.%d.tmp" % (output_file, os.getpid())
+        try:
+            with zipfile.ZipFile(tmp_file, "w", compression) as zf:
+                for section, data in sections.items():
+                    zf.writestr("%s.pkl" % section, data)
+            os.replace(tmp_file, output_file)
+        except OSError as e:
+            raise FileNotCreated("File '%s' could not be created."
+                                 % output_file) from e
 
     @staticmethod
-    def load(input_file):
+    def load(input_file, lazy=True):
         """Read the pickled representation of an `EntryResults` object from
         the file ``input_file`` and return the reconstituted object hierarchy
-        specified therein. ``input_file`` can be a gzip-compressed file.
+        specified therein. ``input_file`` can also be a gzip-compressed file
+        containing the whole pickled object, as saved by older versions.
+
+        Parameters
+        ----------
+        input_file : str
+            The results file.
+        lazy : bool, optional
+            If True (the default), each section is only loaded when one of its
+            attributes is first accessed. Otherwise, load all sections.
 
         Raises
         -------
         PKLNotReadError
             If the file could not be loaded.
         """
-        return unpickle_data(input_file)
+        if not zipfile.is_zipfile(input_file):
+            return unpickle_data(input_file)
+
+        entry_results = EntryResults.__new__(EntryResults)
+        entry_results._results_file = input_file
+        if not lazy:
+            for section in EntryResults._sections:
+                entry_results._load_section(section)
+        return entry_results
 
 
 class Project:
@@ -211,7 +468,10 @@ class Project:
     mfp_output : str
         If ``calc_mfp`` is True, save ECFP4 fingerprints to file
         ``mfp_output``. If not provided, fingerprints are saved at
-        <``working_path``>/results/fingerprints/mfp.csv.
+        <``working_path``>/results/fingerprints/mfp.csv. Fingerprints are
+        also saved in a binary format to a file with the same name, but with
+        the extension .npz, which can be loaded with
+        :meth:`~luna.interaction.fp.matrix.FingerprintMatrix.load`.
     calc_ifp : bool
         If True (the default), generate LUNA interaction fingerprints (IFPs)
         for each entry in ``entries``.
@@ -243,7 +503,11 @@ class Project:
     ifp_output : str
         If ``calc_ifp`` is True, save LUNA interaction fingerprints (IFPs) to
         file ``ifp_output``. If not provided, fingerprints are saved at
-        <``working_path``>/results/fingerprints/ifp.csv.
+        <``working_path``>/results/fingerprints/ifp.csv. IFPs and the
+        parameters used to generate them are also saved in a binary format to
+        a file with the same name, but with the extension .npz, which can be
+        loaded with
+        :meth:`~luna.interaction.fp.matrix.FingerprintMatrix.load`.
     ifp_sim_matrix_output : str, optional
         If provided, compute Tanimoto similarity between interaction
         fingerprints (IFPs) and save the similarity matrix to
@@ -252,6 +516,13 @@ class Project:
         If True, depict interactions save them as Pymol sessions (PSE file).
         The default value is False. PSE files are saved at
         <``working_path``>/results/pse.
+    use_cache : bool
+        If True, perceive the atom groups of each receptor only once and
+        reuse them for all ligands bound to it. The default value is False.
+    columnar_store : bool
+        If True, also save interactions, atom groups, and fingerprints of all
+        entries to a columnar store at <``working_path``>/store, which can be
+        queried with :meth:`read_results`. The default value is False.
     append_mode : bool
         If True, skip entries from processing if a result for them already
         exists in ``working_path``. This can save processing time in case
@@ -298,6 +569,11 @@ class Project:
     ifp_output : str
     out_pse : bool
     out_ifp_sim_matrix : bool
+    use_cache : bool
+    cache : dict or None
+        Map receptor keys to :class:`StructureCache` objects when
+        ``use_cache`` is True.
+    columnar_store : bool
     append_mode : bool
     logging_file : str
         The file to where logging messages are saved.
@@ -340,6 +616,7 @@ class Project:
                  pse_path=None,
 
                  use_cache=False,
+                 columnar_store=False,
                  append_mode=False,
                  verbosity=3,
                  logging_enabled=True,
@@ -401,6 +678,7 @@ class Project:
 
         # General parameters.
         self.use_cache = use_cache
+        self.columnar_store = columnar_store
         self.append_mode = append_mode
         self.nproc = nproc
 
@@ -411,11 +689,36 @@ class Project:
 
         self._paths = ["chunks", "configs", "logs", "pdbs",
                        "results/interactions", "results/fingerprints",
-                       "results/pse", "results", "tmp"]
+                       "results/pse", "results", "store", "tmp"]
         self.errors = []
 
         self.cache = None
 
+        # Objects shared by the tasks executed by a worker process.
+        self._pool = None
+        self._entries_map = None
+        self._feature_extractor = None
+        self._receptor_keys = None
+        self._structure_cache = None
+        self._pdb_counts = None
+
+    # Attributes that are not saved with the project.
+    _transient_attrs = ["_pool", "_entries_map", "_feature_extractor",
+                        "_receptor_keys", "_structure_cache", "_pdb_counts"]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attr in self._transient_attrs:
+            state[attr] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Projects saved by older versions do not have these attributes.
+        for attr in self._transient_attrs:
+            self.__dict__.setdefault(attr, None)
+        self.__dict__.setdefault("columnar_store", False)
+
     def __call__(self):
         raise NotImplementedError("This class is not callable. Use a class "
                                   "that implements this method.")
@@ -426,6 +729,12 @@ class Project:
         saved."""
         return "%s/project_v%s.pkl.gz" % (self.working_path, __version__)
 
+    @property
+    def store(self):
+        """:class:`~luna.util.store.ColumnarStore`: The columnar store where \
+        results are saved if ``columnar_store`` is True."""
+        return ColumnarStore("%s/store" % self.working_path)
+
     @property
     def results(self):
         """iterable of `EntryResults`: LUNA results for each entry."""
@@ -575,15 +884,126 @@ class Project:
         -------
          : `EntryResults`
         """
-        if isinstance(entry, Entry):
-            entry = entry.to_string()
-
-        pkl_file = "%s/chunks/%s.pkl.gz" % (self.working_path, entry)
         try:
-            return EntryResults.load(pkl_file)
+            return EntryResults.load(self._get_results_file(entry))
         except Exception as e:
             self._log("exception", e)
 
+    def save_entry_results(self, entry_results):
+        """Save the results of an entry at the working path, where they can
+        be recovered by :meth:`get_entry_results`.
+
+        Parameters
+        ----------
+        entry_results : `EntryResults`
+        """
+        entry_id = entry_results.entry.to_string()
+
+        prev_file = self._get_results_file(entry_id)
+        results_file = self._get_results_file(entry_id, legacy=False)
+        entry_results.save(results_file)
+
+        # Results saved by older versions are replaced.
+        if prev_file != results_file:
+            os.remove(prev_file)
+
+    def _get_results_file(self, entry, legacy=True):
+        """Get the file where the results of ``entry`` are saved.
+
+        If ``legacy`` is True and there is only a results file saved by older
+        versions (gzip-compressed pickle file), return it instead.
+        """
+        if isinstance(entry, Entry):
+            entry = entry.to_string()
+
+        results_file = "%s/chunks/%s.zip" % (self.working_path, entry)
+        legacy_file = "%s/chunks/%s.pkl.gz" % (self.working_path, entry)
+        if legacy and not exists(results_file) and exists(legacy_file):
+            return legacy_file
+        return results_file
+
+    def read_results(self, table, columns=None, filters=None):
+        """Read results from the columnar store.
+
+        Only the requested columns are read, and parts of the store that
+        cannot satisfy ``filters`` are skipped, which makes it much faster
+        than loading the pickled results of each entry.
+
+        Parameters
+        ----------
+        table : {'interactions', 'atom_groups', 'ifps', 'mfps'}
+            The table to read. Tables have the following columns:
+
+                * ``interactions``: entry, atom_group1, atom_group2, \
+interaction;
+                * ``atom_groups``: entry, atom_group, features;
+                * ``ifps``: entry, bit, count;
+                * ``mfps``: entry, bit.
+        columns : iterable of str, optional
+            The columns to read. If not provided, read all columns.
+        filters : iterable of tuple, optional
+            Predicates (column, operator, value) that rows must satisfy.
+            Refer to :meth:`~luna.util.store.ColumnarStore.read`.
+
+        Returns
+        -------
+         : :class:`pandas.DataFrame`
+
+        Examples
+        --------
+        Read the hydrogen bonds of all entries.
+
+        >>> df = proj_obj.read_results("interactions", \
+filters=[("interaction", "==", "Hydrogen bond")])
+        """
+        return self.store.read(table, columns, filters)
+
+    def _store_entry_results(self, entry_results):
+        """Append the results of an entry to the columnar store."""
+        entry_id = entry_results.entry.to_string()
+
+        records = entry_results.interactions_mngr.to_records()
+        self.store.append("interactions",
+                          {"entry": [entry_id] * len(records),
+                           "atom_group1": [r[0] for r in records],
+                           "atom_group2": [r[1] for r in records],
+                           "interaction": [r[2] for r in records]})
+
+        atm_grps = entry_results.atm_grps_mngr.atm_grps
+        self.store.append("atom_groups",
+                          {"entry": [entry_id] * len(atm_grps),
+                           "atom_group": [";".join(sorted([a.full_atom_name
+                                                           for a in g.atoms]))
+                                          for g in atm_grps],
+                           "features": [";".join(sorted([f.name
+                                                         for f in g.features]))
+                                        for g in atm_grps]})
+
+        if entry_results.ifp is not None:
+            self._store_ifp(entry_id, entry_results.ifp)
+        if entry_results.mfp is not None:
+            self._store_mfp(entry_id, entry_results.mfp)
+
+    def _store_ifp(self, entry_id, ifp):
+        counts = ifp.counts
+        self.store.append("ifps", {"entry": [entry_id] * len(counts),
+                                   "bit": np.fromiter(counts.keys(), int,
+                                                      len(counts)),
+                                   "count": np.fromiter(counts.values(), int,
+                                                        len(counts))})
+
+    def _store_mfp(self, entry_id, mfp):
+        bits = list(self._get_mfp_bits(entry_id, mfp))
+        self.store.append("mfps", {"entry": [entry_id] * len(bits),
+                                   "bit": np.array(bits, dtype=int)})
+
+    def _compact_store(self, tables=None):
+        """Merge the small parts of the columnar store created for each
+        entry."""
+        if self.columnar_store:
+            for table in (tables or self.store.tables):
+                self.store.compact(table)
+
     def _log(self, level, message):
         if self.logging_enabled:
             try:
@@ -595,7 +1015,9 @@ class Project:
         self._log("debug", "New project initialized...")
         params = []
         for key in sorted(self.__dict__):
-            if key == "entries":
+            if key in self._transient_attrs:
+                continue
+            elif key == "entries":
                 params.append("\t\t\t-- # %s = %d"
                               % (key, len(self.__dict__[key])))
             else:
@@ -709,7 +1131,7 @@ class Project:
             args = [(pdb_id, self.pdb_path) for pdb_id in to_download]
             pj = ParallelJobs(self.nproc)
             job_results = pj.run_jobs(args=args, consumer_func=download_pdb,
-                                      job_name="Download PDBs")
+                                      job_name="Download PDBs", chunksize=1)
             errors = job_results.errors
 
             # Warn the users for any errors found during
@@ -745,7 +1167,8 @@ class Project:
             pdb_parser = PDBParser(PERMISSIVE=True, QUIET=True,
                                    FIX_EMPTY_CHAINS=True,
                                    FIX_ATOM_NAME_CONFLICT=True,
-                                   FIX_OBABEL_FLAGS=False)
+                                   FIX_OBABEL_FLAGS=False,
+                                   FAST_PARSING=True)
 
         if isinstance(pdb_parser, FTMapParser):
             only_compounds = [entry.get_biopython_key(full_id=True)]
@@ -757,7 +1180,8 @@ class Project:
             save_to_file(structure, pdb_file)
             entry.pdb_file = pdb_file
         else:
-            structure = pdb_parser.get_structure(entry.pdb_id, pdb_file)
+            structure = self._get_structure(pdb_parser, entry.pdb_id,
+                                            pdb_file)
 
         if isinstance(entry, MolFileEntry):
             structure = entry.get_biopython_structure(structure, pdb_parser)
@@ -767,10 +1191,114 @@ class Project:
 
         return pdb_parser, structure, ligand
 
-    def _get_perceiver(self, add_h, cache=None):
+    def _get_structure(self, pdb_parser, structure_id, pdb_file):
+        """Parse ``pdb_file`` with ``pdb_parser``.
+
+        PDB files shared by more than one entry (e.g., a receptor docked
+        with several ligands) are parsed only once per process. The parsed
+        structures are kept in a LRU cache, and each entry receives its own
+        copy, so that they can be freely modified (e.g., by adding ligands).
+        The parser header is restored as if the file had been parsed again.
+        """
+        if self._pdb_counts is None:
+            self._pdb_counts = Counter(e.pdb_id for e in self.entries)
+
+        if self._pdb_counts[structure_id] < 2:
+            return pdb_parser.get_structure(structure_id, pdb_file)
+
+        if self._structure_cache is None:
+            self._structure_cache = OrderedDict()
+
+        # Files modified after being parsed and parsers with different
+        # options produce different structures.
+        stat = os.stat(pdb_file)
+        options = tuple(sorted((k, v) for k, v in vars(pdb_parser).items()
+                               if k.isupper()))
+        key = (abspath(pdb_file), stat.st_mtime_ns, stat.st_size,
+               structure_id, pdb_parser.__class__,
+               pdb_parser.structure_builder.__class__, options)
+
+        if key in self._structure_cache:
+            self._structure_cache.move_to_end(key)
+            structure, header, trailer, conects = self._structure_cache[key]
+            pdb_parser.header = header
+            pdb_parser.trailer = trailer
+            pdb_parser.conects = conects
+        else:
+            structure = pdb_parser.get_structure(structure_id, pdb_file)
+            self._structure_cache[key] = (structure, pdb_parser.header,
+                                          pdb_parser.trailer,
+                                          pdb_parser.conects)
+            if len(self._structure_cache) > STRUCTURE_CACHE_SIZE:
+                self._structure_cache.popitem(last=False)
+
+        # The cached structure is never modified.
+        return structure.copy()
+
+    def _new_feature_extractor(self):
         feats_factory_func = ChemicalFeatures.BuildFeatureFactory
         feature_factory = feats_factory_func(self.atom_prop_file)
-        feature_extractor = FeatureExtractor(feature_factory)
+        return FeatureExtractor(feature_factory)
+
+    def _setup_worker(self):
+        """Set up the objects shared by all tasks executed by a worker
+        process. This method is called only once per process."""
+        self._entries_map = {e.to_string(): e for e in self.entries}
+        self._feature_extractor = self._new_feature_extractor()
+        # Indices of molecular files are shared by all processes.
+        MolFileIndex.index_path = "%s/tmp/mol_index" % self.working_path
+
+    @contextmanager
+    def _worker_pool(self):
+        """Provide a pool of long-lived processes to be shared by all stages
+        of the project (entries processing, fingerprints, similarity).
+
+        Each process is initialized only once with a copy of the project,
+        so tasks only need to send entry identifiers to them. If a pool
+        already exists, it is reused.
+        """
+        if self._pool is not None:
+            yield self._pool
+            return
+
+        # Workers may be initialized in the current process when jobs are
+        # run sequentially, so the index path is restored later.
+        index_path = MolFileIndex.index_path
+
+        self._pool = ParallelJobs(self.nproc, initializer=_init_worker,
+                                  initargs=(self,))
+        self._pool.start()
+        try:
+            yield self._pool
+        finally:
+            self._pool.close()
+            self._pool = None
+            MolFileIndex.index_path = index_path
+
+    def _run_entry_jobs(self, pj, func_name, entries, job_name, **kwargs):
+        """Execute the method ``func_name`` for each entry in ``entries``
+        using the pool of processes ``pj``.
+
+        Returns
+        -------
+         : list of tuple
+            Any errors found during the processing of an entry. Each tuple
+            contains the entry and the exception raised.
+        """
+        args = [(func_name, e.to_string()) for e in entries]
+        job_results = pj.run_jobs(args=args,
+                                  consumer_func=_exec_worker_task,
+                                  job_name=job_name, **kwargs)
+
+        # Map entry identifiers back to entries.
+        entries_map = {e.to_string(): e for e in entries}
+        return [(entries_map[data[1]], exception)
+                for data, exception in job_results.errors]
+
+    def _get_perceiver(self, add_h, cache=None):
+        feature_extractor = self._feature_extractor
+        if feature_extractor is None:
+            feature_extractor = self._new_feature_extractor()
 
         perceiver = AtomGroupPerceiver(feature_extractor, add_h=add_h,
                                        ph=self.ph, amend_mol=self.amend_mol,
@@ -779,32 +1307,124 @@ class Project:
 
         return perceiver
 
-    def cache_protein_properties(self, entry):
-        self._log("info",
-                  "Cache memory activated. Residue information will be "
-                  "stored and reutilized for all ligands.")
+    def _get_receptor_key(self, entry, add_h):
+        """Get a key identifying the receptor PDB file of ``entry`` and the
+        parameters used to perceive its atom groups."""
+        pdb_file = "%s/%s.pdb" % (self.pdb_path, entry.pdb_id)
 
-        pdb_parser, structure, ligand = self._parse_complex(entry)
-        add_h = self._decide_hydrogen_addition(pdb_parser.get_header(), entry)
+        if self._receptor_keys is None:
+            self._receptor_keys = {}
 
+        if (pdb_file, add_h) not in self._receptor_keys:
+            md5 = hashlib.md5()
+            with open(pdb_file, "rb") as IN:
+                for block in iter(lambda: IN.read(1 << 20), b""):
+                    md5.update(block)
+
+            params = (add_h, self.ph, self.amend_mol, self.atom_prop_file)
+            md5.update(repr(params).encode())
+
+            self._receptor_keys[(pdb_file, add_h)] = md5.hexdigest()
+
+        return self._receptor_keys[(pdb_file, add_h)]
+
+    def _get_structure_cache(self, entry, add_h):
+        """Get the cache of the receptor of ``entry`` or None if it was not
+        cached."""
+        if not self.cache:
+            return None
+        return self.cache.get(self._get_receptor_key(entry, add_h))
+
+    def _perceive_receptor(self, compounds, add_h):
+        """Perceive the atom groups of ``compounds`` region by region.
+
+        Regions are cubes whose edges have twice the length of the cache
+        cutoff, which keeps each molecule to be perceived close to the size of
+        a binding site. Each atom is taken from the region containing its
+        compound, while its bonded neighbors give it the proper context.
+        """
         inter_config = self.inter_calc.inter_config
-        radius = inter_config.get("cache_cutoff",
+        cutoff = inter_config.get("cache_cutoff",
                                   BOUNDARY_CONFIG["cache_cutoff"])
-        nb_pairs = get_contacts_with(ligand,
-                                     entity=structure[0],
-                                     radius=radius,
-                                     level='R')
-        nb_compounds = set([p[1] for p in nb_pairs])
-        mol_objs_dict = {}
-        if isinstance(entry, MolFileEntry):
-            mol_objs_dict[entry.get_biopython_key()] = entry.mol_obj
+
+        # Metals are added to all regions to preserve metal coordination.
+        metals = set([c for c in compounds if c.is_metal()])
+
+        regions = defaultdict(set)
+        for comp in compounds - metals:
+            centroid = np.mean([atm.coord for atm in comp.get_atoms()],
+                               axis=0)
+            cell = tuple(np.floor(centroid / (2 * cutoff)).astype(int))
+            regions[cell].add(comp)
 
         perceiver = self._get_perceiver(add_h)
-        atm_grps_mngr = \
-            perceiver.perceive_atom_groups(nb_compounds,
-                                           mol_objs_dict=mol_objs_dict)
 
-        # Remove any edges involving the ligand.
+        ext_atms = {}
+        region_mngrs = []
+        for cell in sorted(regions):
+            region_comps = regions[cell]
+            mngr = perceiver.perceive_atom_groups(region_comps | metals)
+            region_mngrs.append((region_comps, mngr))
+
+            region_atms = set(mngr.graph.nodes)
+            region_atms.update([a for ag in mngr for a in ag.atoms])
+            for ext_atm in region_atms:
+                if ext_atm.parent in region_comps:
+                    ext_atms[ext_atm.atom] = \
+                        ExtendedAtom(ext_atm.atom,
+                                     nb_info=list(ext_atm.neighbors_info),
+                                     invariants=ext_atm.invariants)
+
+        atm_grps_mngr = AtomGroupsManager()
+        for region_comps, mngr in region_mngrs:
+            for atm_grp in sorted(mngr):
+                if (all([a.atom in ext_atms for a in atm_grp.atoms])
+                        and any([c in region_comps
+                                 for c in atm_grp.compounds])):
+                    atoms = [ext_atms[a.atom] for a in atm_grp.atoms]
+                    atm_grps_mngr.new_atm_grp(atoms, atm_grp.features)
+
+            for edge in mngr.graph.edges:
+                if all([atm.atom in ext_atms for atm in edge]):
+                    atm_grps_mngr.graph.add_edge(*[ext_atms[atm.atom]
+                                                   for atm in edge],
+                                                 weight=1)
+        atm_grps_mngr.reset_bond_distances()
+
+        return atm_grps_mngr
+
+    def cache_protein_properties(self, entry):
+        """Perceive and cache the atom groups of the receptor of ``entry``.
+
+        The whole receptor is perceived only once and the cache is reused by
+        all entries sharing the same receptor file and perception parameters.
+        """
+        pdb_parser, structure, ligand = self._parse_complex(entry)
+        add_h = self._decide_hydrogen_addition(pdb_parser.get_header(), entry)
+
+        key = self._get_receptor_key(entry, add_h)
+        if self.cache is None:
+            self.cache = {}
+        if key in self.cache:
+            return self.cache[key]
+
+        self._log("info",
+                  "Cache memory activated. Residue information of the "
+                  "receptor '%s' will be stored and reutilized for all "
+                  "ligands." % entry.pdb_id)
+
+        # The ligand itself is never cached.
+        if ligand.level == "R":
+            ligand_comps = set([ligand])
+        else:
+            ligand_comps = set(ligand.get_residues())
+
+        compounds = set([c for c in structure[0].get_residues()
+                         if c not in ligand_comps])
+
+        atm_grps_mngr = self._perceive_receptor(compounds, add_h)
+
+        # Remove any edges involving hetero groups or metals.
         valid_edges = set()
         for edge in atm_grps_mngr.graph.edges:
             if any([atm.parent.is_hetatm() or atm.parent.is_metal()
@@ -820,21 +1440,12 @@ class Project:
         atm_grps_mngr.remove_atm_grps(invalid_atm_grps)
 
         # Update the list of valid compounds used to generate the cache.
-        invalid_comps = set([c for ag in invalid_atm_grps
-                             for c in ag.compounds
-                             if c.is_hetatm() or c.is_metal()])
-        nb_compounds = nb_compounds - invalid_comps
-
-        # Remove dummy chain if the ligand comes from an
-        # external molecular file.
-        if isinstance(entry, MolFileEntry):
-            chain = ligand.parent
-            chain.detach_child(ligand.id)
+        compounds = set([c for c in compounds
+                         if not (c.is_hetatm() or c.is_metal())])
 
-            if len(chain.child_list) == 0:
-                chain.parent.detach_child(chain.id)
+        self.cache[key] = StructureCache(compounds, atm_grps_mngr, key=key)
 
-        self.cache = StructureCache(nb_compounds, atm_grps_mngr)
+        return self.cache[key]
 
     def _perceive_chemical_groups(self, entry, entity, ligand,
                                   add_h=False, cache=None):
@@ -888,61 +1499,234 @@ class Project:
                                  unique_shells=unique_shells,
                                  count_fp=self.ifp_count)
 
+    def _get_binary_fp_file(self, output_file):
+        """Get where fingerprints saved to ``output_file`` are also saved in
+        a binary format."""
+        binary_file = "%s.npz" % splitext(output_file)[0]
+        if binary_file == output_file:
+            binary_file = "%s.npz" % output_file
+        return binary_file
+
     def _create_ifp_file(self):
         ifp_output = self.ifp_output or ("%s/results/fingerprints/ifp.csv"
                                          % self.working_path)
-        with open(ifp_output, "w") as OUT:
+        binary_output = self._get_binary_fp_file(ifp_output)
+
+        with open(ifp_output, "w") as OUT, \
+                FingerprintWriter(binary_output, self.ifp_length,
+                                  self._get_ifp_params()) as writer:
             if self.ifp_count:
                 OUT.write("ligand_id,on_bits,count\n")
             else:
                 OUT.write("ligand_id,on_bits\n")
 
-            for entry, ifp in self.ifps:
+            for entry_id, counts in self._get_ifp_counts():
+                writer.write(counts, entry_id)
+
                 if self.ifp_count:
                     fp_bits_str = "\t".join([str(idx)
-                                             for idx in ifp.counts.keys()])
+                                             for idx in counts.keys()])
                     fp_count_str = "\t".join([str(count) for count
-                                              in ifp.counts.values()])
-                    OUT.write("%s,%s,%s\n" % (entry.to_string(), fp_bits_str,
+                                              in counts.values()])
+                    OUT.write("%s,%s,%s\n" % (entry_id, fp_bits_str,
                                               fp_count_str))
                 else:
                     fp_bits_str = "\t".join([str(x) for x
-                                             in ifp.get_on_bits()])
-                    OUT.write("%s,%s\n" % (entry.to_string(), fp_bits_str))
+                                             in sorted(counts.keys())])
+                    OUT.write("%s,%s\n" % (entry_id, fp_bits_str))
+
+    def _get_ifp_counts(self, entries=None):
+        """Yield the identifier of each entry and the counts of its IFP.
+
+        IFPs are read from the columnar store in a single pass if it is
+        available. Otherwise, they are loaded from the results of each entry.
+        If ``entries`` is provided, only their IFPs are yielded.
+        """
+        filters = None
+        if entries is None:
+            entries = self.entries
+        else:
+            filters = [("entry", "in", [e.to_string() for e in entries])]
+
+        stored_counts = {}
+        if self.columnar_store and "ifps" in self.store.tables:
+            df = self.store.read("ifps", filters=filters)
+            stored_counts = {entry_id: dict(zip(grp["bit"], grp["count"]))
+                             for entry_id, grp in df.groupby("entry",
+                                                             sort=False)}
+
+        for entry in entries:
+            entry_id = entry.to_string()
+            if entry_id in stored_counts:
+                yield entry_id, stored_counts[entry_id]
+                continue
+
+            results = self.get_entry_results(entry)
+            if results:
+                yield entry_id, results.ifp.counts
 
     def _create_mfp_file(self):
         mfp_output = (self.mfp_output or "%s/results/fingerprints/mfp.csv"
                       % self.working_path)
-        with open(mfp_output, "w") as OUT:
-            OUT.write("ligand_id,on_bits\n")
-            for entry, mfp in self.mfps:
-                try:
-                    bits = mfp.GetOnBits()
-                except Exception:
-                    try:
-                        bits = mfp.GetNonzeroElements().keys()
-                    except Exception:
-                        error_msg = ("Fingerprint bits cannot be recovered "
-                                     "for entry '%s'." % entry.to_string())
-                        raise InvalidFingerprintType(error_msg)
-
-                fp_str = "\t".join([str(x) for x in bits])
-                OUT.write("%s,%s\n" % (entry.to_string(), fp_str))
-
-    def _calc_similarity(self, res1, res2):
-        return "%s,%s,%s" % (res1.entry.to_string(),
-                             res2.entry.to_string(),
-                             str(res1.ifp.calc_similarity(res2.ifp)))
+        binary_output = self._get_binary_fp_file(mfp_output)
 
-    def _generate_similarity_matrix(self, output_file):
-        nargs = int(comb(len(self.entries), 2))
-        args = ArgsGenerator(itertools.combinations(self.results, 2), nargs)
+        # The binary file is written together with the CSV file, in the order
+        # of the entries, as entries may finish in any order in the worker
+        # processes and may fail or be processed again.
+        writer = None
+        try:
+            with open(mfp_output, "w") as OUT:
+                OUT.write("ligand_id,on_bits\n")
+                for entry, mfp in self.mfps:
+                    bits = self._get_mfp_bits(entry.to_string(), mfp)
+                    fp_str = "\t".join([str(x) for x in bits])
+                    OUT.write("%s,%s\n" % (entry.to_string(), fp_str))
+
+                    # The fingerprint length is only known from the
+                    # fingerprints themselves.
+                    if writer is None:
+                        writer = FingerprintWriter(binary_output,
+                                                   self._get_mfp_length(mfp))
+                    writer.write(dict.fromkeys(bits, 1), entry.to_string())
+        except Exception:
+            if writer is not None:
+                writer.discard()
+            raise
+
+        if writer is not None:
+            writer.close()
+        # There are no MFPs, so a file from a previous run would be stale.
+        elif exists(binary_output):
+            os.remove(binary_output)
+
+    def _get_mfp_length(self, mfp):
+        try:
+            return mfp.GetNumBits()
+        except AttributeError:
+            return mfp.GetLength()
+
+    def _get_mfp_bits(self, entry_id, mfp):
+        try:
+            return mfp.GetOnBits()
+        except Exception:
+            try:
+                return mfp.GetNonzeroElements().keys()
+            except Exception:
+                error_msg = ("Fingerprint bits cannot be recovered "
+                             "for entry '%s'." % entry_id)
+                raise InvalidFingerprintType(error_msg)
+
+    def _get_ifp_matrix(self):
+        """Stack the IFPs of all entries into a
+        :class:`~luna.interaction.fp.matrix.FingerprintMatrix`."""
+        entry_ids, counts = [], []
+        for entry_id, ifp_counts in self._get_ifp_counts():
+            entry_ids.append(entry_id)
+            counts.append(ifp_counts)
+        return FingerprintMatrix.from_counts(counts, self.ifp_length,
+                                             entry_ids)
+
+    def _get_ifp_params(self):
+        return {"ifp_num_levels": self.ifp_num_levels,
+                "ifp_radius_step": self.ifp_radius_step,
+                "ifp_length": self.ifp_length,
+                "ifp_count": self.ifp_count,
+                "ifp_diff_comp_classes": self.ifp_diff_comp_classes,
+                "ifp_type": self.ifp_type.name}
+
+    def get_ifp_index(self):
+        """Get an index to search for the entries whose IFPs are the most
+        similar to a given fingerprint.
+
+        The index is saved at <``working_path``>/ifp_index and reused by
+        later calls. Only entries not indexed yet are added to it, e.g.,
+        entries included with ``append_mode``. Entries processed again since
+        they were indexed are indexed again, and entries no longer in the
+        project are removed from the index. If IFP parameters changed since
+        the index was saved, a new index is created.
+
+        Returns
+        -------
+         : :class:`~luna.interaction.fp.search.FingerprintIndex`
+
+        Examples
+        --------
+        Find the 10 entries whose IFPs are the most similar to the IFP of
+        the entry ``entry``.
+
+        >>> ifp = proj_obj.get_entry_results(entry).ifp
+        >>> index = proj_obj.get_ifp_index()
+        >>> print(index.search(ifp, k=10))
+        """
+        index_path = "%s/ifp_index" % self.working_path
+        # Modification time of the results file of each indexed entry.
+        mtimes_file = "%s/entries.json" % index_path
+        params = self._get_ifp_params()
+
+        index = None
+        indexed_mtimes = {}
+        if exists("%s/index.json" % index_path):
+            index = FingerprintIndex.load(index_path)
+            if index.props != params:
+                self._log("debug", "IFP parameters changed. A new IFP index "
+                          "will be created.")
+                index = None
+            elif exists(mtimes_file):
+                with open(mtimes_file, "r") as IN:
+                    indexed_mtimes = json.load(IN)
+
+        is_new = index is None
+        if is_new:
+            index = FingerprintIndex(self.ifp_length, params)
+
+        mtimes = {}
+        for entry in self.entries:
+            results_file = self._get_results_file(entry)
+            if exists(results_file):
+                mtimes[entry.to_string()] = os.stat(results_file).st_mtime_ns
+
+        # Entries no longer in the project or whose results changed.
+        stale_ids = [entry_id for entry_id in index.names
+                     if entry_id not in mtimes
+                     or indexed_mtimes.get(entry_id) != mtimes[entry_id]]
+        if stale_ids:
+            index.remove(stale_ids)
+            self._log("debug", "%d outdated entries were removed from the "
+                      "IFP index." % len(stale_ids))
+
+        new_entries = [e for e in self.entries
+                       if e.to_string() not in index.names]
+        if new_entries:
+            entry_ids, counts = [], []
+            for entry_id, ifp_counts in self._get_ifp_counts(new_entries):
+                entry_ids.append(entry_id)
+                counts.append(ifp_counts)
+
+            if entry_ids:
+                index.add(FingerprintMatrix.from_counts(counts,
+                                                        self.ifp_length,
+                                                        entry_ids))
+            self._log("debug", "%d entries were added to the IFP index."
+                      % len(entry_ids))
+
+        if is_new or stale_ids or new_entries:
+            index.save(index_path)
+
+            indexed_mtimes = {entry_id: mtimes.get(entry_id)
+                              for entry_id in index.names}
+            tmp_file = "%s/.entries.json.tmp" % index_path
+            with open(tmp_file, "w") as OUT:
+                json.dump(indexed_mtimes, OUT)
+            os.replace(tmp_file, mtimes_file)
+
+        return index
 
-        header = "entry1,entry2,similarity"
-        pj = ParallelJobs(self.nproc)
-        return pj.run_jobs(args=args, consumer_func=self._calc_similarity,
-                           output_file=output_file, output_header=header,
-                           job_name="Calculate similarities")
+    def _generate_similarity_matrix(self, output_file):
+        # Tanimoto similarities are calculated over bits, as done by
+        # Fingerprint.calc_similarity(), but for all pairs at once.
+        ifp_matrix = self._get_ifp_matrix()
+        ifp_matrix.save_similarity(output_file, metric="tanimoto",
+                                   nproc=self.nproc)
 
     def run(self):
         """Run LUNA. However, this method is not implemented by default.
@@ -1137,9 +1921,8 @@ InteractionFilter.new_pli_filter())
                 self._validate_entry_format(entry)
 
             # Entry results will be saved here.
-            pkl_file = "%s/chunks/%s.pkl.gz" % (self.working_path,
-                                                entry.to_string())
-            if self.append_mode and exists(pkl_file):
+            results_file = self._get_results_file(entry)
+            if self.append_mode and exists(results_file):
                 self._log("debug", "Since append mode is set ON, it will "
                           "skip entry '%s' because a result for this entry "
                           " already exists in the working path."
@@ -1153,15 +1936,17 @@ InteractionFilter.new_pli_filter())
             #
             # Perceive pharmacophoric properties
             #
+            cache = self._get_structure_cache(entry, add_h)
             atm_grps_mngr = self._perceive_chemical_groups(entry,
                                                            structure[0],
                                                            ligand, add_h,
-                                                           self.cache)
+                                                           cache)
             atm_grps_mngr.entry = entry
 
             #
             # Calculate interactions
             #
+            atm_grps_mngr.calc_normals()
             calc_func = self.inter_calc.calc_interactions
             interactions_mngr = calc_func(atm_grps_mngr.atm_grps)
             interactions_mngr.entry = entry
@@ -1186,7 +1971,10 @@ InteractionFilter.new_pli_filter())
             # Saving entry results.
             entry_results = EntryResults(entry, atm_grps_mngr,
                                          interactions_mngr, ifp, mfp)
-            entry_results.save(pkl_file)
+            self.save_entry_results(entry_results)
+
+            if self.columnar_store:
+                self._store_entry_results(entry_results)
 
             # Saving interactions to CSV file.
             csv_file = ("%s/results/interactions/%s.csv"
@@ -1227,12 +2015,11 @@ InteractionFilter.new_pli_filter())
                   % entry.to_string())
 
         try:
-            pkl_file = ("%s/chunks/%s.pkl.gz"
-                        % (self.working_path, entry.to_string()))
+            results_file = self._get_results_file(entry)
 
-            if exists(pkl_file):
+            if exists(results_file):
                 # Reload results.
-                entry_results = EntryResults.load(pkl_file)
+                entry_results = EntryResults.load(results_file)
                 atm_grps_mngr = entry_results.atm_grps_mngr
 
                 # Generate a new IFP.
@@ -1240,12 +2027,15 @@ InteractionFilter.new_pli_filter())
 
                 # Substitute old IFP by the new version and save the project.
                 entry_results.ifp = ifp
-                entry_results.save(pkl_file)
+                self.save_entry_results(entry_results)
+
+                if self.columnar_store:
+                    self._store_ifp(entry.to_string(), ifp)
             else:
                 error_msg = ("The IFP of the entry '%s' could not be "
                              "generated because its pickled data file "
                              "'%s' was not found." % (entry.to_string(),
-                                                      pkl_file))
+                                                      results_file))
                 raise FileNotFoundError(error_msg)
 
         except Exception:
@@ -1265,24 +2055,26 @@ InteractionFilter.new_pli_filter())
                   % entry.to_string())
 
         try:
-            pkl_file = ("%s/chunks/%s.pkl.gz"
-                        % (self.working_path, entry.to_string()))
+            results_file = self._get_results_file(entry)
 
-            if exists(pkl_file):
+            if exists(results_file):
                 # Reload results.
-                entry_results = EntryResults.load(pkl_file)
+                entry_results = EntryResults.load(results_file)
 
                 # Generate a new MFP.
                 mfp = self._create_mfp(entry)
 
                 # Substitute old MFP by the new version and save the project.
                 entry_results.mfp = mfp
-                entry_results.save(pkl_file)
+                self.save_entry_results(entry_results)
+
+                if self.columnar_store:
+                    self._store_mfp(entry.to_string(), mfp)
             else:
                 error_msg = ("The MFP of the entry '%s' could not be "
                              "generated because its pickled data file "
                              "'%s' was not found." % (entry.to_string(),
-                                                      pkl_file))
+                                                      results_file))
                 raise FileNotFoundError(error_msg)
 
         except Exception:
@@ -1327,16 +2119,53 @@ InteractionFilter.new_pli_filter())
         self._log("info", "The number of processes was set to: %s."
                   % str(self.nproc))
 
+        # Receptors are cached before the worker processes are started, so
+        # that all of them share the same cache.
+        self.cache = None
         if self.use_cache:
-            entry = self.entries[0]
-            self.cache_protein_properties(entry)
+            # Entries share a cache only if they have the same receptor key,
+            # which also depends on the hydrogen addition decided for them.
+            headers = {}
+            receptor_entries = {}
+            for entry in self.entries:
+                if entry.pdb_id not in headers:
+                    pdb_file = "%s/%s.pdb" % (self.pdb_path, entry.pdb_id)
+                    headers[entry.pdb_id] = parse_pdb_header(pdb_file)
+                add_h = self._decide_hydrogen_addition(headers[entry.pdb_id],
+                                                       entry)
+                key = self._get_receptor_key(entry, add_h)
+                receptor_entries.setdefault(key, entry)
+
+            for entry in receptor_entries.values():
+                self.cache_protein_properties(entry)
+
+        # The same processes are used by all stages of the project.
+        with self._worker_pool() as pj:
+            self._run_stages(pj)
 
-        # Run jobs either in Parallel or Sequentially (nproc = None).
-        pj = ParallelJobs(self.nproc)
-        job_results = pj.run_jobs(args=self.entries,
-                                  consumer_func=self._process_entry,
-                                  job_name="Entries processing")
-        self.errors = job_results.errors
+        # Save the whole project information.
+        self.save(self.project_file)
+
+        # Remove unnecessary paths.
+        self._remove_empty_paths()
+
+        end = time.time()
+        self._log("info", "Project creation completed!!!")
+        self._log("info", "Total processing time: %.2fs." % (end - start))
+        self._log("info", "Results were saved at %s." % self.working_path)
+        self._log("info", "You can reload your project from %s.\n\n"
+                  % self.project_file)
+
+        # Properly close any filehandlers.
+        self._close_logging_file()
+
+    def _run_stages(self, pj):
+        # Entries are expensive to process, so it is better to balance them
+        # one by one between the processes.
+        self.errors = self._run_entry_jobs(pj, "_process_entry",
+                                           self.entries,
+                                           "Entries processing",
+                                           chunksize=1)
 
         # Remove failed entries.
         if self.errors:
@@ -1344,6 +2173,8 @@ InteractionFilter.new_pli_filter())
             self.entries = [e for e in self.entries
                             if e.to_string() not in entries_with_error]
 
+        self._compact_store()
+
         # If all molecules failed, it won't try to create fingerprints.
         if len(self.entries) == 0:
             self._log("critical", "Entries processing failed.")
@@ -1363,6 +2194,10 @@ InteractionFilter.new_pli_filter())
             # Generate IFP/MFP files
             if self.calc_ifp:
                 self._create_ifp_file()
+
+                # Keep an existing IFP index up to date with new entries.
+                if exists("%s/ifp_index" % self.working_path):
+                    self.get_ifp_index()
             if self.calc_mfp:
                 self._create_mfp_file()
 
@@ -1371,22 +2206,6 @@ InteractionFilter.new_pli_filter())
                           "between fingerprints.")
                 self._generate_similarity_matrix(self.ifp_sim_matrix_output)
 
-        # Save the whole project information.
-        self.save(self.project_file)
-
-        # Remove unnecessary paths.
-        self._remove_empty_paths()
-
-        end = time.time()
-        self._log("info", "Project creation completed!!!")
-        self._log("info", "Total processing time: %.2fs." % (end - start))
-        self._log("info", "Results were saved at %s." % self.working_path)
-        self._log("info", "You can reload your project from %s.\n\n"
-                  % self.project_file)
-
-        # Properly close any filehandlers.
-        self._close_logging_file()
-
     def generate_fps(self):
         """Generate LUNA interaction fingerprints (IFPs) or
         molecular fingerprints (MFPs).
@@ -1450,13 +2269,15 @@ InteractionFilter.new_pli_filter())
         self._log("info", "The number of processes was set to: %s."
                   % str(self.nproc))
 
-        def _create_fps(args, proc_func, file_func, job_name):
+        def _create_fps(pj, func_name, file_func, job_name, table):
+            # New fingerprints replace the stored ones.
+            if self.columnar_store:
+                self.store.drop(table)
+
             # Run jobs either in Parallel or Sequentially (nproc = None).
-            pj = ParallelJobs(self.nproc)
-            job_results = pj.run_jobs(args=args,
-                                      consumer_func=proc_func,
-                                      job_name=job_name)
-            errors = job_results.errors
+            errors = self._run_entry_jobs(pj, func_name, self.entries,
+                                          job_name)
+            self._compact_store([table])
 
             tmp_entries = self.entries
             # Identify failed entries.
@@ -1490,24 +2311,26 @@ InteractionFilter.new_pli_filter())
             return success, errors
 
         all_errors = []
-        if self.calc_ifp:
-            success, errors = _create_fps(self.entries, self._process_ifps,
-                                          self._create_ifp_file,
-                                          "IFPs generation")
-            all_errors.extend(errors)
-
-            if success:
-                if self.ifp_sim_matrix_output and len(self.entries) > 1:
-                    self._log("info", "Calculating the Tanimoto similarity "
-                              "between IFPs.")
-                    output_file = self.ifp_sim_matrix_output
-                    self._generate_similarity_matrix(output_file)
-
-        if self.calc_mfp:
-            success, errors = _create_fps(self.entries, self._process_mfps,
-                                          self._create_mfp_file,
-                                          "MFPs generation")
-            all_errors.extend(errors)
+        # The same processes are used to generate all fingerprints.
+        with self._worker_pool() as pj:
+            if self.calc_ifp:
+                success, errors = _create_fps(pj, "_process_ifps",
+                                              self._create_ifp_file,
+                                              "IFPs generation", "ifps")
+                all_errors.extend(errors)
+
+                if success:
+                    if self.ifp_sim_matrix_output and len(self.entries) > 1:
+                        self._log("info", "Calculating the Tanimoto "
+                                  "similarity between IFPs.")
+                        output_file = self.ifp_sim_matrix_output
+                        self._generate_similarity_matrix(output_file)
+
+            if self.calc_mfp:
+                success, errors = _create_fps(pj, "_process_mfps",
+                                              self._create_mfp_file,
+                                              "MFPs generation", "mfps")
+                all_errors.extend(errors)
 
         self.errors = all_errors
 
@@ -1555,12 +2378,16 @@ InteractionFilter.new_pli_filter())
         self._log("info", "The number of processes was set to: %s."
                   % str(self.nproc))
 
+        # New fingerprints replace the stored ones.
+        if self.columnar_store:
+            self.store.drop("ifps")
+
         # Run jobs either in Parallel or Sequentially (nproc = None).
-        pj = ParallelJobs(self.nproc)
-        job_results = pj.run_jobs(args=self.entries,
-                                  consumer_func=self._process_ifps,
-                                  job_name="Fingerprint generation")
-        self.errors = job_results.errors
+        with self._worker_pool() as pj:
+            self.errors = self._run_entry_jobs(pj, "_process_ifps",
+                                               self.entries,
+                                               "Fingerprint generation")
+        self._compact_store(["ifps"])
 
         tmp_entries = self.entries
         # Remove failed entries.
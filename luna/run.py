@@ -218,6 +218,10 @@ def get_parser():
                         action=NegateAction, nargs=0,
                         help="cache or not protein information"
                              "to save processing time.")
+    parser.add_argument('--store', '--no-store', dest="columnar_store",
+                        action=NegateAction, nargs=0,
+                        help="save or not results to a columnar store at "
+                             "<WORKING_PATH>/store.")
     parser.add_argument("-v", dest="verbosity", type=int,
                         choices=sorted(VERBOSITY_LEVEL.keys()),
                         help="verbosity level. Default: 3.")
@@ -336,9 +340,7 @@ def main():
             im.filter_out_by_binding_mode(binding_mode_filter)
 
             entry_results = EntryResults(agm.entry, agm, im, None, None)
-            pkl_file = "%s/chunks/%s.pkl.gz" % (pli_obj.working_path,
-                                                agm.entry.to_string())
-            entry_results.save(pkl_file)
+            pli_obj.save_entry_results(entry_results)
 
             csv_file = ("%s/results/interactions/%s.csv"
                         % (pli_obj.working_path, agm.entry.to_string()))
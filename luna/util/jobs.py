@@ -1,5 +1,7 @@
 import multiprocessing as mp
 import time
+from queue import Queue
+from itertools import islice
 from collections.abc import Sequence
 
 from luna.util.progress_tracker import ProgressData, ProgressTracker
@@ -54,24 +56,51 @@ class ParallelJobs:
     """Executes a set of tasks in parallel
     (:py:class:`~multiprocessing.JoinableQueue`) or sequentially.
 
+    By default, new processes are created every time :meth:`run_jobs` is
+    called and they are stopped as soon as all tasks finish. Alternatively,
+    a pool of long-lived processes can be started with :meth:`start` (or by
+    using `ParallelJobs` as a context manager) and reused by successive calls
+    to :meth:`run_jobs` until :meth:`close` is called. In this case, each
+    process executes ``initializer`` only once, and the consumer functions are
+    sent to the processes together with the tasks. Therefore, they should be
+    cheap to pickle (e.g., module-level functions).
+
     Parameters
     ----------
     nproc : int or None
        The number of CPUs to use. The default value is the ``maximum number
        of CPUs - 1``. If ``nproc`` is None, 0, or 1, run the jobs sequentially.
        Otherwise, use the ``maximum number of CPUs - 1``.
+    initializer : callable, optional
+        A function executed once by each process before running any task.
+        If the jobs are run sequentially, it is executed once in the current
+        process.
+    initargs : tuple, optional
+        Arguments passed to ``initializer``.
 
     Attributes
     ----------
     nproc : int
         The number of CPUs to use.
+    initializer : callable
+    initargs : tuple
     progress_tracker : ProgressTracker
         A :class:`~luna.util.progress_tracker.ProgressTracker` object to track
         the tasks' progress.
+
+    Examples
+    --------
+
+    Run two sets of tasks with the same pool of processes.
+
+    >>> from luna.util.jobs import ParallelJobs
+    >>> with ParallelJobs(nproc=4, initializer=init_func) as pj:
+    ...     pj.run_jobs(args1, func1)
+    ...     pj.run_jobs(args2, func2)
     """
 
     # TODO: add option to Threads/Multiprocessing
-    def __init__(self, nproc=MAX_NPROCS):
+    def __init__(self, nproc=MAX_NPROCS, initializer=None, initargs=()):
 
         if nproc is not None:
             # Use 'MAX_NPROCS' if a non-integer has been provided.
@@ -80,11 +109,26 @@ class ParallelJobs:
             elif nproc in [0, 1]:
                 nproc = None
             else:
-                nproc = min(nproc, MAX_NPROCS)
+                # If there is a single CPU, run the jobs sequentially.
+                nproc = min(nproc, MAX_NPROCS) or None
 
         self.nproc = nproc
+        self.initializer = initializer
+        self.initargs = initargs
         self.progress_tracker = None
 
+        self._is_running = False
+        self._consumers = []
+        self._job_queue = None
+        self._progress_queue = None
+        self._output_queue = None
+
+    @property
+    def is_running(self):
+        """bool: If a pool of processes was started by :meth:`start` and \
+        is still running."""
+        return self._is_running
+
     def _exec_func(self, data, func):
         start = time.time()
 
@@ -109,31 +153,72 @@ class ParallelJobs:
 
         return output, exception, proc_time
 
-    def _producer(self, args, job_queue):
-        for data in args:
-            job_queue.put(data)
+    def _get_chunksize(self, ntasks):
+        # Same heuristic used by multiprocessing.Pool.map(): split the tasks
+        # into approximately 4 chunks per process.
+        chunksize, extra = divmod(ntasks, self.nproc * 4)
+        if extra:
+            chunksize += 1
+        return max(chunksize, 1)
+
+    def _producer(self, args, job_queue, chunksize=1, func=None,
+                  save_output=False):
+        args = iter(args)
+        while True:
+            chunk = list(islice(args, chunksize))
+            if not chunk:
+                break
+            job_queue.put((func, chunk, save_output))
+
+    def _consumer(self, func, job_queue, progress_queue, output_queue=None,
+                  initializer=None, initargs=()):
+
+        init_error = None
+        if initializer is not None:
+            try:
+                initializer(*initargs)
+            except Exception as e:
+                logger.exception(e)
+                # Any task received by this process will fail.
+                init_error = e
 
-    def _consumer(self, func, job_queue, progress_queue, output_queue=None):
         while True:
-            data = job_queue.get()
+            task = job_queue.get()
 
             # If sentinel is found, break.
-            if isinstance(data, Sentinel):
+            if isinstance(task, Sentinel):
                 break
 
-            # Execute the provided function.
-            output, exception, proc_time = self._exec_func(data, func)
+            # Tasks may bring their own function, which is the case for
+            # long-lived processes.
+            task_func, chunk, save_output = task
+            task_func = task_func or func
 
-            if output is not None and output_queue is not None:
-                output_queue.put((data, output))
+            outputs = []
+            progress = []
+            for data in chunk:
+                if init_error is None:
+                    # Execute the provided function.
+                    output, exception, proc_time = \
+                        self._exec_func(data, task_func)
+                else:
+                    output, exception, proc_time = None, init_error, 0
+
+                if output is not None and save_output:
+                    outputs.append((data, output))
+
+                pd = ProgressData(input_data=data,
+                                  output_data=output,
+                                  exception=exception,
+                                  proc_time=proc_time)
+                progress.append(pd)
+
+            # Results and progress are sent back once per chunk.
+            if outputs:
+                output_queue.put(outputs)
 
             # Update progress tracker.
-            pd = ProgressData(input_data=data,
-                              output_data=output,
-                              exception=exception,
-                              proc_time=proc_time,
-                              func=func)
-            progress_queue.put(pd)
+            progress_queue.put(progress)
 
             job_queue.task_done()
 
@@ -146,35 +231,101 @@ class ParallelJobs:
                 OUT.write("\n")
 
             while True:
-                data = output_queue.get()
+                chunk = output_queue.get()
 
                 # If sentinel is found, break.
-                if isinstance(data, Sentinel):
+                if isinstance(chunk, Sentinel):
                     break
 
-                line = None
-                if proc_func is not None:
-                    # Execute the provided function.
-                    output, exception, proc_time = self._exec_func(data,
-                                                                   proc_func)
-                    line = output
-
-                try:
-                    # If no data is stored in line, try to access the
-                    # output generated by the _consumer() function.
-                    if line is None:
-                        line = data[1]
-
-                    OUT.write(str(line).strip())
-                    OUT.write("\n")
-                    OUT.flush()
-                except Exception as e:
-                    logger.error("An error occurred while trying to save "
-                                 "the output '%s'." % str(line))
-                    logger.exception(e)
-
+                for data in chunk:
+                    line = None
+                    if proc_func is not None:
+                        # Execute the provided function.
+                        output, exception, proc_time = \
+                            self._exec_func(data, proc_func)
+                        line = output
+
+                    try:
+                        # If no data is stored in line, try to access the
+                        # output generated by the _consumer() function.
+                        if line is None:
+                            line = data[1]
+
+                        OUT.write(str(line).strip())
+                        OUT.write("\n")
+                    except Exception as e:
+                        logger.error("An error occurred while trying to save "
+                                     "the output '%s'." % str(line))
+                        logger.exception(e)
+
+                OUT.flush()
                 output_queue.task_done()
 
+    def _start_consumers(self, func=None):
+        self._job_queue = mp.JoinableQueue(maxsize=self.nproc)
+
+        # The progress data is written directly to the pipe. So, when all
+        # tasks are marked as done, their progress is already available to
+        # the progress tracker.
+        self._progress_queue = mp.SimpleQueue()
+        self._output_queue = mp.JoinableQueue()
+
+        self._consumers = []
+        for i in range(self.nproc):
+            p = mp.Process(name="ConsumerProcess-%d" % i,
+                           target=self._consumer,
+                           args=(func, self._job_queue,
+                                 self._progress_queue, self._output_queue,
+                                 self.initializer, self.initargs,))
+            p.daemon = True
+            p.start()
+            self._consumers.append(p)
+
+    def _stop_consumers(self):
+        # Sentinels to stop consumers.
+        sentinel = Sentinel()
+        [self._job_queue.put(sentinel) for p in self._consumers]
+        [p.join() for p in self._consumers]
+
+        self._consumers = []
+        self._job_queue = None
+        self._progress_queue = None
+        self._output_queue = None
+
+    def start(self):
+        """Start a pool of long-lived processes that will be reused by
+        successive calls to :meth:`run_jobs` until :meth:`close` is called.
+
+        If jobs are run sequentially, ``initializer`` is executed once in
+        the current process.
+        """
+        if self._is_running:
+            return
+
+        if self.nproc is not None:
+            self._start_consumers()
+        elif self.initializer is not None:
+            self.initializer(*self.initargs)
+
+        self._is_running = True
+
+    def close(self):
+        """Stop the pool of processes started by :meth:`start`."""
+        if not self._is_running:
+            return
+
+        if self.nproc is not None:
+            self._stop_consumers()
+
+        self._is_running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _sequential(self, args, func, progress_queue):
         # Run jobs sequentially.
         for data in args:
@@ -191,7 +342,8 @@ class ParallelJobs:
             progress_queue.put(pd)
 
     def run_jobs(self, args, consumer_func, output_file=None,
-                 proc_output_func=None, output_header=None, job_name=None):
+                 proc_output_func=None, output_header=None, job_name=None,
+                 chunksize=None):
         """
         Run a set of tasks in parallel or sequentially according to the
         ``nproc``.
@@ -221,6 +373,12 @@ class ParallelJobs:
             A header for the output file.
         job_name : str, optional
             A name to identify the job.
+        chunksize : int, optional
+            The number of tasks sent to a consumer at once. Outputs and
+            progress are also sent back in batches of this size. Large chunks
+            reduce the interprocess communication overhead for cheap tasks.
+            If not provided, ``args`` is split into approximately 4 chunks per
+            process. Ignored if jobs are run sequentially.
 
         Returns
         -------
@@ -234,8 +392,25 @@ class ParallelJobs:
             logger.warning("The output file '%s' was defined. So, it will "
                            "try to save results at it." % output_file)
 
-        # Queue for progress tracker.
-        progress_queue = mp.JoinableQueue(maxsize=1)
+        # Processes created only for this set of tasks.
+        is_temporary_pool = not self._is_running
+
+        if self.nproc is not None:
+            if is_temporary_pool:
+                # The consumer function is provided directly to each process.
+                self._start_consumers(consumer_func)
+                task_func = None
+            else:
+                task_func = consumer_func
+
+            # Queue for progress tracker. It is unbounded so that workers
+            # never block while reporting progress.
+            progress_queue = self._progress_queue
+        else:
+            if is_temporary_pool and self.initializer is not None:
+                self.initializer(*self.initargs)
+
+            progress_queue = Queue()
 
         # Progress tracker
         self.progress_tracker = ProgressTracker(len(args), progress_queue,
@@ -246,41 +421,34 @@ class ParallelJobs:
         progress_queue.put(None)
 
         if self.nproc is not None:
-            job_queue = mp.JoinableQueue(maxsize=self.nproc)
+            job_queue = self._job_queue
+            output_queue = self._output_queue
 
-            output_queue = None
             if output_file is not None:
-                output_queue = mp.JoinableQueue()
-
-            for i in range(self.nproc):
-                p = mp.Process(name="ConsumerProcess-%d" % i,
-                               target=self._consumer,
-                               args=(consumer_func, job_queue,
-                                     progress_queue, output_queue,))
-                p.daemon = True
-                p.start()
-
-            if output_file is not None:
-                o = mp.Process(name="WriterProcess-%d" % i,
+                o = mp.Process(name="WriterProcess",
                                target=self._saver,
                                args=(output_queue, output_file,
                                      proc_output_func, output_header,))
                 o.daemon = True
                 o.start()
 
-            # Produce tasks to consumers.
-            self._producer(args, job_queue)
+            if chunksize is None:
+                chunksize = self._get_chunksize(len(args))
 
-            # Sentinels to stop consumers.
-            sentinel = Sentinel()
+            # Produce tasks to consumers.
+            self._producer(args, job_queue, max(int(chunksize), 1),
+                           task_func, output_file is not None)
 
-            # Join all processes and add sentinels to stop consumers.
+            # Wait for all tasks to be processed.
             job_queue.join()
-            [job_queue.put(sentinel) for i in range(self.nproc)]
 
             if output_file is not None:
                 output_queue.join()
-                output_queue.put(sentinel)
+                output_queue.put(Sentinel())
+                o.join()
+
+            if is_temporary_pool:
+                self._stop_consumers()
 
         else:
             self._sequential(args, consumer_func, progress_queue)
@@ -288,4 +456,9 @@ class ParallelJobs:
         # Finish the progress tracker.
         self.progress_tracker.end()
 
+        # The function is set only now to avoid pickling it with
+        # the progress data.
+        for r in self.progress_tracker.results:
+            r.func = consumer_func
+
         return self.progress_tracker.results
@@ -1,6 +1,5 @@
 import numpy as np
-import scipy.optimize
-import functools
+from collections import defaultdict
 from scipy.spatial import distance
 
 
@@ -91,22 +90,34 @@ def cross(a, b):
 
 
 def calc_normal(points, decimals=3):
-    fun = functools.partial(error, points=points)
-    params0 = [0, 0, 0]
-
-    # It was found a Warning when executing the next line.
-    # The Warning is:
-    #       optimize.py:994: RuntimeWarning:
-    #              divide by zero encountered in double_scalars
-    #       rhok = 1.0 / (numpy.dot(yk, sk))
-    #
-    # However, according to my analysis, Numpy is able to deal
-    # with such Warning and the result is generated properly.
-    res = scipy.optimize.minimize(fun, params0)
-
-    a = res.x[0]
-    b = res.x[1]
+    return calc_normals([points], decimals)[0]
 
-    xs, ys, zs = zip(*points)
 
-    return np.around(np.array(cross([1, 0, a], [0, 1, b])), decimals)
+def calc_normals(points_list, decimals=3):
+    # Fit the plane z = a*x + b*y + c to each set of points by least squares
+    # and return the normal vector given by cross([1, 0, a], [0, 1, b]).
+    # The pseudo-inverse provides the minimum norm solution, so it also
+    # handles degenerate cases (e.g., less than three points).
+    #
+    # Sets of points with the same size are fitted at once.
+    idxs_by_size = defaultdict(list)
+    for i, points in enumerate(points_list):
+        idxs_by_size[len(points)].append(i)
+
+    normals = [None] * len(points_list)
+    for size, idxs in idxs_by_size.items():
+        coords = np.array([points_list[i] for i in idxs], dtype=float)
+        coords = coords.reshape(len(idxs), size, 3)
+
+        xy1 = np.concatenate((coords[:, :, :2],
+                              np.ones((len(idxs), size, 1))), axis=2)
+        params = np.linalg.pinv(xy1) @ coords[:, :, 2:]
+
+        a = params[:, 0, 0]
+        b = params[:, 1, 0]
+        batch_normals = np.around(np.stack((-a, -b, np.ones_like(a)), axis=1),
+                                  decimals)
+        for i, normal in zip(idxs, batch_normals):
+            normals[i] = normal
+
+    return normals
@@ -114,10 +114,24 @@ class ProgressResult:
             yield r
 
 
+class ProgressSentinel:
+    """Custom sentinel to stop a progress tracker."""
+    pass
+
+
 class ProgressTracker:
     """
     A progress tracker for tasks queued in ``queue``.
 
+    The tracker drains ``queue`` in a background thread that blocks until new
+    progress is available, so producers never have to wait for the tracker.
+    Each time the thread wakes up, it consumes every message already waiting
+    in the queue and redraws the progress bar only once. A message can be a
+    single `ProgressData` object or a list of them. Note that ``queue``
+    should be unbounded (e.g., :py:class:`~multiprocessing.Queue` with no
+    ``maxsize``) or written directly to a pipe being consumed by the tracker
+    (e.g., :py:class:`~multiprocessing.SimpleQueue`).
+
     Parameters
     ----------
     ntasks : int
@@ -148,7 +162,7 @@ class ProgressTracker:
         self._progress = 0
 
         self.queue = queue   # used to communicate progress to the thread
-        self._event = Event()    # used to tell the thread when to finish
+        self._event = Event()    # set when the thread receives a sentinel
         self._progress_bar = Thread(target=self._print_progress,
                                     args=(self._event, self.queue))
         self._progress_bar.daemon = True
@@ -157,7 +171,7 @@ class ProgressTracker:
         self.results = ProgressResult()
         self.nerrors = 0
 
-        self._running_times = []
+        self._total_running_time = 0
         self._start_time = None
         self._end_time = None
 
@@ -183,38 +197,46 @@ class ProgressTracker:
         sys.stdout.write(progress_str)
         sys.stdout.flush()
 
-    def _print_progress(self, e, q):
-        """Updates a progress bar on stdout anytime progress is made"""
+    def _drain(self, q):
+        """Block until there is progress in ``q`` and return it together with
+        any other progress data already waiting in the queue."""
+        batch = [q.get()]
+        while not q.empty():
+            batch.append(q.get())
+        return batch
 
-        while True:
-            while not q.full():
-                # Stops the loop if function end() is called before the queue
-                # gets full.
-                if e.is_set():
-                    break
-                # wait for more progress to be made
-                time.sleep(0.1)
+    def _update(self, progress_data):
+        self.results.append(progress_data)
 
-            # If our event is set and there is any progress in the queue,
-            # break out of the infinite loop and prepare to terminate this
-            # thread
-            if e.is_set() and q.full() is False:
-                break
+        self._total_running_time += progress_data.proc_time
 
-            # get the current progress data.
-            progress_data = q.get()
+        if progress_data.exception is not None:
+            self.nerrors += 1
 
-            if progress_data is not None:
-                self.results.append(progress_data)
+        self.progress += 1
 
-                self._running_times.append(progress_data.proc_time)
+    def _print_progress(self, e, q):
+        """Updates a progress bar on stdout anytime progress is made"""
 
-                if progress_data.exception is not None:
-                    self.nerrors += 1
+        while not e.is_set():
+            for progress_data in self._drain(q):
+                # The tracker was asked to finish. Since the sentinel is the
+                # last message in the queue, there is no more progress to be
+                # consumed.
+                if isinstance(progress_data, ProgressSentinel):
+                    e.set()
+                    break
 
-                self.progress += 1
+                # Workers may send progress in batches.
+                if isinstance(progress_data, list):
+                    for pd in progress_data:
+                        self._update(pd)
+                # None is used to force the progress bar to be displayed.
+                elif progress_data is not None:
+                    self._update(progress_data)
 
-            perc = round((self.progress / self.ntasks), 2) * 100 if self.ntasks > 0 else 0
+            perc = (round((self.progress / self.ntasks), 2) * 100
+                    if self.ntasks > 0 else 0)
             self._show_progress_bar(self.progress, perc)
 
     @property
@@ -236,10 +258,8 @@ class ProgressTracker:
     @property
     def avg_running_time(self):
         """float: Average running time."""
-        if self._running_times:
-            total = sum(self._running_times)
-            count = len(self._running_times)
-            return round(total / count, 2)
+        if self.progress > 0:
+            return round(self._total_running_time / self.progress, 2)
         else:
             return 0
 
@@ -249,8 +269,11 @@ class ProgressTracker:
         self._progress_bar.start()
 
     def end(self):
-        """ Finish the progress tracker. """
-        self._event.set()
+        """ Finish the progress tracker.
+
+        All progress must have been sent to ``queue`` before calling `end`.
+        """
+        self.queue.put(ProgressSentinel())
         self._progress_bar.join()
         self._end_time = round(time.time(), 2)
         sys.stdout.write('\n')
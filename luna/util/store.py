@@ -0,0 +1,330 @@
+import glob
+import operator
+import os
+import time
+import uuid
+from os.path import basename, exists
+
+import numpy as np
+import pandas as pd
+
+from luna.util.exceptions import IllegalArgumentError
+from luna.util.file import remove_directory
+
+import logging
+logger = logging.getLogger()
+
+
+# Maximum number of rows of a row group created by `ColumnarStore.compact`.
+ROW_GROUP_SIZE = 1000000
+
+FILTER_OPERATORS = {"==": operator.eq,
+                    "!=": operator.ne,
+                    "<": operator.lt,
+                    "<=": operator.le,
+                    ">": operator.gt,
+                    ">=": operator.ge,
+                    "in": np.isin}
+
+
+class _RowGroup:
+
+    """Lazy view of a row group file (NumPy .npz archive).
+
+    Numeric columns are saved as a single array together with their
+    minimum and maximum values. Any other column is dictionary-encoded,
+    i.e., it is saved as an array of unique values and an array of codes.
+    Arrays are only read from disk when they are first accessed.
+    """
+
+    def __init__(self, npz):
+        self._npz = npz
+        self.columns = list(npz["__columns__"])
+        self.num_rows = int(npz["__num_rows__"])
+
+    def is_encoded(self, col):
+        return "%s.codes" % col in self._npz.files
+
+    def get_column(self, col, mask=None):
+        if self.is_encoded(col):
+            values = self._npz["%s.values" % col].astype(object)
+            codes = self._npz["%s.codes" % col]
+            if mask is not None:
+                codes = codes[mask]
+            return values[codes]
+
+        data = self._npz[col]
+        return data if mask is None else data[mask]
+
+    def may_match(self, col, op, value):
+        """Check column statistics to decide if any row may satisfy the
+        predicate without reading the column."""
+        if self.num_rows == 0:
+            return False
+
+        if self.is_encoded(col):
+            values = self._npz["%s.values" % col]
+            return bool(np.any(FILTER_OPERATORS[op](values, value)))
+
+        col_min = self._npz["%s.min" % col]
+        col_max = self._npz["%s.max" % col]
+        if op == "==":
+            return bool(col_min <= value <= col_max)
+        elif op == "!=":
+            return not (col_min == value == col_max)
+        elif op == "<":
+            return bool(col_min < value)
+        elif op == "<=":
+            return bool(col_min <= value)
+        elif op == ">":
+            return bool(col_max > value)
+        elif op == ">=":
+            return bool(col_max >= value)
+        return any(col_min <= v <= col_max for v in value)
+
+    def evaluate(self, col, op, value):
+        """Return a boolean mask of the rows that satisfy the predicate."""
+        func = FILTER_OPERATORS[op]
+        if self.is_encoded(col):
+            # Evaluate the predicate only once per unique value.
+            values = self._npz["%s.values" % col]
+            return func(values, value)[self._npz["%s.codes" % col]]
+        return func(self._npz[col], value)
+
+
+class ColumnarStore:
+
+    """Store tables as columns split into row groups, so that it is possible
+    to read only the required columns and rows of a table.
+
+    Each table is a directory at ``path`` and each row group is a NumPy .npz
+    file inside it. New rows are always added as new row groups, which makes
+    it safe for multiple processes to append rows to the same table. Small row
+    groups can be merged later with :meth:`compact`.
+
+    Parameters
+    ----------
+    path : str
+        The directory where tables are saved.
+
+    Examples
+    --------
+
+    >>> from luna.util.store import ColumnarStore
+    >>> store = ColumnarStore("/tmp/store")
+    >>> store.append("interactions", {"entry": ["A", "A", "B"],
+    ...                               "interaction": ["Hydrogen bond",
+    ...                                               "Cation-pi",
+    ...                                               "Hydrogen bond"]})
+    >>> df = store.read("interactions", columns=["entry"],
+    ...                 filters=[("interaction", "==", "Hydrogen bond")])
+    >>> print(df["entry"].tolist())
+    ['A', 'B']
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def tables(self):
+        """list of str: The tables in this store."""
+        if not exists(self.path):
+            return []
+        return sorted([t for t in os.listdir(self.path)
+                       if os.path.isdir("%s/%s" % (self.path, t))])
+
+    def _get_row_groups(self, table):
+        return sorted(glob.glob("%s/%s/*.npz" % (self.path, table)))
+
+    def _write_row_group(self, table, columns, name=None):
+        arrays = {"__columns__": np.array(list(columns)),
+                  "__num_rows__": np.array(len(next(iter(columns.values()))))}
+
+        for col, data in columns.items():
+            if data.dtype.kind in "biuf":
+                arrays[col] = data
+                if len(data) > 0:
+                    arrays["%s.min" % col] = data.min()
+                    arrays["%s.max" % col] = data.max()
+            else:
+                # Pandas string arrays would be converted to object arrays,
+                # which cannot be loaded without pickle.
+                values, codes = np.unique(np.asarray(data, dtype=str),
+                                          return_inverse=True)
+                if values.dtype.kind != "U":
+                    raise IllegalArgumentError("Column '%s' cannot be stored "
+                                               "as strings (dtype: %s)."
+                                               % (col, values.dtype))
+                arrays["%s.values" % col] = values
+                arrays["%s.codes" % col] = codes.astype(np.int32)
+
+        table_path = "%s/%s" % (self.path, table)
+        os.makedirs(table_path, exist_ok=True)
+
+        # Row groups are named after their creation time, so that sorting
+        # them by name gives the order in which rows were appended.
+        if name is None:
+            name = "%020d" % time.time_ns()
+        name = "%s_%s" % (name, uuid.uuid4().hex)
+
+        # Write to a temporary file first, so that readers never see
+        # incomplete row groups.
+        tmp_file = "%s/.%s.tmp" % (table_path, name)
+        with open(tmp_file, "wb") as OUT:
+            np.savez(OUT, **arrays)
+
+        rg_file = "%s/%s.npz" % (table_path, name)
+        os.replace(tmp_file, rg_file)
+        return rg_file
+
+    def append(self, table, columns):
+        """Append rows to ``table`` as a new row group.
+
+        Parameters
+        ----------
+        table : str
+            The table name. A new table is created if it does not exist.
+        columns : dict
+            Map column names to sequences of values. All sequences must have
+            the same length.
+
+        Returns
+        -------
+         : str or None
+            The row group file or None if no rows were provided.
+
+        Raises
+        ------
+        IllegalArgumentError
+            If columns have different lengths.
+        """
+        columns = {col: np.asarray(data) for col, data in columns.items()}
+
+        sizes = set([len(data) for data in columns.values()])
+        if len(sizes) > 1:
+            raise IllegalArgumentError("All columns must have the same "
+                                       "number of rows.")
+
+        if not columns or sizes.pop() == 0:
+            return None
+
+        return self._write_row_group(table, columns)
+
+    def read(self, table, columns=None, filters=None):
+        """Read rows from ``table``.
+
+        Only the requested columns are read from disk. Row groups whose
+        statistics show that no row satisfies ``filters`` are skipped
+        without reading any of their columns.
+
+        Parameters
+        ----------
+        table : str
+            The table name.
+        columns : iterable of str, optional
+            The columns to read. If not provided, read all columns.
+        filters : iterable of tuple, optional
+            Select only rows that satisfy all predicates. Each predicate is a
+            tuple (column, operator, value), where operator can be '==',
+            '!=', '<', '<=', '>', '>=', or 'in'.
+
+        Returns
+        -------
+         : :class:`pandas.DataFrame`
+
+        Raises
+        ------
+        IllegalArgumentError
+            If an invalid operator or column was provided.
+        """
+        filters = list(filters or [])
+        for col, op, value in filters:
+            if op not in FILTER_OPERATORS:
+                raise IllegalArgumentError("Invalid filter operator '%s'. "
+                                           "Valid operators are: %s."
+                                           % (op, ", ".join(FILTER_OPERATORS)))
+
+        frames = []
+        for rg_file in self._get_row_groups(table):
+            with np.load(rg_file) as npz:
+                row_group = _RowGroup(npz)
+
+                target_cols = list(columns or row_group.columns)
+                invalid_cols = (set(target_cols + [f[0] for f in filters])
+                                - set(row_group.columns))
+                if invalid_cols:
+                    raise IllegalArgumentError("Columns not found in table "
+                                               "'%s': %s." %
+                                               (table,
+                                                ", ".join(invalid_cols)))
+
+                if not all(row_group.may_match(*f) for f in filters):
+                    continue
+
+                mask = None
+                for f in filters:
+                    f_mask = row_group.evaluate(*f)
+                    mask = f_mask if mask is None else mask & f_mask
+                if mask is not None and not mask.any():
+                    continue
+
+                frames.append(pd.DataFrame({col: row_group.get_column(col,
+                                                                      mask)
+                                            for col in target_cols},
+                                           columns=target_cols))
+
+        if not frames:
+            return pd.DataFrame(columns=list(columns or []))
+        return pd.concat(frames, ignore_index=True)
+
+    def compact(self, table, row_group_size=ROW_GROUP_SIZE):
+        """Merge small row groups of ``table`` into row groups of up to
+        ``row_group_size`` rows. The order of the rows is kept."""
+        rg_files = self._get_row_groups(table)
+        if len(rg_files) <= 1:
+            return
+
+        def flush(frames, merged_files):
+            if len(merged_files) > 1:
+                data = pd.concat(frames, ignore_index=True)
+                # The new row group takes the place of the first merged one.
+                name = basename(merged_files[0])[:-len(".npz")]
+                self._write_row_group(table, {col: data[col].to_numpy()
+                                              for col in data.columns},
+                                      name=name)
+                for rg_file in merged_files:
+                    os.remove(rg_file)
+
+        frames, merged_files, num_rows = [], [], 0
+        for rg_file in rg_files:
+            with np.load(rg_file) as npz:
+                row_group = _RowGroup(npz)
+
+                # Large row groups are kept as they are.
+                if row_group.num_rows >= row_group_size:
+                    flush(frames, merged_files)
+                    frames, merged_files, num_rows = [], [], 0
+                    continue
+
+                frames.append(pd.DataFrame({col: row_group.get_column(col)
+                                            for col in row_group.columns},
+                                           columns=row_group.columns))
+            merged_files.append(rg_file)
+            num_rows += len(frames[-1])
+
+            if num_rows >= row_group_size:
+                flush(frames, merged_files)
+                frames, merged_files, num_rows = [], [], 0
+
+        flush(frames, merged_files)
+
+        logger.debug("Table '%s' compacted into %d row group(s)."
+                     % (table, len(self._get_row_groups(table))))
+
+    def drop(self, table):
+        """Remove ``table`` and all of its rows."""
+        if table in self.tables:
+            remove_directory("%s/%s" % (self.path, table))
+
+    def __repr__(self):
+        return "<ColumnarStore: %s>" % basename(self.path.rstrip("/"))
@@ -1,10 +1,13 @@
+from contextlib import contextmanager
 from enum import Enum, unique
+from functools import lru_cache
 from rdkit.Chem import Atom as RDAtom
 from rdkit.Chem import Mol as RDMol
 from rdkit.Chem import Bond as RDBond
 from rdkit.Chem import BondType as RDBondType
-from rdkit.Chem import (MolFromSmiles, MolToSmiles, MolToPDBBlock,
-                        MolToMolBlock, GetPeriodicTable, GetFormalCharge)
+from rdkit.Chem import (MolFromSmiles, MolFromSmarts, MolToSmiles,
+                        MolToPDBBlock, MolToMolBlock, GetPeriodicTable,
+                        GetFormalCharge)
 from rdkit.Chem import rdFMCS
 
 from openbabel import openbabel as ob
@@ -21,6 +24,69 @@ import logging
 logger = logging.getLogger()
 
 
+# Maximum number of substructure matches returned by RDKit.
+MAX_SMARTS_MATCHES = 2 ** 31 - 1
+
+# Caches of SMARTS matches currently in use (see `cache_smarts_matches`).
+_SMARTS_MATCH_CACHES = []
+
+
+@contextmanager
+def cache_smarts_matches():
+    """Cache the SMARTS matches computed by
+    :py:meth:`AtomWrapper.matches_smarts` inside a ``with`` block, so that
+    each SMARTS is matched against a molecule only once.
+
+    **Note:** molecules should not be modified inside the block, otherwise
+    the cached matches may be outdated.
+
+    Examples
+    --------
+
+    >>> from luna.wrappers.base import MolWrapper, cache_smarts_matches
+    >>> mol_obj = MolWrapper.from_smiles("N[C@@H](CCC(N)=O)C(O)=O",
+    ...                                  mol_obj_type="openbabel")
+    >>> with cache_smarts_matches():
+    ...     print([atm.get_idx() for atm in mol_obj.get_atoms()
+    ...            if atm.matches_smarts("C(N)(C)=O")])
+    [5]
+    """
+    _SMARTS_MATCH_CACHES.append({})
+    try:
+        yield
+    finally:
+        _SMARTS_MATCH_CACHES.pop()
+
+
+@lru_cache(maxsize=1024)
+def _compile_ob_smarts(smarts):
+    ob_smart = ob.OBSmartsPattern()
+    ob_smart.Init(smarts)
+    return ob_smart
+
+
+@lru_cache(maxsize=1024)
+def _compile_rdkit_smarts(smarts):
+    return MolFromSmarts(smarts)
+
+
+def _get_smarts_matches(mol_obj, smarts):
+    # Return the indices of the atoms matching the first atom of ``smarts``.
+    if isinstance(mol_obj, RDMol):
+        query = _compile_rdkit_smarts(smarts)
+        if query is None:
+            return frozenset()
+        matches = mol_obj.GetSubstructMatches(query, uniquify=False,
+                                              maxMatches=MAX_SMARTS_MATCHES)
+    else:
+        ob_smart = _compile_ob_smarts(smarts)
+        matches = []
+        if ob_smart.Match(mol_obj):
+            matches = ob_smart.GetMapList()
+
+    return frozenset([match[0] for match in matches])
+
+
 @unique
 class BondType(Enum):
     """An enumeration of bond types available at RDKit."""
@@ -480,8 +546,9 @@ class AtomWrapper:
         """Check if this atom matches the substructure through a SMARTS
         substructure search.
 
-        **Note:** currently, this function only works with molecules
-        read with Open Babel.
+        The SMARTS is matched against the whole molecule. To match it only
+        once when checking several atoms of the same molecule, call this
+        function inside a :py:func:`cache_smarts_matches` block.
 
         Parameters
         ----------
@@ -490,9 +557,8 @@ class AtomWrapper:
 
         Returns
         -------
-         : bool or None
-            Whether matches occurred. Return None if the molecule was read
-            with RDKit.
+         : bool
+            Whether this atom matches the first atom of ``smarts``.
 
         Examples
         --------
@@ -522,21 +588,18 @@ class AtomWrapper:
         9   O   False
         10  O   False
         """
-        if self.is_rdkit_obj():
-            # TODO: Implement
-            error_msg = ("Currently, matches_smarts() does not support RDKit "
-                         "objects. Please, use Open Babel objects instead.")
-            raise NotImplementedError(error_msg)
-
-        elif self.is_openbabel_obj():
-            ob_smart = ob.OBSmartsPattern()
-            ob_smart.Init(smarts)
-
-            if ob_smart.Match(self.parent):
-                for match in ob_smart.GetMapList():
-                    if match[0] == self.get_idx():
-                        return True
-            return False
+        mol_obj = self.parent.unwrap()
+
+        if not _SMARTS_MATCH_CACHES:
+            return self.get_idx() in _get_smarts_matches(mol_obj, smarts)
+
+        cache = _SMARTS_MATCH_CACHES[-1]
+        key = (id(mol_obj), smarts)
+        if key not in cache:
+            # Keep a reference to the molecule, so that its id is not reused
+            # while the cache exists.
+            cache[key] = (mol_obj, _get_smarts_matches(mol_obj, smarts))
+        return self.get_idx() in cache[key][1]
 
     def unwrap(self):
         """Return the original atomic object.
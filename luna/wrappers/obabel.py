@@ -1,5 +1,6 @@
 from subprocess import Popen, PIPE, TimeoutExpired
 
+from openbabel.openbabel import OBConversion, OBMol, obErrorLog
 from openbabel.pybel import informats, outformats
 
 from luna.util.exceptions import (FileNotCreated, InvalidFileFormat,
@@ -214,3 +215,96 @@ ZINC000007786517.mol",
         return stdout.decode().strip()
 
     logger.debug("File '%s' created with success." % output_file)
+
+
+def convert_molecule_string(mol_string, input_format, output_format,
+                            opts=None):
+    """Convert a molecule in memory using Open Babel.
+
+    It produces the same output as :meth:`convert_molecule`, but without
+    creating temporary files or calling the Open Babel binary.
+
+    Parameters
+    ----------
+    mol_string : str
+        The molecule as a string (e.g., a PDB or MOL block).
+    input_format : str
+        The molecular format of ``mol_string``.
+    output_format : str
+        The molecular format of the output molecule.
+    opts : dict
+        A set of general convertion options (e.g., "h" or "p").
+        Check `Open Babel <https://openbabel.org/docs/dev/Command-line_tools/babel.html>`_
+        to discover which options are available.
+        The option "error-level" is ignored as Open Babel messages are never
+        displayed, just like in :meth:`convert_molecule`.
+
+    Returns
+    -------
+     : str
+        The converted molecule.
+
+    Raises
+    ------
+    InvalidFileFormat
+        If the provided molecular formats are not accepted by Open Babel.
+    ProcessingFailed
+        If the molecule could not be converted.
+
+    Examples
+    --------
+
+    In this example, we will convert the molecule ZINC000007786517 from
+    the format MOL to MOL2 and add hydrogens to it considering a pH of 7
+    (option "p").
+
+    >>> from luna.util.default_values import LUNA_PATH
+    >>> from luna.wrappers.obabel import convert_molecule_string
+    >>> with open(f"{LUNA_PATH}/tutorial/inputs/ZINC000007786517.mol") as IN:
+    ...     mol_block = IN.read()
+    >>> mol2_block = convert_molecule_string(mol_block, "mol", "mol2",
+    ...                                      opts={"p": 7})
+    """
+    if input_format not in informats:
+        msg = "Input format '%s' does not exist." % input_format
+        raise InvalidFileFormat(msg)
+
+    if output_format not in outformats:
+        msg = "Output format '%s' does not exist." % output_format
+        raise InvalidFileFormat(msg)
+
+    conv = OBConversion()
+    conv.SetInAndOutFormats(input_format, output_format)
+
+    opts = opts or {}
+    for key in opts:
+        if key == "error-level":
+            continue
+
+        if opts[key] is None:
+            conv.AddOption(key, OBConversion.GENOPTIONS)
+        else:
+            conv.AddOption(key, OBConversion.GENOPTIONS, str(opts[key]))
+
+    # Silence Open Babel while converting the molecule.
+    output_level = obErrorLog.GetOutputLevel()
+    obErrorLog.SetOutputLevel(-1)
+    try:
+        ob_mol = OBMol()
+        if not conv.ReadString(ob_mol, mol_string):
+            raise ProcessingFailed("The provided molecule could not be "
+                                   "converted.")
+
+        # Apply general options as the Open Babel binary does.
+        ob_mol.DoTransformations(conv.GetOptions(OBConversion.GENOPTIONS),
+                                 conv)
+
+        output = conv.WriteString(ob_mol)
+    finally:
+        obErrorLog.SetOutputLevel(output_level)
+
+    if not output:
+        raise ProcessingFailed("The provided molecule could not be "
+                               "converted.")
+
+    return output
@@ -1,6 +1,6 @@
 from rdkit.Chem import (MolFromMol2File, MolFromPDBFile, MolFromMolFile,
-                        MolFromMolBlock, MolFromMol2Block, SanitizeFlags,
-                        SanitizeMol)
+                        MolFromMolBlock, MolFromMol2Block, MolFromPDBBlock,
+                        SanitizeFlags, SanitizeMol)
 from xopen import xopen
 
 from luna.util.file import get_file_format
@@ -8,6 +8,7 @@ from luna.util.exceptions import IllegalArgumentError
 
 import re
 import logging
+from io import StringIO
 
 logger = logging.getLogger()
 
@@ -120,6 +121,10 @@ def new_mol_from_block(block, mol_format, sanitize=True, removeHs=True):
         # First it creates the molecule without applying the
         # sanitization function.
         rdk_mol = MolFromMol2Block(block, sanitize=False, removeHs=removeHs)
+    elif mol_format == "pdb":
+        # First it creates the molecule without applying the
+        # sanitization function.
+        rdk_mol = MolFromPDBBlock(block, sanitize=False, removeHs=removeHs)
     elif mol_format in RDKIT_FORMATS:
         # First it creates the molecule without applying the
         # sanitization function.
@@ -204,6 +209,61 @@ inputs/ligands.mol2",
      ZINC000096459890
     """
 
+    ext = mol_format or get_file_format(mol_file, ignore_compression=True)
+
+    if ext not in RDKIT_FORMATS:
+        raise IllegalArgumentError("Format '%s' informed or assumed from the "
+                                   "filename is invalid. The accepted formats "
+                                   "are: %s."
+                                   % (ext, ",".join(RDKIT_FORMATS)))
+
+    with xopen(mol_file, "r") as IN:
+        yield from _read_multimol(IN, mol_file, ext, targets,
+                                  sanitize, removeHs)
+
+
+def read_multimol_string(mol_string,
+                         mol_format,
+                         targets=None,
+                         sanitize=True,
+                         removeHs=True):
+    """Read molecules from a string containing one or more molecular blocks
+    using RDKit. Blocks are parsed exactly as in :meth:`read_multimol_file`.
+
+    Parameters
+    ----------
+    mol_string : str
+        The molecular blocks.
+    mol_format : str
+        The molecular format of ``mol_string``.
+    targets : iterable of str
+        Only parses molecules, given by their ids, defined in ``targets``.
+    sanitize : bool
+        If True (the default), sanitize the molecule.
+    removeHs : bool
+        If True (the default), remove explict hydrogens from the molecule.
+
+    Yields
+    -------
+     : tuple of (:class:`rdkit.Chem.rdchem.Mol`, int)
+        A tuple containing the parsed molecule and its id.
+
+    Raises
+    ------
+    IllegalArgumentError
+        If the provided molecular format is not accepted by RDKit.
+    """
+    if mol_format not in RDKIT_FORMATS:
+        raise IllegalArgumentError("Format '%s' is invalid. The accepted "
+                                   "formats are: %s."
+                                   % (mol_format, ",".join(RDKIT_FORMATS)))
+
+    yield from _read_multimol(StringIO(mol_string), "<string>", mol_format,
+                              targets, sanitize, removeHs)
+
+
+def _read_multimol(IN, mol_file, ext, targets, sanitize, removeHs):
+
     def apply_mol_format(lines):
         # Check if the MOL file contains a valid header comprising a Title
         # line, Program/file timestamp line, and a Comment line.
@@ -235,127 +295,118 @@ inputs/ligands.mol2",
             lines.append("M  END\n")
         return lines
 
-    ext = mol_format or get_file_format(mol_file, ignore_compression=True)
-
-    if ext not in RDKIT_FORMATS:
-        raise IllegalArgumentError("Format '%s' informed or assumed from the "
-                                   "filename is invalid. The accepted formats "
-                                   "are: %s."
-                                   % (ext, ",".join(RDKIT_FORMATS)))
+    if targets is not None:
+        targets = set(targets)
 
-    with xopen(mol_file, "r") as IN:
-        if targets is not None:
-            targets = set(targets)
-
-        mol = []
-        ignore_lines = False
-        line_count = 0
-        while True:
-            try:
-                line = IN.readline()
-                line_count += 1
-                # readline() returns empty strings when EOF is reached.
-                if not line:
-                    raise StopIteration
-                # Ignore new lines before a molecule block.
-                if len(mol) == 0 and line == "\n":
+    mol = []
+    ignore_lines = False
+    line_count = 0
+    while True:
+        try:
+            line = IN.readline()
+            line_count += 1
+            # readline() returns empty strings when EOF is reached.
+            if not line:
+                raise StopIteration
+            # Ignore new lines before a molecule block.
+            if len(mol) == 0 and line == "\n":
+                continue
+            # Save the line in which the new molecule starts.
+            if len(mol) == 0:
+                mol_starts_at = line_count
+
+            if ext == "mol2":
+                if line.startswith("#"):
                     continue
-                # Save the line in which the new molecule starts.
-                if len(mol) == 0:
-                    mol_starts_at = line_count
-
-                if ext == "mol2":
-                    if line.startswith("#"):
-                        continue
-                    # New molecule block definition is starting...
-                    if line.startswith("@<TRIPOS>MOLECULE"):
-                        # New molecule identified but an old one
-                        # already exists.
-                        if mol:
-                            mol_id = mol[1].strip()
-                            # If a target list is not informed, create a new
-                            # molecule object.
-                            if targets is None:
-                                # Create a new RDKit object
-                                rdk_mol = new_mol_from_block("".join(mol),
-                                                             ext,
-                                                             sanitize,
-                                                             removeHs)
-                                yield ((rdk_mol, mol_id))
-                            # Otherwise, create a new molecule only if it
-                            # is in the list.
-                            elif mol_id in targets:
-                                targets.remove(mol_id)
-                                # Create a new RDKit object
-                                rdk_mol = new_mol_from_block("".join(mol),
-                                                             ext,
-                                                             sanitize,
-                                                             removeHs)
-                                yield ((rdk_mol, mol_id))
-                        # Restart the molecule block.
-                        mol = []
-                    mol.append(line)
-                else:
-                    if line.startswith("M  END"):
-                        mol.append(line)
-                        # Fix the MOL block in cases where the header or end
-                        # lines do not match the MOL file format.
-                        mol = apply_mol_format(mol)
-                        mol_id = mol[0].strip()
-
-                        # If a target list is informed, create a new molecule
-                        # only if it is in the list.
+                # New molecule block definition is starting...
+                if line.startswith("@<TRIPOS>MOLECULE"):
+                    # New molecule identified but an old one
+                    # already exists.
+                    if mol:
+                        mol_id = mol[1].strip()
+                        # If a target list is not informed, create a new
+                        # molecule object.
                         if targets is None:
                             # Create a new RDKit object
                             rdk_mol = new_mol_from_block("".join(mol),
                                                          ext,
                                                          sanitize,
                                                          removeHs)
-                            yield((rdk_mol, mol_id))
-
-                        elif mol[0].strip() in targets:
+                            yield ((rdk_mol, mol_id))
+                        # Otherwise, create a new molecule only if it
+                        # is in the list.
+                        elif mol_id in targets:
                             targets.remove(mol_id)
                             # Create a new RDKit object
                             rdk_mol = new_mol_from_block("".join(mol),
                                                          ext,
                                                          sanitize,
                                                          removeHs)
-                            yield((rdk_mol, mol_id))
-                        # Restart the molecule block.
-                        mol = []
-                        # After finding a molecule block, ignore any following
-                        # lines until it finds a line "$$$$".
-                        ignore_lines = True
-                    elif line.startswith("$$$$") is False:
-                        # Ignore lines util it finds a line "$$$$".
-                        if ignore_lines:
-                            continue
-                        mol.append(line)
-                    else:
-                        ignore_lines = False
-
-            except StopIteration:
-                if mol:
-                    if ext == "mol":
-                        # Fix the MOL block in cases where the header or end
-                        # lines do not match the MOL file format.
-                        mol = apply_mol_format(mol)
-
-                    mol_id = (mol[1].strip() if ext == "mol2"
-                              else mol[0].strip())
-
-                    # If a target list is informed, create a new molecule only
-                    # if it is in the list.
-                    if (targets is None
-                            or (targets is not None and mol_id in targets)):
+                            yield ((rdk_mol, mol_id))
+                    # Restart the molecule block.
+                    mol = []
+                mol.append(line)
+            else:
+                if line.startswith("M  END"):
+                    mol.append(line)
+                    # Fix the MOL block in cases where the header or end
+                    # lines do not match the MOL file format.
+                    mol = apply_mol_format(mol)
+                    mol_id = mol[0].strip()
+
+                    # If a target list is informed, create a new molecule
+                    # only if it is in the list.
+                    if targets is None:
                         # Create a new RDKit object
                         rdk_mol = new_mol_from_block("".join(mol),
                                                      ext,
                                                      sanitize,
                                                      removeHs)
-                        yield ((rdk_mol, mol_id))
-                break
+                        yield((rdk_mol, mol_id))
 
-            # If all target compounds were already found, just break the loop.
-            if targets is not None and len(targets) == 0:
-                break
+                    elif mol[0].strip() in targets:
+                        targets.remove(mol_id)
+                        # Create a new RDKit object
+                        rdk_mol = new_mol_from_block("".join(mol),
+                                                     ext,
+                                                     sanitize,
+                                                     removeHs)
+                        yield((rdk_mol, mol_id))
+                    # Restart the molecule block.
+                    mol = []
+                    # After finding a molecule block, ignore any following
+                    # lines until it finds a line "$$$$".
+                    ignore_lines = True
+                elif line.startswith("$$$$") is False:
+                    # Ignore lines util it finds a line "$$$$".
+                    if ignore_lines:
+                        continue
+                    mol.append(line)
+                else:
+                    ignore_lines = False
+
+        except StopIteration:
+            if mol:
+                if ext == "mol":
+                    # Fix the MOL block in cases where the header or end
+                    # lines do not match the MOL file format.
+                    mol = apply_mol_format(mol)
+
+                mol_id = (mol[1].strip() if ext == "mol2"
+                          else mol[0].strip())
+
+                # If a target list is informed, create a new molecule only
+                # if it is in the list.
+                if (targets is None
+                        or (targets is not None and mol_id in targets)):
+                    # Create a new RDKit object
+                    rdk_mol = new_mol_from_block("".join(mol),
+                                                 ext,
+                                                 sanitize,
+                                                 removeHs)
+                    yield ((rdk_mol, mol_id))
+            break
+
+        # If all target compounds were already found, just break the loop.
+        if targets is not None and len(targets) == 0:
+            break
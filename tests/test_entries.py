@@ -214,3 +214,110 @@ class TestEntry:
         assert entry.get_biopython_key() == ("W", 104, " ")
 
 
+
+
+class TestMolFileIndex:
+
+    def test_index(self, tmp_path, monkeypatch):
+        import json
+        import shutil
+        from openbabel import pybel
+        from luna.util.default_values import LUNA_PATH
+
+        index_path = str(tmp_path / "mol_index")
+        monkeypatch.setattr(MolFileIndex, "index_path", index_path)
+
+        mol2_file = str(tmp_path / "ligands.mol2")
+        shutil.copy(f"{LUNA_PATH}/example/inputs/ligands.mol2", mol2_file)
+        mols = list(pybel.readfile("mol2", mol2_file))
+        sdf_file = str(tmp_path / "ligands.sdf")
+        with open(sdf_file, "w") as OUT:
+            for mol in mols:
+                OUT.write(mol.write("sdf"))
+
+        for mol_file in [mol2_file, sdf_file]:
+            index = MolFileIndex.get_index(mol_file)
+            assert list(index.offsets) == [m.title for m in mols]
+            # Indices are shared by the current process.
+            assert MolFileIndex.get_index(mol_file) is index
+
+            # Saved indices are plain JSON files, which can be loaded by
+            # other processes.
+            index_file = MolFileIndex.get_index_file(mol_file)
+            assert index_file.startswith(index_path)
+            with open(index_file) as IN:
+                assert len(json.load(IN)["offsets"]) == len(mols)
+            with monkeypatch.context() as m:
+                m.setattr(MolFileIndex, "_indices", {})
+                loaded = MolFileIndex.get_index(mol_file)
+                assert loaded is not index
+                assert loaded.offsets == index.offsets
+
+            # Molecules read from the index are the same as the ones
+            # read by parsing the file sequentially.
+            for mol_obj_type in ["rdkit", "openbabel"]:
+                smiles = []
+                for use_index in [True, False]:
+                    with monkeypatch.context() as m:
+                        if not use_index:
+                            m.setattr(MolFileIndex, "get_index",
+                                      lambda *args: None)
+
+                        smiles.append([
+                            MolFileEntry.from_mol_file(
+                                "protein", mol.title, mol_file, True,
+                                mol_obj_type=mol_obj_type,
+                                autoload=True).mol_obj.to_smiles()
+                            for mol in mols])
+                assert smiles[0] == smiles[1]
+
+        # Any change in the file invalidates its index.
+        with open(sdf_file, "a") as OUT:
+            OUT.write(mols[0].write("sdf").replace(mols[0].title, "new_mol"))
+        assert not index.is_valid
+        new_index = MolFileIndex.get_index(sdf_file)
+        assert new_index is not index
+        assert "new_mol" in new_index.offsets
+
+        # Molecules without a name (blank header line) are not indexed.
+        blocks = [mol.write("sdf") for mol in mols[:2]]
+        blocks[0] = "\n" + blocks[0].split("\n", 1)[1]
+        with open(sdf_file, "w") as OUT:
+            OUT.write("".join(blocks))
+        index = MolFileIndex.get_index(sdf_file)
+        assert list(index.offsets) == [mols[1].title]
+        assert index.get_block(mols[1].title) == blocks[1]
+
+        # Nothing is saved next to the indexed files.
+        assert sorted(p.name for p in tmp_path.iterdir()) == \
+            ["ligands.mol2", "ligands.sdf", "mol_index"]
+
+    def test_not_indexed(self, tmp_path):
+        from openbabel import pybel
+        from luna.util.default_values import LUNA_PATH
+
+        mols = list(pybel.readfile("mol2", f"{LUNA_PATH}/example/inputs/"
+                                           "ligands.mol2"))[:2]
+
+        # The blank line before the second molecule is ignored when the file
+        # is parsed sequentially, but the molecule is not indexed.
+        sdf_file = str(tmp_path / "ligands.sdf")
+        with open(sdf_file, "w") as OUT:
+            OUT.write("\n".join(mol.write("sdf") for mol in mols))
+
+        index = MolFileIndex.get_index(sdf_file)
+        assert list(index.offsets) == [mols[0].title]
+        # Indices are not saved if no index path was set.
+        assert MolFileIndex.get_index_file(sdf_file) is None
+
+        single_file = str(tmp_path / "single.sdf")
+        with open(single_file, "w") as OUT:
+            OUT.write(mols[1].write("sdf"))
+
+        # Molecules not found in the index are read sequentially.
+        smiles = [MolFileEntry.from_mol_file("protein", mols[1].title,
+                                             mol_file, is_multimol_file,
+                                             autoload=True).mol_obj.to_smiles()
+                  for mol_file, is_multimol_file in [(sdf_file, True),
+                                                     (single_file, False)]]
+        assert smiles[0] == smiles[1]
@@ -10,7 +10,8 @@ from luna import LocalProject
 from luna.mol.entry import *
 from luna.interaction.filter import InteractionFilter
 from luna.interaction.calc import InteractionCalculator
-from luna.interaction.fp.shell import ShellGenerator
+from luna.interaction.fp import shell as shell_module
+from luna.interaction.fp.shell import ShellGenerator, ShellManager
 from luna.interaction.fp.type import IFPType
 from luna.util.file import create_directory, remove_files
 from luna.util.default_values import LUNA_PATH
@@ -28,6 +29,17 @@ test_ligs = ["ZINC000012442563", "ZINC000343043015"]
 expected_entries = set(["protein:%s" % lig_id for lig_id in test_ligs])
 
 
+class LinearShellManager(ShellManager):
+    """Find similar shells by scanning all previously added shells."""
+
+    def find_similar_shell(self, shell):
+        for added_shell in self.shells:
+            if added_shell.is_valid():
+                if shell.is_similar(added_shell):
+                    return added_shell
+        return None
+
+
 class TestFingerprint:
 
     def _get_project_results(self):
@@ -118,6 +130,17 @@ class TestFingerprint:
         curr_df = pd.read_csv(ifp_out1)
         assert expected_df.equals(curr_df)
 
+        # IFPs are also saved in a binary format.
+        from luna.interaction.fp.matrix import FingerprintMatrix
+        ifp_matrix = FingerprintMatrix.load(f"{ifp_path}/ifp_out1.npz")
+        assert ifp_matrix.names == expected_df["ligand_id"].tolist()
+        assert ifp_matrix.props["ifp_length"] == 4096
+        for fp, (_, row) in zip(ifp_matrix.to_fingerprints(),
+                                expected_df.iterrows()):
+            bits = [int(b) for b in row["on_bits"].split("\t")]
+            counts = [int(c) for c in row["count"].split("\t")]
+            assert fp.counts == dict(zip(bits, counts))
+
         pli_obj.calc_ifp = True
         pli_obj.ifp_length = 4
         pli_obj.generate_fps()
@@ -183,4 +206,247 @@ class TestFingerprint:
                                                ifp_radius_step=1)
         assert expected_results["ifps"][idx] != ifp_as_str
 
+    def test_indexed_shell_deduplication(self, monkeypatch):
+
+        pli_obj = self._get_project_results()
 
+        def create_shells(agm):
+            shells = ShellGenerator(5, 1,
+                                    diff_comp_classes=True,
+                                    ifp_type=IFPType.EIFP)
+            return shells.create_shells(agm)
+
+        for r in pli_obj.results:
+            sm = create_shells(r.atm_grps_mngr)
+
+            with monkeypatch.context() as m:
+                m.setattr(shell_module, "ShellManager", LinearShellManager)
+                legacy_sm = create_shells(r.atm_grps_mngr)
+
+            assert ([(s.level, s.identifier, s.is_valid())
+                     for s in sm.shells]
+                    == [(s.level, s.identifier, s.is_valid())
+                        for s in legacy_sm.shells])
+
+            ifp = sm.to_fingerprint(count_fp=True, fold_to_length=4096)
+            legacy_ifp = legacy_sm.to_fingerprint(count_fp=True,
+                                                  fold_to_length=4096)
+            assert ifp.counts == legacy_ifp.counts
+
+
+class TestFingerprintMatrix:
+
+    def test_similarity(self):
+        import numpy as np
+        from rdkit import DataStructs
+        from luna.interaction.fp.fingerprint import CountFingerprint
+        from luna.interaction.fp.matrix import FingerprintMatrix
+
+        np.random.seed(0)
+        fps = [CountFingerprint.from_indices(np.random.randint(0, 256, 20),
+                                             fp_length=256)
+               for i in range(30)]
+        fps.append(CountFingerprint(counts={}, fp_length=256))
+        fp_matrix = FingerprintMatrix.from_fingerprints(fps)
+
+        rdkit_fps = [fp.to_rdkit() for fp in fps]
+        funcs = {"tanimoto": DataStructs.FingerprintSimilarity,
+                 "dice": DataStructs.DiceSimilarity}
+        for metric, func in funcs.items():
+            expected = np.array([[func(fp1, fp2) for fp2 in rdkit_fps]
+                                 for fp1 in rdkit_fps])
+            # Empty fingerprints have no similarity to any other, including
+            # themselves (older RDKit versions return 1 for Tanimoto).
+            expected[-1, :] = expected[:, -1] = 0
+            sim = fp_matrix.calc_similarity(metric=metric, block_size=7,
+                                            nproc=2)
+            assert np.allclose(sim, expected)
+
+            # Blocks only keep similarities above a threshold.
+            blocks = [block.toarray() for _, block
+                      in fp_matrix.iter_similarity_blocks(metric=metric,
+                                                          threshold=0.1,
+                                                          block_size=7)]
+            assert np.allclose(np.vstack(blocks),
+                               np.where(expected >= 0.1, expected, 0))
+
+        # Tanimoto over counts: sum of minimum / sum of maximum counts.
+        counts1, counts2 = fps[0].counts, fps[1].counts
+        bits = set(counts1) | set(counts2)
+        expected = (sum([min(counts1.get(b, 0), counts2.get(b, 0))
+                         for b in bits])
+                    / sum([max(counts1.get(b, 0), counts2.get(b, 0))
+                           for b in bits]))
+        sim = fp_matrix.calc_similarity(metric="count_tanimoto")
+        assert np.isclose(sim[0, 1], expected)
+        assert sim[-1, -1] == 0
+
+        # The same holds for all metrics and for the blocks.
+        for metric in ["tanimoto", "dice", "tversky"]:
+            assert fp_matrix.calc_similarity(metric=metric)[-1, -1] == 0
+            blocks = [block.toarray() for _, block
+                      in fp_matrix.iter_similarity_blocks(metric=metric,
+                                                          threshold=0)]
+            assert np.vstack(blocks)[-1, -1] == 0
+
+        assert [fp.counts for fp in fp_matrix.to_fingerprints()] == \
+            [fp.counts for fp in fps]
+
+    def test_save_similarity(self, tmp_path, monkeypatch):
+        import numpy as np
+        from luna.interaction.fp import matrix as matrix_module
+        from luna.interaction.fp.fingerprint import Fingerprint
+        from luna.interaction.fp.matrix import FingerprintMatrix
+
+        np.random.seed(0)
+        fps = [Fingerprint.from_indices(np.random.randint(0, 64, 10),
+                                        fp_length=64)
+               for i in range(20)]
+        fp_matrix = FingerprintMatrix.from_fingerprints(fps[:12])
+        other = FingerprintMatrix.from_fingerprints(fps[12:])
+
+        # Similarities are written in small batches.
+        monkeypatch.setattr(matrix_module, "WRITE_BATCH_SIZE", 5)
+
+        output_file = str(tmp_path / "sim.csv")
+        for threshold in [None, 0.2]:
+            for other_matrix in [None, other]:
+                target = fp_matrix if other_matrix is None else other_matrix
+                sim = fp_matrix.calc_similarity(target)
+
+                expected = []
+                for i, j in np.ndindex(sim.shape):
+                    if other_matrix is None and i >= j:
+                        continue
+                    if threshold is not None and sim[i, j] < threshold:
+                        continue
+                    expected.append((fp_matrix.names[i], target.names[j],
+                                     sim[i, j]))
+
+                for block_size in [None, 5]:
+                    fp_matrix.save_similarity(output_file, other_matrix,
+                                              threshold=threshold,
+                                              block_size=block_size, nproc=2)
+                    df = pd.read_csv(output_file, dtype={"entry1": str,
+                                                         "entry2": str})
+                    assert list(zip(df["entry1"], df["entry2"])) == \
+                        [(n1, n2) for n1, n2, _ in expected]
+                    assert np.allclose(df["similarity"],
+                                       [s for _, _, s in expected])
+
+    def test_save_and_load(self, tmp_path):
+        import numpy as np
+        from scipy.sparse import load_npz
+        from luna.interaction.fp.fingerprint import CountFingerprint
+        from luna.interaction.fp.matrix import (FingerprintMatrix,
+                                                FingerprintWriter)
+
+        np.random.seed(0)
+        fps = [CountFingerprint.from_indices(np.random.randint(0, 256, 20),
+                                             fp_length=256)
+               for i in range(10)]
+        fps.append(CountFingerprint(counts={}, fp_length=256))
+        names = ["fp%d" % i for i in range(len(fps))]
+        props = {"ifp_length": 256, "ifp_count": True}
+
+        npz_file = str(tmp_path / "fps.npz")
+        fp_matrix = FingerprintMatrix.from_fingerprints(fps, names)
+        fp_matrix.props = props
+        fp_matrix.save(npz_file)
+
+        writer_file = str(tmp_path / "writer.npz")
+        with FingerprintWriter(writer_file, 256, props) as writer:
+            for fp, name in zip(fps, names):
+                writer.write(fp, name)
+        assert not list(tmp_path.glob("*.tmp"))
+
+        for input_file in [npz_file, writer_file]:
+            loaded = FingerprintMatrix.load(input_file)
+            assert loaded.names == names
+            assert loaded.props == props
+            assert (loaded.matrix != fp_matrix.matrix).nnz == 0
+            assert ([fp.counts for fp in loaded.to_fingerprints()]
+                    == [fp.counts for fp in fps])
+            assert ([list(fp.indices)
+                     for fp in loaded.to_fingerprints(count_fp=False)]
+                    == [list(fp.indices) for fp in fps])
+
+            # The matrix can also be loaded directly with SciPy.
+            assert (load_npz(input_file) != fp_matrix.matrix).nnz == 0
+
+
+class TestFingerprintIndex:
+
+    def test_search(self, tmp_path):
+        import numpy as np
+        from luna.interaction.fp.fingerprint import Fingerprint
+        from luna.interaction.fp.matrix import FingerprintMatrix
+        from luna.interaction.fp.search import FingerprintIndex
+
+        np.random.seed(0)
+        fps = [Fingerprint.from_indices(np.random.randint(0, 256, size),
+                                        fp_length=256)
+               for size in np.random.randint(1, 40, 60)]
+        fps.append(Fingerprint(indices=[], fp_length=256))
+        names = ["fp%d" % i for i in range(len(fps))]
+        fp_matrix = FingerprintMatrix.from_fingerprints(fps, names)
+        sims = fp_matrix.calc_similarity()
+
+        # Fingerprints are added in two segments.
+        index = FingerprintIndex(256)
+        assert index.add(FingerprintMatrix.from_fingerprints(fps[:30],
+                                                             names[:30])) == 30
+        assert index.add(fp_matrix) == len(fps) - 30
+        assert index.num_segments == 2
+
+        def brute_force(row):
+            return sorted([(names[i], sims[row, i])
+                           for i in range(len(names))],
+                          key=lambda x: (-x[1], x[0]))
+
+        def check(index):
+            for row in [0, 10, 45, len(fps) - 1]:
+                expected = brute_force(row)
+                hits = index.search(fps[row], k=5)
+                assert [h[0] for h in hits] == [e[0] for e in expected[:5]]
+                assert np.allclose([h[1] for h in hits],
+                                   [e[1] for e in expected[:5]])
+
+                for threshold in [0, 0.2, 0.5]:
+                    hits = index.search_threshold(fps[row], threshold)
+                    assert ([h[0] for h in hits]
+                            == [e[0] for e in expected if e[1] >= threshold])
+
+        check(index)
+
+        # An empty query has no similarity to empty fingerprints.
+        assert index.search_threshold(fps[-1], 0.5) == []
+        assert "fp60" not in [h[0] for h in
+                              index.search_threshold(fps[-1], 1e-6)]
+
+        index_path = str(tmp_path / "ifp_index")
+        index.save(index_path)
+        loaded = FingerprintIndex.load(index_path)
+        assert loaded.names == index.names
+        check(loaded)
+
+        # Files that are not segments of the index are kept.
+        other_file = tmp_path / "ifp_index" / "ifp.npz"
+        other_file.write_bytes(b"")
+
+        loaded.compact()
+        assert loaded.num_segments == 1
+        loaded.save(index_path)
+        assert len(list(tmp_path.glob("ifp_index/*.npz"))) == 2
+        assert other_file.exists()
+        check(FingerprintIndex.load(index_path))
+
+        # Removing fingerprints creates new segments without them.
+        assert index.remove(["fp0", "fp45", "fp100"]) == 2
+        assert index.num_segments == 2
+        assert index.names == set(names) - {"fp0", "fp45"}
+        hits = index.search_threshold(fps[10], 0)
+        assert [h[0] for h in hits] == [e[0] for e in brute_force(10)
+                                        if e[0] not in ["fp0", "fp45"]]
+        assert index.remove(names) == len(names) - 2
+        assert index.num_segments == 0
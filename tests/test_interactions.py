@@ -0,0 +1,253 @@
+import sys
+from os.path import dirname, abspath
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from collections import defaultdict
+from itertools import combinations, product
+
+from luna.interaction.calc import InteractionCalculator
+from luna.interaction.filter import InteractionFilter
+from luna.interaction.type import InteractionType
+
+
+def _legacy_dependent_interactions(calc, interactions):
+    # Implementation of InteractionCalculator.find_dependent_interactions
+    # before dependent interactions were indexed by atoms.
+    hbond_set = set()
+    ionic_set = set()
+    h2o_pairs = defaultdict(dict)
+    dependent_interactions = set()
+
+    for inter in interactions:
+        if inter.type == "Hydrogen bond":
+            comp1 = next(iter(inter.src_grp.compounds))
+            comp2 = next(iter(inter.trgt_grp.compounds))
+
+            if comp1.is_water():
+                if inter.trgt_grp not in h2o_pairs[inter.src_grp]:
+                    h2o_pairs[inter.src_grp][inter.trgt_grp] = inter
+
+            if comp2.is_water():
+                if inter.src_grp not in h2o_pairs[inter.trgt_grp]:
+                    h2o_pairs[inter.trgt_grp][inter.src_grp] = inter
+
+            hbond_set.add(inter)
+        elif inter.type == "Ionic":
+            ionic_set.add(inter)
+
+    for h2o_key in h2o_pairs:
+        pairs = combinations(h2o_pairs[h2o_key].keys(), 2)
+        for src_grp, trgt_grp in pairs:
+            if isinstance(calc.inter_filter, InteractionFilter):
+                if not calc.inter_filter.is_valid_pair(src_grp, trgt_grp):
+                    continue
+
+            params = {"depends_on": [h2o_pairs[h2o_key][src_grp],
+                                     h2o_pairs[h2o_key][trgt_grp]]}
+            inter = InteractionType(src_grp, trgt_grp,
+                                    "Water-bridged hydrogen bond",
+                                    directional=True, params=params)
+            dependent_interactions.add(inter)
+
+    sb_groups = set()
+    for hbond, ionic in product(hbond_set, ionic_set):
+        condA = (ionic.src_grp.has_atom(hbond.src_grp.atoms[0])
+                 and ionic.trgt_grp.has_atom(hbond.trgt_grp.atoms[0]))
+        condB = (ionic.src_grp.has_atom(hbond.trgt_grp.atoms[0])
+                 and ionic.trgt_grp.has_atom(hbond.src_grp.atoms[0]))
+
+        if condA ^ condB:
+            key1 = (ionic.src_grp, ionic.trgt_grp)
+            key2 = (ionic.trgt_grp, ionic.src_grp)
+            if key1 in sb_groups or key2 in sb_groups:
+                continue
+
+            if isinstance(calc.inter_filter, InteractionFilter):
+                if not calc.inter_filter.is_valid_pair(ionic.src_grp,
+                                                       ionic.trgt_grp):
+                    continue
+
+            sb_groups.add(key1)
+            params = {"depends_on": [hbond, ionic]}
+            inter = InteractionType(ionic.src_grp, ionic.trgt_grp,
+                                    "Salt bridge", params=params)
+            dependent_interactions.add(inter)
+
+    return dependent_interactions
+
+
+def _get_keys(interactions):
+    return sorted([(inter.type, id(inter.src_grp), id(inter.trgt_grp),
+                    tuple(id(i) for i in inter.params["depends_on"]))
+                   for inter in interactions])
+
+
+class TestDependentInteractions:
+
+    def _get_atoms(self, tmp_path):
+        from luna.MyBio.PDB.PDBParser import PDBParser
+        from luna.mol.atom import ExtendedAtom
+
+        residues = ([("ATOM", resname, i + 1, "A")
+                     for i, resname in enumerate(["ASP", "LYS", "ARG", "GLU",
+                                                  "SER", "HIS"] * 2)]
+                    + [("HETATM", "LIG", 100, "B")]
+                    + [("HETATM", "HOH", 200 + i, "W") for i in range(12)])
+
+        pdb_file = str(tmp_path / "dep.pdb")
+        with open(pdb_file, "w") as OUT:
+            serial = 1
+            for record, resname, resseq, chain in residues:
+                names = ["O"] if resname == "HOH" else ["N", "C", "O"]
+                for name in names:
+                    # Coordinates are not used by dependent interactions.
+                    coord = (serial * 1.1, serial * 0.7 % 5, serial % 3)
+                    OUT.write("%-6s%5d  %-3s %3s %1s%4d    %8.3f%8.3f%8.3f"
+                              "  1.00 10.00          %2s\n"
+                              % ((record, serial, name, resname, chain,
+                                  resseq) + coord + (name, )))
+                    serial += 1
+            OUT.write("END\n")
+
+        structure = PDBParser(QUIET=True).get_structure("dep", pdb_file)
+        return [ExtendedAtom(atm) for atm in structure.get_atoms()]
+
+    def _get_interactions(self, atoms, seed):
+        import random
+        from luna.mol.groups import AtomGroup
+
+        random.seed(seed)
+
+        by_res = defaultdict(list)
+        for atm in atoms:
+            by_res[atm.parent].append(atm)
+
+        # Several groups per compound, which share atoms.
+        groups = []
+        for res, res_atoms in by_res.items():
+            if res.is_water():
+                groups.append(AtomGroup(res_atoms))
+                continue
+            for size in [1, 1, 2, 3]:
+                groups.append(AtomGroup(random.sample(res_atoms, size)))
+
+        h2o_grps = [g for g in groups
+                    if next(iter(g.compounds)).is_water()]
+        interactions = []
+        for i in range(400):
+            grp1, grp2 = random.sample(groups, 2)
+            inter_type = random.choice(["Hydrogen bond", "Hydrogen bond",
+                                        "Ionic", "Hydrophobic"])
+            interactions.append(InteractionType(grp1, grp2, inter_type))
+
+            # Hydrogen bonds with waters.
+            if i % 2 == 0:
+                grp1 = random.choice(h2o_grps)
+                grp2 = random.choice(groups)
+                if grp1 != grp2:
+                    inter = InteractionType(*random.sample([grp1, grp2], 2),
+                                            "Hydrogen bond")
+                    interactions.append(inter)
+        return interactions
+
+    def test_same_as_legacy(self, tmp_path):
+        atoms = self._get_atoms(tmp_path)
+
+        for seed in range(3):
+            interactions = self._get_interactions(atoms, seed)
+            for inter_filter in [None, InteractionFilter.new_pli_filter()]:
+                calc = InteractionCalculator(inter_filter=inter_filter)
+                new = calc.find_dependent_interactions(interactions)
+                legacy = _legacy_dependent_interactions(calc, interactions)
+
+                assert any(i.type == "Salt bridge" for i in new)
+                assert any(i.type == "Water-bridged hydrogen bond"
+                           for i in new)
+                assert _get_keys(new) == _get_keys(legacy)
+
+    def test_multiple_waters(self, tmp_path):
+        from luna.mol.groups import AtomGroup
+
+        atoms = self._get_atoms(tmp_path)
+        by_res = defaultdict(list)
+        for atm in atoms:
+            by_res[atm.parent].append(atm)
+        residues = list(by_res)
+
+        res_grp = AtomGroup(by_res[residues[0]][:1])
+        lig_grp = AtomGroup(next(atms for res, atms in by_res.items()
+                                 if res.resname == "LIG")[:1])
+        h2o1, h2o2 = [AtomGroup(by_res[res]) for res in residues
+                      if res.is_water()][:2]
+
+        # Ligand - water 1 - water 2 - residue.
+        hbonds = [InteractionType(lig_grp, h2o1, "Hydrogen bond"),
+                  InteractionType(h2o1, h2o2, "Hydrogen bond"),
+                  InteractionType(h2o2, res_grp, "Hydrogen bond")]
+
+        calc = InteractionCalculator(max_bridging_waters=1)
+        single = calc.find_dependent_interactions(hbonds)
+        assert _get_keys(single) == \
+            _get_keys(_legacy_dependent_interactions(calc, hbonds))
+
+        calc = InteractionCalculator(max_bridging_waters=2)
+        multiple = calc.find_dependent_interactions(hbonds)
+        new_keys = set(_get_keys(multiple)) - set(_get_keys(single))
+        assert new_keys == set(_get_keys([InteractionType(
+            lig_grp, res_grp, "Water-bridged hydrogen bond",
+            params={"depends_on": hbonds})]))
+
+        # The bridge is valid for protein-ligand interactions.
+        calc.inter_filter = InteractionFilter.new_pli_filter()
+        assert new_keys <= set(_get_keys(
+            calc.find_dependent_interactions(hbonds)))
+
+
+class TestCandidatePairs:
+
+    def _get_atm_grps(self, tmp_path):
+        from luna.projects import LocalProject
+        from luna.mol.entry import MolFileEntry
+
+        inputs_path = "%s/example/inputs" % dirname(dirname(abspath(__file__)))
+        mol_file = "%s/ligands.mol2" % inputs_path
+
+        entry = MolFileEntry.from_mol_file("protein", "ZINC000012442563",
+                                           mol_file, is_multimol_file=True)
+        proj = LocalProject(entries=[entry], pdb_path=inputs_path,
+                            working_path=str(tmp_path / "proj"),
+                            overwrite_path=True, logging_enabled=False)
+
+        pdb_parser, structure, ligand = proj._parse_complex(entry)
+        add_h = proj._decide_hydrogen_addition(pdb_parser.get_header(), entry)
+        atm_grps_mngr = proj._perceive_chemical_groups(entry, structure[0],
+                                                       ligand, add_h)
+        atm_grps_mngr.calc_normals()
+        return atm_grps_mngr.atm_grps
+
+    def test_same_interactions(self, tmp_path):
+
+        class UnfilteredCalculator(InteractionCalculator):
+            # Only the binding site cutoff is applied, as before the
+            # candidate pairs were prefiltered by distance.
+            def _get_dist_cutoffs(self, feat_names1, feat_names2):
+                return float("inf"), float("inf")
+
+        def get_keys(interactions_mngr):
+            return sorted((i.type, tuple(sorted([str(i.src_grp),
+                                                 str(i.trgt_grp)])),
+                           tuple(sorted(i.params.items())))
+                          for i in interactions_mngr.interactions)
+
+        atm_grps = self._get_atm_grps(tmp_path)
+
+        for inter_filter in [None, InteractionFilter.new_pli_filter()]:
+            opts = dict(inter_filter=inter_filter, add_proximal=True,
+                        add_dependent_inter=True)
+            calc = InteractionCalculator(**opts)
+            keys = get_keys(calc.calc_interactions(atm_grps))
+
+            calc = UnfilteredCalculator(**opts)
+            assert get_keys(calc.calc_interactions(atm_grps)) == keys
+            assert len(keys) > 0
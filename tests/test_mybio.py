@@ -50,3 +50,181 @@ class TestExtractor:
         assert extractor.entity.id != 1
 
 
+
+class TestNeighborSearch:
+
+    def _get_structure(self):
+        from luna.MyBio.PDB.PDBParser import PDBParser
+        from luna.util.default_values import LUNA_PATH
+
+        pdb_parser = PDBParser(PERMISSIVE=True, QUIET=True)
+        return pdb_parser.get_structure("protein",
+                                        f"{LUNA_PATH}/example/inputs/"
+                                        "protein.pdb")
+
+    def test_cached_index(self):
+        import numpy as np
+
+        model = self._get_structure()[0]
+        ns = model.get_neighbor_search()
+        assert model.get_neighbor_search() is ns
+
+        # Any change in the structure discards the index.
+        atom = next(model.get_atoms())
+        atom.set_coord(atom.coord + np.array([100, 100, 100], "f"))
+        assert model.get_neighbor_search() is not ns
+
+        ns = model.get_neighbor_search()
+        chain = model.child_list[0]
+        chain.detach_child(chain.child_list[0].id)
+        assert model.get_neighbor_search() is not ns
+
+    def test_pickled_index(self):
+        import pickle
+
+        structure = self._get_structure()
+        data = pickle.dumps(structure)
+
+        # The index is not pickled.
+        ns = structure[0].get_neighbor_search()
+        assert pickle.dumps(structure) == data
+        model = pickle.loads(pickle.dumps(structure[0]))
+        assert model._neighbor_search is None
+        assert len(model.get_neighbor_search().search(
+            next(model.get_atoms()).coord, 3)) > 1
+        assert structure[0].get_neighbor_search() is ns
+
+    def test_contacts_with_many(self):
+        from luna.interaction.contact import (get_contacts_with,
+                                              get_contacts_with_many)
+
+        model = self._get_structure()[0]
+        residues = list(model.get_residues())[:20]
+
+        for level in ["A", "R"]:
+            all_contacts = get_contacts_with_many(residues, radius=4,
+                                                  level=level)
+            assert len(all_contacts) == len(residues)
+            for res, contacts in zip(residues, all_contacts):
+                assert len(contacts) > 0
+                assert contacts == get_contacts_with(res, radius=4,
+                                                     level=level)
+
+
+class TestEntityToMol:
+
+    def test_in_memory_conversion(self):
+        from openbabel.pybel import Molecule
+        from luna.MyBio.PDB.PDBParser import PDBParser
+        from luna.MyBio.selector import ResidueSelector
+        from luna.MyBio.util import biopython_entity_to_mol
+        from luna.util.default_values import LUNA_PATH
+
+        pdb_parser = PDBParser(PERMISSIVE=True, QUIET=True)
+        structure = pdb_parser.get_structure("protein",
+                                             f"{LUNA_PATH}/example/inputs/"
+                                             "protein.pdb")
+        model = structure[0]
+        residues = set(list(model.get_residues())[100:110])
+        select = ResidueSelector(residues, keep_altloc=False)
+
+        for add_h, ph in [(False, None), (True, None), (True, 7.4)]:
+            mols = []
+            for in_memory in [True, False]:
+                mol_obj, _ = biopython_entity_to_mol(model, select,
+                                                     add_h=add_h, ph=ph,
+                                                     in_memory=in_memory)
+                mols.append(mol_obj)
+
+            # Both conversions produce the same molecule, except for its
+            # title and the header line with the creation timestamp.
+            blocks = [Molecule(m.unwrap()).write("mol").split("\n")[2:]
+                      for m in mols]
+            assert blocks[0] == blocks[1]
+
+
+class TestSelectors:
+
+    def test_set_based_selection(self):
+        from io import StringIO
+        from luna.MyBio.PDB.PDBIO import PDBIO, Select
+        from luna.MyBio.PDB.PDBParser import PDBParser
+        from luna.MyBio.selector import AtomSelector, ResidueSelector
+        from luna.util.default_values import LUNA_PATH
+
+        class ListSelector(Select):
+            # Reference selector based on list membership.
+            def __init__(self, atoms):
+                self.atoms = list(atoms)
+
+            def accept_atom(self, atom):
+                return atom in self.atoms
+
+        pdb_parser = PDBParser(PERMISSIVE=True, QUIET=True)
+        structure = pdb_parser.get_structure("protein",
+                                             f"{LUNA_PATH}/example/inputs/"
+                                             "protein.pdb")
+        residues = list(structure.get_residues())[::25]
+        atoms = [atm for res in residues for atm in res.get_unpacked_list()]
+
+        def save(select):
+            io = PDBIO()
+            io.set_structure(structure)
+            fh = StringIO()
+            io.save(fh, select)
+            # Unselected residues used to leak into TER records.
+            return [line for line in fh.getvalue().split("\n")
+                    if not line.startswith("TER")]
+
+        expected = save(ListSelector(atoms))
+        for select in [AtomSelector(atoms), ResidueSelector(residues)]:
+            assert save(select) == expected
+
+        # The original order of the entries is kept.
+        assert AtomSelector(atoms).entries == atoms
+
+        # Chains and residues without selected atoms are skipped.
+        select = AtomSelector(atoms[:1])
+        assert select.accept_residue(residues[0])
+        assert not select.accept_residue(residues[1])
+
+
+class TestPDBParser:
+
+    def test_fast_parsing(self):
+        import gc
+        from luna.MyBio.PDB.PDBParser import PDBParser
+        from luna.util.default_values import LUNA_PATH
+
+        pdb_file = f"{LUNA_PATH}/example/inputs/protein.pdb"
+        with open(pdb_file) as fh:
+            lines = fh.readlines()
+        # An invalid occupancy is parsed line by line.
+        atm_lines = [i for i, line in enumerate(lines)
+                     if line.startswith("ATOM")]
+        line = lines[atm_lines[10]]
+        lines[atm_lines[10]] = line[:54] + "      " + line[60:]
+        pdb_block = "".join(lines)
+
+        structures = []
+        for fast in [False, True]:
+            pdb_parser = PDBParser(PERMISSIVE=True, QUIET=True,
+                                   FIX_EMPTY_CHAINS=True,
+                                   FIX_ATOM_NAME_CONFLICT=True,
+                                   FAST_PARSING=fast)
+            structures.append(pdb_parser.get_structure("protein", pdb_file))
+            structures.append(
+                pdb_parser.get_structure_from_pdb_block("protein",
+                                                        pdb_block))
+            # The garbage collector is enabled again.
+            assert gc.isenabled()
+
+        def get_atom_data(structure):
+            return [(atm.get_full_id(), atm.get_fullname(),
+                     atm.get_serial_number(), atm.element,
+                     atm.get_occupancy(), atm.get_bfactor(),
+                     atm.coord.tolist()) for atm in structure.get_atoms()]
+
+        assert get_atom_data(structures[0]) == get_atom_data(structures[2])
+        assert get_atom_data(structures[1]) == get_atom_data(structures[3])
+        assert get_atom_data(structures[1])[10][4] is None
@@ -0,0 +1,259 @@
+import sys
+from os.path import dirname, abspath
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from luna.projects import EntryResults
+from luna.util.file import pickle_data
+
+
+class TestEntryResults:
+
+    def test_lazy_loading(self, tmp_path):
+        results_file = str(tmp_path / "entry.zip")
+        EntryResults("E1", {"groups": [1, 2]}, ["inter"],
+                     ifp=[1, 2, 3], mfp=[4]).save(results_file)
+
+        # Sections are only loaded when accessed.
+        results = EntryResults.load(results_file)
+        assert results.ifp == [1, 2, 3]
+        assert "atm_grps_mngr" not in results.__dict__
+        assert "mfp" not in results.__dict__
+
+        # Sections that were not loaded are kept when saving again.
+        results.ifp = [5]
+        results.save(results_file)
+        results = EntryResults.load(results_file, lazy=False)
+        assert (results.entry, results.atm_grps_mngr,
+                results.interactions_mngr, results.ifp, results.mfp) == \
+            ("E1", {"groups": [1, 2]}, ["inter"], [5], [4])
+
+        # Results saved by older versions as a single pickled object.
+        legacy_file = str(tmp_path / "legacy.pkl.gz")
+        pickle_data(results, legacy_file)
+        assert EntryResults.load(legacy_file).mfp == [4]
+
+    def test_shared_entry(self, tmp_path):
+        from luna.mol.entry import ChainEntry
+        from luna.mol.groups import AtomGroupsManager
+        from luna.interaction.calc import InteractionsManager
+
+        entry = ChainEntry("1ABC", "A")
+        results = EntryResults(entry, AtomGroupsManager(entry=entry),
+                               InteractionsManager(entry=entry))
+        results_file = str(tmp_path / "entry.zip")
+        results.save(results_file)
+        assert results.atm_grps_mngr.entry is entry
+
+        for lazy in [True, False]:
+            results = EntryResults.load(results_file, lazy=lazy)
+            assert results.interactions_mngr.entry is results.entry
+            assert results.atm_grps_mngr.entry is results.entry
+            assert results.entry.to_string() == "1ABC:A"
+
+    def test_legacy_results_file(self, tmp_path):
+        from luna.projects import LocalProject
+        from luna.mol.entry import ChainEntry
+
+        entry = ChainEntry("1ABC", "A")
+        proj = LocalProject(entries=[entry], pdb_path=str(tmp_path),
+                            working_path=str(tmp_path),
+                            overwrite_path=True, logging_enabled=False)
+        (tmp_path / "chunks").mkdir()
+
+        # Results saved by older versions are still read.
+        legacy_file = tmp_path / "chunks" / "1ABC:A.pkl.gz"
+        pickle_data(EntryResults(entry, None, None, ifp=[1]),
+                    str(legacy_file))
+        assert proj.get_entry_results(entry).ifp == [1]
+
+        # And they are replaced when results are saved again.
+        results = proj.get_entry_results(entry)
+        results.ifp = [2]
+        proj.save_entry_results(results)
+        assert not legacy_file.exists()
+        assert proj.get_entry_results(entry).ifp == [2]
+        assert EntryResults.load(str(tmp_path / "chunks" / "1ABC:A.zip")).ifp \
+            == [2]
+
+
+class TestStructureCache:
+
+    def _write_pdb(self, pdb_file):
+        atoms = [
+            # Residue with disordered atoms.
+            ("ATOM", " N  ", " ", "SER", 1, (0.0, 0.0, 0.0), 1.0, "N"),
+            ("ATOM", " CA ", " ", "SER", 1, (1.5, 0.0, 0.0), 1.0, "C"),
+            ("ATOM", " CB ", "A", "SER", 1, (2.0, 1.4, 0.0), 0.6, "C"),
+            ("ATOM", " CB ", "B", "SER", 1, (2.0, 1.4, 0.5), 0.4, "C"),
+            ("ATOM", " OG ", "A", "SER", 1, (3.4, 1.4, 0.0), 0.6, "O"),
+            ("ATOM", " OG ", "B", "SER", 1, (3.4, 1.4, 0.5), 0.4, "O"),
+            # Point mutation.
+            ("ATOM", " N  ", "A", "ALA", 2, (2.2, -1.2, 0.0), 0.5, "N"),
+            ("ATOM", " CA ", "A", "ALA", 2, (3.6, -1.2, 0.0), 0.5, "C"),
+            ("ATOM", " N  ", "B", "GLY", 2, (2.2, -1.2, 0.3), 0.5, "N"),
+            ("ATOM", " CA ", "B", "GLY", 2, (3.6, -1.2, 0.3), 0.5, "C"),
+            ("HETATM", " C1 ", " ", "LIG", 100, (5.0, 0.0, 0.0), 1.0, "C"),
+            ("HETATM", " O1 ", " ", "LIG", 100, (6.2, 0.0, 0.0), 1.0, "O"),
+        ]
+        with open(pdb_file, "w") as OUT:
+            for i, (record, name, altloc, resname, resseq,
+                    coord, occ, element) in enumerate(atoms):
+                OUT.write("%-6s%5d %4s%1s%3s A%4d    %8.3f%8.3f%8.3f%6.2f"
+                          "%6.2f          %2s\n"
+                          % ((record, i + 1, name, altloc, resname, resseq)
+                             + coord + (occ, 10.0, element)))
+            OUT.write("END\n")
+
+    def test_disordered_receptor(self, tmp_path):
+        from luna.projects import LocalProject
+        from luna.mol.entry import ChainEntry, Entry
+
+        pdb_file = str(tmp_path / "ALT.pdb")
+        self._write_pdb(pdb_file)
+        entries = [ChainEntry("ALT", "A"), Entry("ALT", "A", "LIG", 100)]
+        proj = LocalProject(entries=entries, pdb_path=str(tmp_path),
+                            working_path=str(tmp_path / "proj"),
+                            overwrite_path=True, logging_enabled=False)
+
+        def get_atom_data(structure):
+            return [(atm.get_full_id(), atm.altloc, atm.coord.tolist(),
+                     atm.get_parent().resname)
+                    for res in structure.get_residues()
+                    for atm in res.get_unpacked_list()]
+
+        pdb_parser, _, _ = proj._parse_complex(entries[0])
+        expected = get_atom_data(pdb_parser.get_structure("ALT", pdb_file))
+        # Both disordered atoms and residues are present.
+        assert any(atm.is_disordered() == 2
+                   for res in pdb_parser.get_structure("ALT", pdb_file)
+                   .get_residues() for atm in res)
+        assert any(res.is_disordered() == 2
+                   for res in pdb_parser.get_structure("ALT", pdb_file)
+                   .get_residues())
+
+        structures = []
+        for entry in entries + entries:
+            _, structure, ligand = proj._parse_complex(entry)
+            assert ligand.is_target()
+            assert get_atom_data(structure) == expected
+            structures.append(structure)
+
+        # The receptor was parsed only once and each entry got its own copy.
+        assert len(proj._structure_cache) == 1
+        all_atoms = [id(atm) for s in structures
+                     for res in s.get_residues()
+                     for atm in res.get_unpacked_list()]
+        assert len(set(all_atoms)) == len(all_atoms)
+        template = next(iter(proj._structure_cache.values()))[0]
+        assert not any(res.is_target() for res in template.get_residues())
+
+    def test_same_as_uncached(self, tmp_path):
+        from luna.projects import LocalProject
+        from luna.mol.entry import ChainEntry
+        from luna.interaction.calc import InteractionCalculator
+
+        # Lac repressor headpiece bound to DNA (NMR, with hydrogens).
+        entry = ChainEntry("1LCD", "A")
+        pdb_path = "%s/data" % dirname(abspath(__file__))
+
+        def perceive(use_cache):
+            proj = LocalProject(entries=[entry], pdb_path=pdb_path,
+                                working_path=str(tmp_path / "proj"),
+                                overwrite_path=True, logging_enabled=False,
+                                use_cache=use_cache)
+            pdb_parser, structure, ligand = proj._parse_complex(entry)
+            add_h = proj._decide_hydrogen_addition(pdb_parser.get_header(),
+                                                   entry)
+            cache = None
+            if use_cache:
+                proj.cache_protein_properties(entry)
+                cache = proj._get_structure_cache(entry, add_h)
+                assert cache is not None
+            atm_grps_mngr = proj._perceive_chemical_groups(entry,
+                                                           structure[0],
+                                                           ligand, add_h,
+                                                           cache)
+            atm_grps_mngr.calc_normals()
+            return atm_grps_mngr
+
+        def get_grp_keys(atm_grps_mngr):
+            return sorted((tuple(atm.full_id[2:] for atm in atm_grp.atoms),
+                           tuple(sorted(atm_grp.feature_names)))
+                          for atm_grp in atm_grps_mngr.atm_grps)
+
+        def get_inter_keys(atm_grps_mngr):
+            calc = InteractionCalculator(add_dependent_inter=True)
+            interactions_mngr = calc.calc_interactions(atm_grps_mngr.atm_grps)
+            return sorted((i.type, tuple(sorted([str(i.src_grp),
+                                                 str(i.trgt_grp)])))
+                          for i in interactions_mngr.interactions)
+
+        uncached = perceive(False)
+        cached = perceive(True)
+
+        # DNA bases are aromatic regardless of the hydrogens in the file.
+        assert any("Aromatic" in atm_grp.feature_names
+                   for atm_grp in uncached.atm_grps
+                   if next(iter(atm_grp.compounds)).get_parent().id == "B")
+
+        assert get_grp_keys(cached) == get_grp_keys(uncached)
+        inter_keys = get_inter_keys(uncached)
+        assert get_inter_keys(cached) == inter_keys
+        assert len(inter_keys) > 0
+
+
+class TestFingerprintFiles:
+
+    def test_stale_mfp_file(self, tmp_path):
+        from luna.projects import LocalProject
+
+        proj = LocalProject(entries=[], pdb_path=str(tmp_path),
+                            working_path=str(tmp_path / "proj"),
+                            mfp_output=str(tmp_path / "mfp.csv"),
+                            overwrite_path=True, logging_enabled=False)
+
+        # A binary file left by a previous run.
+        (tmp_path / "mfp.npz").write_bytes(b"")
+        proj._create_mfp_file()
+
+        assert (tmp_path / "mfp.csv").read_text() == "ligand_id,on_bits\n"
+        assert not (tmp_path / "mfp.npz").exists()
+
+
+class TestIFPIndex:
+
+    def test_outdated_entries(self, tmp_path):
+        import os
+        from luna.projects import LocalProject
+        from luna.mol.entry import ChainEntry
+        from luna.interaction.fp.fingerprint import Fingerprint
+
+        entries = [ChainEntry("1ABC", "A"), ChainEntry("1ABC", "B")]
+        proj = LocalProject(entries=entries, pdb_path=str(tmp_path),
+                            working_path=str(tmp_path),
+                            overwrite_path=True, logging_enabled=False)
+        (tmp_path / "chunks").mkdir()
+
+        def save_ifp(entry, indices):
+            ifp = Fingerprint.from_indices(indices, fp_length=proj.ifp_length)
+            proj.save_entry_results(EntryResults(entry, None, None, ifp=ifp))
+            return ifp
+
+        ifp1 = save_ifp(entries[0], [1, 2, 3])
+        save_ifp(entries[1], [4, 5])
+        assert proj.get_ifp_index().names == {"1ABC:A", "1ABC:B"}
+
+        # The first entry is processed again and the second one is dropped.
+        ifp2 = save_ifp(entries[0], [6, 7])
+        results_file = str(tmp_path / "chunks" / "1ABC:A.zip")
+        stat = os.stat(results_file)
+        os.utime(results_file, ns=(stat.st_atime_ns,
+                                   stat.st_mtime_ns + 10 ** 9))
+        proj.entries = entries[:1]
+
+        index = proj.get_ifp_index()
+        assert index.names == {"1ABC:A"}
+        assert index.search(ifp2, k=1) == [("1ABC:A", 1.0)]
+        assert index.search_threshold(ifp1, 0.1) == []
+        assert proj.get_ifp_index().search(ifp2, k=1) == [("1ABC:A", 1.0)]
@@ -1,9 +1,32 @@
 import sys
 from os.path import dirname, abspath
+from queue import Queue
 
 sys.path.append(dirname(dirname(abspath(__file__))))
 
 from luna.util.progress_tracker import *
+from luna.util.jobs import ParallelJobs
+from luna.util import math as im
+from luna.util.store import ColumnarStore
+from luna.util.exceptions import IllegalArgumentError
+
+
+def double(x):
+    if x == 3:
+        raise ValueError("Invalid value.")
+    return x * 2
+
+
+factor = None
+
+
+def init_factor(value):
+    global factor
+    factor = value
+
+
+def multiply(x):
+    return x * factor
 
 
 class TestProgressResult:
@@ -36,6 +59,7 @@ class TestProgressResult:
             pr.errors
 
     def test_append(self):
+        import pytest
 
         # Appending invalid data to 'results'
         with pytest.raises(TypeError):
@@ -80,3 +104,135 @@ class TestProgressResult:
         assert pr.outputs != [(1, "a")]
 
 
+class TestProgressTracker:
+
+    def test_tracking(self):
+        q = Queue()
+        pt = ProgressTracker(4, q)
+        pt.start()
+
+        q.put(None)
+        q.put(ProgressData(1, 1, output_data="a"))
+        q.put(ProgressData(2, 3, exception=ValueError()))
+        q.put(ProgressData(3, 2, output_data="c"))
+        q.put(ProgressData(4, 2, output_data="d"))
+        pt.end()
+
+        assert pt.progress == 4
+        assert pt.nerrors == 1
+        assert pt.avg_running_time == 2
+        assert pt.results.inputs == [1, 2, 3, 4]
+        assert [e[0] for e in pt.results.errors] == [2]
+
+
+class TestParallelJobs:
+
+    def test_chunks(self):
+        args = [(i,) for i in range(10)]
+
+        for chunksize in [None, 1, 3, 20]:
+            pj = ParallelJobs(2)
+            # Force parallel execution even if a single CPU is available.
+            pj.nproc = 2
+            res = pj.run_jobs(args, double, chunksize=chunksize)
+
+            assert len(res) == 10
+            assert sorted(res.outputs) == [((i,), i * 2 if i != 3 else None)
+                                           for i in range(10)]
+            assert [e[0] for e in res.errors] == [(3,)]
+
+    def test_persistent_pool(self):
+        args = [(i,) for i in range(10)]
+
+        for nproc in [None, 2]:
+            pj = ParallelJobs(nproc, initializer=init_factor, initargs=(3,))
+            # Force parallel execution even if a single CPU is available.
+            pj.nproc = nproc
+
+            with pj:
+                assert pj.is_running
+                res1 = pj.run_jobs(args, multiply, chunksize=2)
+                res2 = pj.run_jobs(args, double)
+
+            assert not pj.is_running
+            assert sorted(res1.outputs) == [((i,), i * 3) for i in range(10)]
+            assert len(res2.errors) == 1
+
+
+class TestMath:
+
+    def test_calc_normals(self):
+        # Plane z = 2x - y + 1.
+        plane_pts = [(0, 0, 1), (1, 0, 3), (0, 1, 0), (1, 1, 2), (2, 3, 2)]
+        # A ring-like set of points close to the plane z = 0.
+        ring_pts = [(1, 0, 0.01), (0.5, 0.87, -0.02), (-0.5, 0.87, 0.01),
+                    (-1, 0, -0.01), (-0.5, -0.87, 0.02), (0.5, -0.87, -0.01)]
+
+        normals = im.calc_normals([plane_pts, ring_pts, plane_pts[:3]])
+        assert normals[0].tolist() == [-2, 1, 1]
+        assert normals[2].tolist() == [-2, 1, 1]
+        assert im.to_quad1(im.angle(normals[1], [0, 0, 1])) < 2
+
+        assert im.calc_normal(ring_pts).tolist() == normals[1].tolist()
+
+
+class TestColumnarStore:
+
+    def test_read(self, tmp_path):
+        import pytest
+
+        store = ColumnarStore(str(tmp_path))
+        for i in range(4):
+            store.append("inters", {"entry": ["E%d" % i] * 3,
+                                    "interaction": ["HB", "CP", "HB"],
+                                    "value": [i, i + 1, i + 2]})
+        assert store.append("inters", {"entry": []}) is None
+        assert store.tables == ["inters"]
+
+        df = store.read("inters")
+        assert list(df.columns) == ["entry", "interaction", "value"]
+        assert len(df) == 12
+
+        # Column projection and predicates.
+        df = store.read("inters", columns=["entry"],
+                        filters=[("interaction", "==", "HB"),
+                                 ("value", ">", 2)])
+        assert df["entry"].tolist() == ["E1", "E2", "E3", "E3"]
+        df = store.read("inters", filters=[("entry", "in", ["E0", "E3"])])
+        assert df["value"].tolist() == [0, 1, 2, 3, 4, 5]
+        assert len(store.read("inters", filters=[("value", ">", 10)])) == 0
+
+        with pytest.raises(IllegalArgumentError):
+            store.read("inters", filters=[("value", "~", 1)])
+        with pytest.raises(IllegalArgumentError):
+            store.read("inters", columns=["missing"])
+        with pytest.raises(IllegalArgumentError):
+            store.append("inters", {"entry": ["E4"], "value": [1, 2]})
+
+    def test_compact(self, tmp_path):
+        store = ColumnarStore(str(tmp_path))
+        for i in range(5):
+            store.append("inters", {"entry": ["E%d" % i] * 2,
+                                    "value": [i, i]})
+        expected = store.read("inters")
+
+        # The order of rows is kept after compaction.
+        store.compact("inters", row_group_size=4)
+        assert len(list((tmp_path / "inters").glob("*.npz"))) == 3
+        assert store.read("inters").equals(expected)
+
+        # Strings from pandas string arrays are not stored as objects,
+        # which could not be loaded without pickle.
+        import numpy as np
+        import pandas as pd
+        store._write_row_group("inters", {
+            "entry": pd.array(["E5", "E6"], dtype="string"),
+            "value": np.array([5, 6])})
+        store.compact("inters", row_group_size=4)
+        for rg_file in (tmp_path / "inters").glob("*.npz"):
+            with np.load(rg_file, allow_pickle=False) as npz:
+                assert npz["entry.values"].dtype.kind == "U"
+        assert store.read("inters")["entry"].tolist()[-2:] == ["E5", "E6"]
+
+        store.drop("inters")
+        assert store.tables == []
@@ -0,0 +1,40 @@
+import sys
+from os.path import dirname, abspath
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from luna.wrappers.base import MolWrapper, cache_smarts_matches
+
+
+class TestAtomWrapper:
+
+    def test_matches_smarts(self):
+        smiles = ["N[C@@H](CCC(N)=O)C(O)=O", "c1nc[nH]c1CC(N)C(=O)O"]
+        patterns = ["C(N)(C)=O", "[#6]", "CC",
+                    "[$([OX1]=[CX3][OX1H0-,OX2H1])]",
+                    "[$([n;H1]cn),$(nc[n;H1]),$([n;H0-1]cn);R1r5]"]
+
+        for smi in smiles:
+            ob_mol = MolWrapper.from_smiles(smi, mol_obj_type="openbabel")
+            rdk_mol = MolWrapper.from_smiles(smi, mol_obj_type="rdkit")
+
+            for smarts in patterns:
+                # Open Babel indices start at 1.
+                ob_matches = [atm.get_idx() - 1 for atm in ob_mol.get_atoms()
+                              if atm.matches_smarts(smarts)]
+                rdk_matches = [atm.get_idx() for atm in rdk_mol.get_atoms()
+                               if atm.matches_smarts(smarts)]
+                assert ob_matches == rdk_matches
+
+                # Cached matches are the same.
+                with cache_smarts_matches():
+                    assert ob_matches == [atm.get_idx() - 1
+                                          for atm in ob_mol.get_atoms()
+                                          if atm.matches_smarts(smarts)]
+                    assert rdk_matches == [atm.get_idx()
+                                           for atm in rdk_mol.get_atoms()
+                                           if atm.matches_smarts(smarts)]
+
+        glutamine = MolWrapper.from_smiles(smiles[0], mol_obj_type="rdkit")
+        assert [atm.get_idx() for atm in glutamine.get_atoms()
+                if atm.matches_smarts("C(N)(C)=O")] == [4]